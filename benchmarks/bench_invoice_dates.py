@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+"""
+HTML tarih çıkarımı ölçümü ve regresyon kontrolü: eski BeautifulSoup + 48 ayrı
+regex taraması ile InvoiceProcessor.extract_invoice_dates'in tek geçişli
+motoru karşılaştırılır. Her dosyada iki sürümün aynı tarihi döndürmesi gerekir.
+
+Kullanım:
+    python benchmarks/bench_invoice_dates.py --count 500
+    python benchmarks/bench_invoice_dates.py --corpus /yol/html_klasoru
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import skub  # noqa: E402
+import legacy  # noqa: E402
+
+KEYWORDS = skub.PRIMARY_DATE_KEYWORDS + ["TARIH", "FATURA TARİHİ", "Son Ödeme Tarihi", "Tarihi"]
+SEPARATORS = [":", " : ", "=", "-", " ", "", "&nbsp;", "</td><td>", ":</b> "]
+NOISE = ["Tutar: 1.234,56 TL", "Vergi No: 1234567890", "Saat 12:30", "Sayfa 1/2",
+         "IBAN TR12 0001 0000", "Miktar 12.5", "ETTN 3f2a-11ee-9c1d", "&amp; Ltd. Şti."]
+
+
+def random_date(rnd):
+    sep = rnd.choice(".-/")
+    day = rnd.randint(1, 31)
+    month = rnd.randint(1, 13)
+    year = rnd.choice([2019, 2021, 2023, 2024, 20231])
+    day_str = f"{day:02d}" if rnd.random() < 0.7 else str(day)
+    month_str = f"{month:02d}" if rnd.random() < 0.7 else str(month)
+    return f"{day_str}{sep}{month_str}{sep}{year}"
+
+
+def random_invoice(rnd):
+    """Gerçek e-Fatura/e-Arşiv şablonlarına benzeyen, tarih dağılımı rastgele HTML üretir"""
+    rows = []
+    for _ in range(rnd.randint(0, 6)):
+        kind = rnd.random()
+        if kind < 0.45:
+            rows.append(f"<tr><td>{rnd.choice(KEYWORDS)}{rnd.choice(SEPARATORS)}{random_date(rnd)}</td></tr>")
+        elif kind < 0.75:
+            rows.append(f"<tr><td>{rnd.choice(NOISE)}</td><td>{random_date(rnd)}</td></tr>")
+        elif kind < 0.85:
+            rows.append(f"<!-- {rnd.choice(KEYWORDS)}: {random_date(rnd)} -->")
+        elif kind < 0.9:
+            rows.append(f"<script>var d = '{random_date(rnd)}';</script>")
+        elif kind < 0.95:
+            # Tırnaklı öznitelik değerinde ">" ve tarih: metne girmemeli
+            quote = rnd.choice("\"'")
+            rows.append(f"<tr><td title={quote}{rnd.choice(KEYWORDS)} > {random_date(rnd)}{quote}>"
+                        f"{rnd.choice(NOISE)}</td></tr>")
+        else:
+            rows.append(f"<tr><td>{random_date(rnd)}{random_date(rnd)}</td></tr>")
+    filler = "".join(f"<tr><td>Kalem {i}</td><td>{rnd.choice(NOISE)}</td></tr>" for i in range(rnd.randint(5, 120)))
+    rnd.shuffle(rows)
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>e-Fatura</title>"
+        "<style>td { font-family: Arial; } .t { color: #333; }</style></head>"
+        f"<body><table>{''.join(rows)}{filler}</table></body></html>"
+    )
+
+
+def write_corpus(folder, count, seed):
+    rnd = random.Random(seed)
+    paths = []
+    for i in range(count):
+        path = os.path.join(folder, f"fatura_{i}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(random_invoice(rnd))
+        paths.append(path)
+    return paths
+
+
+def timed(func, paths):
+    start = time.perf_counter()
+    results = [func(p) for p in paths]
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=500, help="üretilecek HTML sayısı")
+    parser.add_argument("--seed", type=int, default=2024, help="rastgele üretim tohumu")
+    parser.add_argument("--corpus", help="üretmek yerine bu klasördeki .html/.htm dosyalarını kullan")
+    args = parser.parse_args()
+
+    work_dir = None
+    try:
+        if args.corpus:
+            paths = legacy.find_files(args.corpus, ['.html', '.htm'])
+        else:
+            work_dir = tempfile.mkdtemp(prefix="skub_bench_")
+            paths = write_corpus(work_dir, args.count, args.seed)
+        if not paths:
+            print("HTML dosyası bulunamadı.")
+            return 1
+
+        fast = skub.InvoiceProcessor(None)
+        soup = skub.InvoiceProcessor(None)
+        soup.fast_html_text = False
+
+        old_time, old_results = timed(legacy.extract_invoice_dates, paths)
+        soup_time, soup_results = timed(soup.extract_invoice_dates, paths)
+        new_time, new_results = timed(fast.extract_invoice_dates, paths)
+
+        mismatches = [(p, o, n) for p, o, n, s in zip(paths, old_results, new_results, soup_results) if not o == n == s]
+        for path, old, new in mismatches[:10]:
+            print(f"FARK: {os.path.basename(path)}: eski={old} yeni={new}")
+
+        count = len(paths)
+        print(f"{count} HTML dosyası:")
+        print(f"  eski (bs4 + 48 regex)       : {old_time:8.3f} sn  ({old_time / count * 1000:.2f} ms/dosya)")
+        print(f"  yeni motor, bs4 metni       : {soup_time:8.3f} sn  ({soup_time / count * 1000:.2f} ms/dosya)")
+        print(f"  yeni motor, hızlı metin     : {new_time:8.3f} sn  ({new_time / count * 1000:.2f} ms/dosya)")
+        print(f"  hızlanma                    : {old_time / new_time:8.1f}x")
+        print(f"  farklı sonuç                : {len(mismatches)}")
+        return 1 if mismatches else 0
+    finally:
+        if work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
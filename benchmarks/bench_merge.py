@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+"""
+PDF birleştirme ölçümü: eski PdfMerger (her şeyi bellekte toplayıp sonda yazar)
+ile OrderedPdfMerger/StreamingPdfWriter (tamamlandıkça diske yazar) düz ve
+optimize (ortak nesneleri paylaşan, nesne akışlı) kipte karşılaştırılır.
+Her yöntem ayrı bir süreçte çalıştırılır, böylece tepe bellek (RSS) ölçümleri
+birbirini etkilemez.
+
+Sentetik PDF'lerde tüm faturalar aynı yazı tipini taşır; gerçek dönüştürücü
+çıktısıyla ölçmek için ayrı kaydedilmiş fatura PDF'lerinin klasörü --pdf-dir
+ile verilir (ör. python skub.py arsiv.zip -o cikti --no-merge).
+
+Kullanım:
+    python benchmarks/bench_merge.py --count 2000
+    python benchmarks/bench_merge.py --pdf-dir cikti/arsiv/faturalar_20240101_120000
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyPDF2 import PdfWriter  # noqa: E402
+from PyPDF2._page import PageObject  # noqa: E402
+from PyPDF2.generic import DecodedStreamObject, DictionaryObject, NameObject, NumberObject  # noqa: E402
+
+
+def write_invoice_pdf(path, text, font_data, pages=1):
+    """wkhtmltopdf çıktısına benzeyen, gömülü yazı tipi içeren küçük bir PDF yazar"""
+    writer = PdfWriter()
+    for page_no in range(pages):
+        page = PageObject.create_blank_page(None, 595, 842)
+        font_file = DecodedStreamObject()
+        font_file.set_data(font_data)
+        descriptor = DictionaryObject({
+            NameObject("/Type"): NameObject("/FontDescriptor"),
+            NameObject("/FontName"): NameObject("/ABCDEF+Arial"),
+            NameObject("/Flags"): NumberObject(32),
+            NameObject("/FontFile2"): writer._add_object(font_file),
+        })
+        font = DictionaryObject({
+            NameObject("/Type"): NameObject("/Font"),
+            NameObject("/Subtype"): NameObject("/TrueType"),
+            NameObject("/BaseFont"): NameObject("/ABCDEF+Arial"),
+            NameObject("/FontDescriptor"): writer._add_object(descriptor),
+        })
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): writer._add_object(font)})
+        })
+        content = DecodedStreamObject()
+        lines = "".join(f"BT /F1 9 Tf 40 {800 - i * 12} Td ({text} satir {i}) Tj ET\n" for i in range(60))
+        content.set_data(lines.encode("latin-1"))
+        page[NameObject("/Contents")] = writer._add_object(content)
+        writer.add_page(page)
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+def write_corpus(folder, count, font_kb, seed=1):
+    rnd = random.Random(seed)
+    font_data = bytes(rnd.getrandbits(8) for _ in range(font_kb * 1024))
+    paths = []
+    for i in range(count):
+        path = os.path.join(folder, f"fatura_{i}.pdf")
+        write_invoice_pdf(path, f"Fatura {i}", font_data, pages=1 + (i % 7 == 0))
+        paths.append(path)
+    return paths
+
+
+def run_method(method, list_path, output_path):
+    """Alt süreçte tek bir yöntemi çalıştırır ve sonucu JSON olarak yazdırır"""
+    import skub
+    with open(list_path, encoding="utf-8") as f:
+        paths = json.load(f)
+    start = time.perf_counter()
+    if method == "pdfmerger":
+        from PyPDF2 import PdfMerger
+        merger = PdfMerger()
+        for path in paths:
+            merger.append(path)
+        merger.write(output_path)
+        merger.close()
+    else:
+        merger = skub.OrderedPdfMerger(output_path, order=range(len(paths)), optimize=(method == "optimized"))
+        for idx, path in enumerate(paths):
+            merger.add(idx, path)
+        merger.close()
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "seconds": elapsed,
+        "peak_rss_mb": (skub.peak_rss_bytes() or 0) / (1024 * 1024),
+        "size_mb": os.path.getsize(output_path) / (1024 * 1024),
+    }))
+
+
+def measure(method, list_path, output_path):
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--run", method, list_path, output_path],
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=1000, help="birleştirilecek PDF sayısı")
+    parser.add_argument("--font-kb", type=int, default=24, help="her PDF'e gömülen yazı tipinin boyutu (KB)")
+    parser.add_argument("--pdf-dir", default=None, help="sentetik PDF'ler yerine bu klasördeki PDF'leri birleştir")
+    parser.add_argument("--run", nargs=3, metavar=("YONTEM", "LISTE", "CIKTI"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_method(*args.run)
+        return 0
+
+    work_dir = tempfile.mkdtemp(prefix="skub_bench_")
+    try:
+        if args.pdf_dir:
+            paths = sorted(os.path.join(args.pdf_dir, name) for name in os.listdir(args.pdf_dir)
+                           if name.lower().endswith(".pdf"))
+            print(f"{len(paths)} PDF ({args.pdf_dir}):")
+        else:
+            paths = write_corpus(work_dir, args.count, args.font_kb)
+            print(f"{args.count} PDF, ~{args.font_kb} KB yazı tipi/PDF:")
+        list_path = os.path.join(work_dir, "liste.json")
+        with open(list_path, "w", encoding="utf-8") as f:
+            json.dump(paths, f)
+        for method, label in (("pdfmerger", "PdfMerger (bellekte)"), ("streaming", "OrderedPdfMerger (akış)"),
+                              ("optimized", "OrderedPdfMerger (optimize)")):
+            result = measure(method, list_path, os.path.join(work_dir, f"{method}.pdf"))
+            print(f"  {label:26s}: {result['seconds']:7.2f} sn  tepe RSS {result['peak_rss_mb']:7.1f} MB"
+                  f"  çıktı {result['size_mb']:7.1f} MB")
+        return 0
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
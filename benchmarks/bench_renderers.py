@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+Dönüştürücü ölçümü: aynı sentetik arşiv (corpus.py) her dönüştürücüyle
+InvoiceJob üzerinden uçtan uca dönüştürülür; süre, fatura başına süre,
+işlemci süresi ve tepe bellek (RSS) karşılaştırılır. Her dönüştürücü ayrı bir
+süreçte çalışır, böylece ölçümler birbirini etkilemez. wkhtmltopdf ve
+xhtml2pdf dönüştürmeleri alt süreçlerde yapıldığından en büyük alt sürecin
+tepe belleği de ayrıca yazılır (yalnızca Unix).
+
+--wkhtmltopdf verilmezse sahte wkhtmltopdf (stub_wkhtmltopdf.py) kullanılır;
+bu durumda wkhtmltopdf satırı gerçek dönüştürme süresini değil yalnızca
+fatura başına süreç açma maliyetini gösterir.
+
+Kullanım:
+    python benchmarks/bench_renderers.py --count 500
+    python benchmarks/bench_renderers.py --count 500 --wkhtmltopdf /usr/local/bin/wkhtmltopdf
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import corpus  # noqa: E402
+
+STUB_PATH = os.path.join(BENCH_DIR, "stub_wkhtmltopdf.py")
+
+
+def child_peak_rss_mb():
+    """Beklenen alt süreçlerin en büyüğünün tepe belleği (MB), ölçülemezse None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_renderer(renderer, zip_path, work_dir, wkhtmltopdf_path, workers, batch_size):
+    """Alt süreçte tek bir dönüştürücüyle arşivi dönüştürür ve sonucu JSON olarak yazdırır"""
+    import skub
+    options = skub.RunOptions(renderer=renderer, wkhtmltopdf_path=wkhtmltopdf_path, cache_max_bytes=0,
+                              max_workers=int(workers) or None, batch_size=int(batch_size))
+    job = skub.InvoiceJob(zip_path, os.path.join(work_dir, f"cikti_{renderer}"), options,
+                          os.path.join(work_dir, f"temp_{renderer}"))
+    wall = time.perf_counter()
+    summary = job.run()
+    wall = time.perf_counter() - wall
+    skub.XhtmlToPdfRenderer.shutdown_pool()
+    times = os.times()
+    print(json.dumps({
+        "status": summary["status"],
+        "message": summary["message"],
+        "renderer": summary["renderer"],
+        "pdf_count": summary["pdf_count"],
+        "seconds": wall,
+        "cpu_seconds": times.user + times.system + times.children_user + times.children_system,
+        "peak_rss_mb": (skub.peak_rss_bytes() or 0) / (1024 * 1024),
+        "child_peak_rss_mb": child_peak_rss_mb(),
+        "size_mb": os.path.getsize(summary["output"]) / (1024 * 1024) if summary["output"] else 0,
+    }))
+
+
+def measure(renderer, zip_path, work_dir, args):
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--run", renderer, zip_path, work_dir,
+         args.wkhtmltopdf or STUB_PATH, str(args.workers or 0), str(args.batch_size)],
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=300, help="arşivdeki fatura sayısı")
+    parser.add_argument("--seed", type=int, default=2024, help="arşiv üretim tohumu")
+    parser.add_argument("--renderers", default="wkhtmltopdf,xhtml2pdf", help="virgülle ayrılmış dönüştürücüler")
+    parser.add_argument("--wkhtmltopdf", default=None, help="gerçek wkhtmltopdf yolu (verilmezse sahtesi)")
+    parser.add_argument("--workers", type=int, default=None, help="dönüştürme eşzamanlılığı üst sınırı")
+    parser.add_argument("--batch-size", type=int, default=1, help="tek wkhtmltopdf çağrısındaki fatura sayısı")
+    parser.add_argument("--run", nargs=6, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_renderer(*args.run)
+        return 0
+
+    work_dir = tempfile.mkdtemp(prefix="skub_bench_")
+    try:
+        zip_path = os.path.join(work_dir, "faturalar.zip")
+        corpus.write_corpus_zip(zip_path, args.count, seed=args.seed)
+        print(f"{args.count} fatura" + ("" if args.wkhtmltopdf else " (sahte wkhtmltopdf)") + ":")
+        for renderer in [name.strip() for name in args.renderers.split(",") if name.strip()]:
+            result = measure(renderer, zip_path, work_dir, args)
+            if result["status"] != "ok":
+                print(f"  {renderer:12s}: {result['message']}")
+                continue
+            child_rss = result["child_peak_rss_mb"]
+            print(f"  {result['renderer']:28s}: {result['seconds']:7.2f} sn"
+                  f"  {result['seconds'] / args.count * 1000:7.1f} ms/fatura"
+                  f"  işlemci {result['cpu_seconds']:7.2f} sn"
+                  f"  tepe RSS {result['peak_rss_mb']:6.1f} MB"
+                  + (f" (alt süreç {child_rss:6.1f} MB)" if child_rss is not None else "")
+                  + f"  çıktı {result['size_mb']:6.1f} MB")
+        return 0
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
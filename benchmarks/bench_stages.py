@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+"""
+Aşama aşama ölçüm takımı. corpus.py ile üretilen sentetik arşivler üzerinde
+InvoiceJob'ı uçtan uca çalıştırır ve InvoicePipeline aşamalarının (scan,
+metadata, dedup, render, output...) sürelerini işin RunProfile'ından
+(stage_summary) okur. Aşamalar eş zamanlı çalıştığı için her aşamanın toplam
+meşguliyet süresi, işlemci süresi ve ilk başlangıcından son bitişine kadar
+geçen süre (span) ayrı ayrı raporlanır. Dönüştürme için
+benchmarks/stub_wkhtmltopdf.py kullanılır, böylece gerçek wkhtmltopdf kurulu
+olmayan her Linux CI makinesinde çalışır.
+
+--legacy verilirse aynı arşiv benchmarks/legacy.py'deki eski aşamalı yolla da
+işlenir; bu süreler yalnızca karşılaştırma olarak yan yana gösterilir.
+
+Sonuçlar benchmarks/results/bench_stages.jsonl dosyasına eklenir (depoya
+girmez) ve aynı makinede aynı ayarlarla alınmış son ölçümle karşılaştırılır;
+eşikten fazla yavaşlayan aşamalar işaretlenir.
+
+Kullanım:
+    python benchmarks/bench_stages.py
+    python benchmarks/bench_stages.py --sizes 100,1000 --render-ms 20 --fail-on-regression
+    python benchmarks/bench_stages.py --sizes 1000 --legacy
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import skub  # noqa: E402
+import corpus  # noqa: E402
+import legacy  # noqa: E402
+
+STUB_PATH = os.path.join(BENCH_DIR, "stub_wkhtmltopdf.py")
+RESULTS_PATH = os.path.join(BENCH_DIR, "results", "bench_stages.jsonl")
+LEGACY_STAGES = ["extract_zip_recursively", "find_files", "match_html_with_xml", "extract_invoice_dates",
+                 "convert_html_to_pdf_parallel", "merge"]
+
+
+def timed(func, *args, **kwargs):
+    """(sonuç, duvar saati süresi, işlemci süresi) döndürür"""
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - wall, time.process_time() - cpu
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def machine_key():
+    return f"{platform.node()}|{platform.machine()}|{os.cpu_count()}|{platform.python_version()}"
+
+
+def machine_info():
+    """Ölçümün alındığı makine; sonuçlar yalnızca aynı makinede karşılaştırılabilir"""
+    return {"host": platform.node(), "system": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "cpus": os.cpu_count(), "python": platform.python_version()}
+
+
+def run_job(zip_path, size, args, work_dir, config):
+    """InvoiceJob'ı çalıştırır, pipeline aşamalarını işin RunProfile'ından okur"""
+    options = skub.RunOptions(batch_size=args.batch_size, cache_max_bytes=0, max_workers=args.workers)
+    job = skub.InvoiceJob(zip_path, os.path.join(work_dir, f"job_{size}"), options,
+                          os.path.join(work_dir, f"job_temp_{size}"), config=config)
+    summary, wall, cpu = timed(job.run)
+    if summary["status"] != "ok":
+        raise RuntimeError(f"InvoiceJob başarısız: {summary['message']}")
+    stages = job.profile.stage_summary()
+    stages["job"] = {"calls": 1, "wall_sec": round(wall, 3), "cpu_sec": round(cpu, 3), "span_sec": round(wall, 3)}
+    return stages
+
+
+def run_legacy(zip_path, size, args, work_dir, config):
+    """Aynı arşivi eski aşamalı yolla işler (yalnızca karşılaştırma için)"""
+    timings = {}
+
+    extract_dir = os.path.join(work_dir, f"extract_{size}")
+    _, wall, cpu = timed(legacy.extract_zip_recursively, zip_path, extract_dir, max_workers=args.workers)
+    timings["extract_zip_recursively"] = (wall, cpu)
+
+    def find_both():
+        return (legacy.find_files(extract_dir, ['.html', '.htm']),
+                legacy.find_files(extract_dir, ['.xml']))
+    (html_files, xml_files), wall, cpu = timed(find_both)
+    timings["find_files"] = (wall, cpu)
+
+    files_with_dates, wall, cpu = timed(legacy.match_html_with_xml, html_files, xml_files,
+                                        max_workers=args.workers)
+    timings["match_html_with_xml"] = (wall, cpu)
+
+    _, wall, cpu = timed(lambda: [legacy.extract_invoice_dates(path) for path in html_files])
+    timings["extract_invoice_dates"] = (wall, cpu)
+
+    pdf_dir = os.path.join(work_dir, f"pdf_{size}")
+    os.makedirs(pdf_dir)
+    (pdf_files_with_info, errors), wall, cpu = timed(
+        legacy.convert_html_to_pdf_parallel, files_with_dates, pdf_dir, config,
+        skub.DEFAULT_PDF_OPTIONS, max_workers=args.workers
+    )
+    timings["convert_html_to_pdf_parallel"] = (wall, cpu)
+    if errors:
+        raise RuntimeError(f"{len(errors)} fatura dönüştürülemedi: {errors[0]}")
+
+    def merge():
+        ordered = sorted(pdf_files_with_info, key=lambda item: item[1] or datetime.min)
+        merger = skub.OrderedPdfMerger(os.path.join(work_dir, f"birlesik_{size}.pdf"), order=range(len(ordered)))
+        for idx, (pdf_path, _, _) in enumerate(ordered):
+            merger.add(idx, pdf_path)
+        merger.close()
+        return merger.success_count
+    _, wall, cpu = timed(merge)
+    timings["merge"] = (wall, cpu)
+    return {stage: {"wall_sec": round(wall, 3), "cpu_sec": round(cpu, 3)} for stage, (wall, cpu) in timings.items()}
+
+
+def load_previous(record):
+    """Aynı makine ve ayarlarla alınmış son ölçümü bulur"""
+    if not os.path.exists(RESULTS_PATH):
+        return None
+    previous = None
+    with open(RESULTS_PATH, encoding="utf-8") as f:
+        for line in f:
+            try:
+                old = json.loads(line)
+            except ValueError:
+                continue
+            if all(old.get(key) == record[key] for key in ("machine", "size", "seed", "render_ms", "batch_size", "workers")):
+                previous = old
+    return previous
+
+
+def report(record, previous, threshold):
+    """Ölçümü yazdırır, yavaşlayan aşamaların adlarını döndürür"""
+    size = record["size"]
+    print(f"\n{size} fatura" + (f"  (önceki: {previous['commit']} {previous['timestamp']})" if previous else ""))
+    print(f"  {'aşama':30s} {'çağrı':>7s} {'süre (sn)':>10s} {'işlemci':>9s} {'span':>8s} "
+          f"{'ms/fatura':>10s} {'değişim':>9s}")
+    regressions = []
+    for stage, result in record["stages"].items():
+        change = ""
+        if previous and stage in previous["stages"]:
+            old = previous["stages"][stage]["wall_sec"]
+            if old > 0:
+                ratio = result["wall_sec"] / old - 1
+                change = f"{ratio * 100:+.0f}%"
+                if ratio > threshold:
+                    change += " ⚠️"
+                    regressions.append(stage)
+        print(f"  {stage:30s} {result['calls']:7d} {result['wall_sec']:10.3f} {result['cpu_sec']:9.3f} "
+              f"{result['span_sec']:8.3f} {result['wall_sec'] / size * 1000:10.3f} {change:>9s}")
+
+    if record["legacy"]:
+        print("  karşılaştırma: eski aşamalı yol (benchmarks/legacy.py)")
+        for stage in LEGACY_STAGES:
+            result = record["legacy"][stage]
+            print(f"  {stage:30s} {'':7s} {result['wall_sec']:10.3f} {result['cpu_sec']:9.3f} {'':8s} "
+                  f"{result['wall_sec'] / size * 1000:10.3f}")
+        legacy_total = sum(result["wall_sec"] for result in record["legacy"].values())
+        job_wall = record["stages"]["job"]["wall_sec"]
+        speedup = f"{legacy_total / job_wall:.1f}x" if job_wall > 0 else "-"
+        print(f"  eski yol toplam {legacy_total:.3f} sn, InvoiceJob {job_wall:.3f} sn ({speedup})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,1000,10000", help="virgülle ayrılmış fatura sayıları")
+    parser.add_argument("--seed", type=int, default=2024, help="arşiv üretim tohumu")
+    parser.add_argument("--workers", type=int, default=None, help="dönüştürme iş parçacığı sayısı")
+    parser.add_argument("--batch-size", type=int, default=1, help="tek wkhtmltopdf çağrısındaki fatura sayısı")
+    parser.add_argument("--render-ms", type=float, default=0, help="sahte wkhtmltopdf'in fatura başına bekleme süresi")
+    parser.add_argument("--threshold", type=float, default=15, help="yavaşlama uyarı eşiği (yüzde)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="eşiği aşan yavaşlamada 1 ile çık")
+    parser.add_argument("--legacy", action="store_true", help="eski aşamalı yolu da ölçüp karşılaştır")
+    parser.add_argument("--no-save", action="store_true", help="sonuçları dosyaya ekleme")
+    args = parser.parse_args()
+
+    os.environ["SKUB_STUB_RENDER_MS"] = str(args.render_ms)
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    commit = git_commit()
+    regressions = []
+    for size in sizes:
+        work_dir = tempfile.mkdtemp(prefix="skub_bench_")
+        try:
+            zip_path = os.path.join(work_dir, f"faturalar_{size}.zip")
+            corpus.write_corpus_zip(zip_path, size, seed=args.seed)
+            config = skub.pdfkit.configuration(wkhtmltopdf=STUB_PATH)
+            stages = run_job(zip_path, size, args, work_dir, config)
+            legacy_stages = run_legacy(zip_path, size, args, work_dir, config) if args.legacy else None
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        record = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": commit,
+            "machine": machine_key(),
+            "machine_info": machine_info(),
+            "size": size,
+            "seed": args.seed,
+            "render_ms": args.render_ms,
+            "batch_size": args.batch_size,
+            "workers": args.workers,
+            "stages": stages,
+            "legacy": legacy_stages,
+        }
+        previous = load_previous(record)
+        regressions += [f"{size}:{stage}" for stage in report(record, previous, args.threshold / 100)]
+        if not args.no_save:
+            os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+            with open(RESULTS_PATH, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    if regressions:
+        print(f"\nEşiği (%{args.threshold:g}) aşan yavaşlama: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""
+Açılış süresi ölçümü. `import skub` ayrı süreçlerde `python -X importtime`
+ile birkaç kez çalıştırılır; skub'ın toplam içe aktarma süresinin ortancası
+bütçeyle karşılaştırılır ve skub'ın doğrudan yüklediği en ağır modüller
+listelenir. Ayrıca ilk kullanıma ertelenmiş ağır kütüphanelerin (PyPDF2, bs4,
+pdfkit, ElementTree, lxml) açılışta yüklenmediği denetlenir; biri yanlışlıkla
+yeniden dosya başında içe aktarılırsa ölçüm hata verir.
+
+Bütçe aşılırsa veya ertelenmiş bir modül açılışta yüklenirse 1 ile çıkar,
+bu yüzden CI'da doğrudan kullanılabilir.
+
+Kullanım:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --budget-ms 60 --runs 9
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+# skub açılırken yüklenmemesi gereken modüller (skub._LazyModule ile ertelenir)
+DEFERRED_MODULES = ["pdfkit", "PyPDF2", "bs4", "xml.etree.ElementTree", "importlib.metadata", "lxml.etree"]
+
+
+def import_profile():
+    """
+    `import skub`u yeni bir süreçte -X importtime ile çalıştırır.
+    :return: (skub toplam süresi µs, {skub'ın doğrudan yüklediği modül: toplam µs}, açılışta yüklenen ertelenmiş modüller)
+    """
+    code = ("import sys, skub; "
+            f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=REPO_DIR,
+                            capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        indent = len(name) - len(name.lstrip())
+        rows.append((name.strip(), int(cumulative_us), indent))
+
+    skub_index = next(i for i, (name, _, indent) in enumerate(rows) if name == "skub" and indent == 1)
+    children = {}
+    for name, cumulative, indent in reversed(rows[:skub_index]):
+        if indent <= 1:
+            break
+        if indent == 3:
+            children[name] = cumulative
+    loaded = [name for name in result.stdout.strip().split(",") if name]
+    return rows[skub_index][1], children, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="ölçüm tekrarı (ortanca alınır)")
+    parser.add_argument("--budget-ms", type=float, default=80, help="skub içe aktarma süresi bütçesi (ms)")
+    parser.add_argument("--top", type=int, default=8, help="listelenecek en ağır modül sayısı")
+    args = parser.parse_args()
+
+    totals = []
+    slowest = {}
+    loaded = set()
+    for _ in range(max(1, args.runs)):
+        total, children, deferred = import_profile()
+        totals.append(total)
+        loaded.update(deferred)
+        for name, cumulative in children.items():
+            slowest.setdefault(name, []).append(cumulative)
+
+    median_ms = statistics.median(totals) / 1000
+    print(f"import skub: ortanca {median_ms:.1f} ms (en az {min(totals) / 1000:.1f}, "
+          f"en çok {max(totals) / 1000:.1f}; {len(totals)} ölçüm), bütçe {args.budget_ms:g} ms")
+    heaviest = sorted(((statistics.median(values), name) for name, values in slowest.items()), reverse=True)
+    for cumulative, name in heaviest[:args.top]:
+        print(f"  {name:30s} {cumulative / 1000:7.1f} ms")
+
+    failed = False
+    if loaded:
+        print(f"\nAçılışta yüklenmemesi gereken modüller yüklendi: {', '.join(sorted(loaded))}")
+        failed = True
+    if median_ms > args.budget_ms:
+        print(f"\nAçılış bütçesi aşıldı: {median_ms:.1f} ms > {args.budget_ms:g} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""
+XML meta veri çıkarımı ölçümü: eski iki ayrı ET.parse çağrısı ile
+InvoiceProcessor.extract_xml_metadata'nın tek geçişli akış okuması karşılaştırılır.
+
+Kullanım:
+    python benchmarks/bench_xml_metadata.py --count 200 --attachment-kb 2048
+"""
+import argparse
+import base64
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import skub  # noqa: E402
+import legacy  # noqa: E402
+
+UBL_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<Invoice xmlns="urn:oasis:names:specification:ubl:schema:xsd:Invoice-2"
+         xmlns:cac="urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2"
+         xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2">
+  <cbc:UBLVersionID>2.1</cbc:UBLVersionID>
+  <cbc:CustomizationID>TR1.2</cbc:CustomizationID>
+  <cbc:ProfileID>TEMELFATURA</cbc:ProfileID>
+  <cbc:ID>{evrak_id}</cbc:ID>
+  <cbc:CopyIndicator>false</cbc:CopyIndicator>
+  <cbc:IssueDate>{issue_date}</cbc:IssueDate>
+  <cac:AdditionalDocumentReference>
+    <cbc:ID>{evrak_id}</cbc:ID>
+    <cbc:IssueDate>{issue_date}</cbc:IssueDate>
+    <cac:Attachment>
+      <cbc:EmbeddedDocumentBinaryObject mimeCode="application/xml" filename="fatura.xslt">{payload}</cbc:EmbeddedDocumentBinaryObject>
+    </cac:Attachment>
+  </cac:AdditionalDocumentReference>
+</Invoice>
+"""
+
+
+def write_corpus(folder, count, attachment_kb):
+    payload = base64.b64encode(os.urandom(attachment_kb * 768)).decode("ascii")
+    paths = []
+    for i in range(count):
+        path = os.path.join(folder, f"fatura_{i}.xml")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(UBL_TEMPLATE.format(
+                evrak_id=f"ABC2024{i:09d}",
+                issue_date=f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+                payload=payload,
+            ))
+        paths.append(path)
+    return paths
+
+
+def best_of(repeat, func, paths):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [func(p) for p in paths]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=200, help="üretilecek XML sayısı")
+    parser.add_argument("--attachment-kb", type=int, default=1024, help="her XML'deki base64 ekin yaklaşık boyutu (KB)")
+    parser.add_argument("--repeat", type=int, default=3, help="en iyi sürenin seçileceği tekrar sayısı")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="skub_bench_")
+    try:
+        paths = write_corpus(work_dir, args.count, args.attachment_kb)
+        processor = skub.InvoiceProcessor(None)
+
+        old_time, old_results = best_of(
+            args.repeat, lambda p: (legacy.extract_date_from_xml(p), legacy.extract_evrak_id(p)), paths)
+        new_time, new_results = best_of(
+            args.repeat, lambda p: tuple(processor.extract_xml_metadata(p)), paths)
+
+        if old_results != new_results:
+            print("HATA: eski ve yeni çıkarım sonuçları farklı!")
+            return 1
+
+        print(f"{args.count} XML, ~{args.attachment_kb} KB ek:")
+        print(f"  eski (2x ET.parse)      : {old_time:8.3f} sn  ({old_time / args.count * 1000:.2f} ms/dosya)")
+        print(f"  yeni (tek geçiş, akış)  : {new_time:8.3f} sn  ({new_time / args.count * 1000:.2f} ms/dosya)")
+        print(f"  hızlanma                : {old_time / new_time:8.1f}x")
+        return 0
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
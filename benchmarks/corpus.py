@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+"""
+Ölçümler için gerçekçi, sentetik fatura arşivi üretir:
+
+- UBL 2.1 XML (cbc:ID, cbc:IssueDate; bir kısmında büyük gömülü XSLT eki),
+- aynı adlı HTML görüntüleri (bir kısmının XML'i yoktur, tarih HTML'den okunur),
+- istenirse HTML'i olmayan, görüntüsü gömülü XSLT ile üretilen XML faturalar
+  (her düzenleyicinin tek bir şablonu vardır),
+- bir kısmı logo gibi göreli kaynaklara başvurur,
+- faturaların bir kısmı aylık iç ZIP'lere (bazıları iki düzey iç içe) konur,
+- kalem sayısı, dolayısıyla dosya boyutları faturadan faturaya değişir.
+
+Aynı tohumla her zaman aynı arşiv üretilir.
+
+Kullanım:
+    python benchmarks/corpus.py faturalar.zip --count 1000
+    python benchmarks/corpus.py faturalar.zip --count 1000 --xml-only 0.5
+"""
+import argparse
+import base64
+import io
+import os
+import random
+import sys
+import uuid
+import zipfile
+from datetime import date, timedelta
+
+UBL_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<Invoice xmlns="urn:oasis:names:specification:ubl:schema:xsd:Invoice-2"
+         xmlns:cac="urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2"
+         xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2">
+  <cbc:UBLVersionID>2.1</cbc:UBLVersionID>
+  <cbc:CustomizationID>TR1.2</cbc:CustomizationID>
+  <cbc:ProfileID>{profile}</cbc:ProfileID>
+  <cbc:ID>{evrak_id}</cbc:ID>
+  <cbc:CopyIndicator>false</cbc:CopyIndicator>
+  <cbc:UUID>{ettn}</cbc:UUID>
+  <cbc:IssueDate>{issue_date}</cbc:IssueDate>
+  <cbc:IssueTime>{issue_time}</cbc:IssueTime>
+  <cbc:InvoiceTypeCode>SATIS</cbc:InvoiceTypeCode>
+  <cbc:DocumentCurrencyCode>TRY</cbc:DocumentCurrencyCode>
+  <cbc:LineCountNumeric>{line_count}</cbc:LineCountNumeric>
+{attachment}  <cac:AccountingSupplierParty>
+    <cac:Party>
+      <cac:PartyIdentification><cbc:ID schemeID="VKN">{vkn}</cbc:ID></cac:PartyIdentification>
+      <cac:PartyName><cbc:Name>{supplier}</cbc:Name></cac:PartyName>
+    </cac:Party>
+  </cac:AccountingSupplierParty>
+{lines}  <cac:LegalMonetaryTotal>
+    <cbc:PayableAmount currencyID="TRY">{total:.2f}</cbc:PayableAmount>
+  </cac:LegalMonetaryTotal>
+</Invoice>
+"""
+
+ATTACHMENT_TEMPLATE = """  <cac:AdditionalDocumentReference>
+    <cbc:ID>{evrak_id}</cbc:ID>
+    <cbc:IssueDate>{issue_date}</cbc:IssueDate>
+    <cac:Attachment>
+      <cbc:EmbeddedDocumentBinaryObject mimeCode="application/xml" encodingCode="Base64" filename="{evrak_id}.xslt">{payload}</cbc:EmbeddedDocumentBinaryObject>
+    </cac:Attachment>
+  </cac:AdditionalDocumentReference>
+"""
+
+# Düzenleyicinin görüntü şablonu; gerçek şablonlar gibi içinde büyük bir logo taşır
+DISPLAY_XSLT_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<xsl:stylesheet version="1.0" xmlns:xsl="http://www.w3.org/1999/XSL/Transform"
+    xmlns:ubl="urn:oasis:names:specification:ubl:schema:xsd:Invoice-2"
+    xmlns:cac="urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2"
+    xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2">
+  <xsl:output method="html" encoding="UTF-8" indent="no"/>
+  <xsl:variable name="logo">{logo}</xsl:variable>
+  <xsl:template match="/ubl:Invoice">
+    <html><head><title>e-Fatura <xsl:value-of select="cbc:ID"/></title>
+    <style>body {{ font-family: Arial; font-size: 9pt; }} td {{ border: 1px solid #999; padding: 2px; }}</style>
+    </head><body>
+    <img width="120"><xsl:attribute name="src">data:image/png;base64,<xsl:value-of select="$logo"/></xsl:attribute></img>
+    <h3>{supplier}</h3>
+    <table>
+    <tr><td>Senaryo:</td><td><xsl:value-of select="cbc:ProfileID"/></td></tr>
+    <tr><td>Fatura No:</td><td><xsl:value-of select="cbc:ID"/></td></tr>
+    <tr><td>Fatura Tarihi:</td><td><xsl:value-of select="concat(substring(cbc:IssueDate, 9, 2), '.', substring(cbc:IssueDate, 6, 2), '.', substring(cbc:IssueDate, 1, 4))"/></td></tr>
+    <tr><td>ETTN:</td><td><xsl:value-of select="cbc:UUID"/></td></tr>
+    </table>
+    <table>
+    <xsl:for-each select="cac:InvoiceLine">
+      <tr><td><xsl:value-of select="cbc:ID"/></td><td><xsl:value-of select="cac:Item/cbc:Name"/></td>
+      <td><xsl:value-of select="cbc:InvoicedQuantity"/></td>
+      <td><xsl:value-of select="format-number(cbc:LineExtensionAmount, '#,##0.00')"/></td></tr>
+    </xsl:for-each>
+    </table>
+    <p>Ödenecek Tutar: <xsl:value-of select="format-number(cac:LegalMonetaryTotal/cbc:PayableAmount, '#,##0.00')"/> TL</p>
+    </body></html>
+  </xsl:template>
+</xsl:stylesheet>
+"""
+
+LINE_TEMPLATE = """  <cac:InvoiceLine>
+    <cbc:ID>{no}</cbc:ID>
+    <cbc:InvoicedQuantity unitCode="C62">{quantity}</cbc:InvoicedQuantity>
+    <cbc:LineExtensionAmount currencyID="TRY">{amount:.2f}</cbc:LineExtensionAmount>
+    <cac:Item><cbc:Name>{item}</cbc:Name></cac:Item>
+  </cac:InvoiceLine>
+"""
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>e-Fatura {evrak_id}</title>
+<style>body {{ font-family: Arial; font-size: 9pt; }} td {{ border: 1px solid #999; padding: 2px; }}</style>
+</head><body>
+{logo}<table>
+<tr><td>Senaryo:</td><td>{profile}</td></tr>
+<tr><td>Fatura No:</td><td>{evrak_id}</td></tr>
+<tr><td>Fatura Tarihi:</td><td>{html_date}</td></tr>
+<tr><td>ETTN:</td><td>{ettn}</td></tr>
+<tr><td>Son Ödeme Tarihi:</td><td>{due_date}</td></tr>
+</table>
+<table>{rows}</table>
+{page_break}<p>Ödenecek Tutar: {total:,.2f} TL</p>
+</body></html>
+"""
+
+SUPPLIERS = ["Anadolu Gıda A.Ş.", "Ege Tekstil Ltd. Şti.", "Marmara Lojistik A.Ş.",
+             "Karadeniz Enerji A.Ş.", "İç Anadolu Yapı Ltd. Şti.", "Akdeniz Turizm A.Ş."]
+ITEMS = ["Danışmanlık hizmeti", "Kırtasiye", "Yazılım lisansı", "Nakliye bedeli",
+         "Bakım onarım", "Elektrik tüketimi", "Kira bedeli", "Yedek parça"]
+LOGO = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
+)
+
+
+def display_xslts(seed):
+    """Her düzenleyici için görüntü şablonunu üretir: {düzenleyici: base64 XSLT}"""
+    rnd = random.Random(seed)
+    xslts = {}
+    for supplier in SUPPLIERS:
+        logo = base64.b64encode(rnd.randbytes(rnd.randint(30, 120) * 1024)).decode("ascii")
+        xslt = DISPLAY_XSLT_TEMPLATE.format(logo=logo, supplier=supplier)
+        xslts[supplier] = base64.b64encode(xslt.encode("utf-8")).decode("ascii")
+    return xslts
+
+
+def make_invoice(rnd, number, start_date, with_xml=True, xslts=None):
+    """
+    Tek bir fatura üretir.
+    :param xslts: Verilirse XML'e düzenleyicinin görüntü şablonu gömülür (display_xslts)
+    :return: (dosya adı kökü, tarih, evrak_id, html metni, xml metni veya None)
+    """
+    issue_date = start_date + timedelta(days=rnd.randint(0, 364))
+    evrak_id = f"ABC{issue_date.year}{number:09d}"
+    ettn = str(uuid.UUID(int=rnd.getrandbits(128)))
+    profile = rnd.choice(["TEMELFATURA", "TICARIFATURA", "EARSIVFATURA"])
+    line_count = max(1, int(rnd.expovariate(1 / 12)))
+    lines = []
+    rows = []
+    total = 0.0
+    for no in range(1, line_count + 1):
+        quantity = rnd.randint(1, 50)
+        amount = quantity * rnd.uniform(5, 500)
+        total += amount
+        item = rnd.choice(ITEMS)
+        lines.append(LINE_TEMPLATE.format(no=no, quantity=quantity, amount=amount, item=item))
+        rows.append(f"<tr><td>{no}</td><td>{item}</td><td>{quantity}</td><td>{amount:,.2f}</td></tr>")
+
+    html = HTML_TEMPLATE.format(
+        evrak_id=evrak_id,
+        profile=profile,
+        ettn=ettn,
+        html_date=issue_date.strftime("%d.%m.%Y") if rnd.random() < 0.98 else "-",
+        due_date=(issue_date + timedelta(days=30)).strftime("%d-%m-%Y"),
+        logo='<img src="logo.png" width="120">\n' if rnd.random() < 0.3 else "",
+        rows="".join(rows),
+        page_break='<div style="page-break-after: always"></div>\n' if line_count > 40 else "",
+        total=total,
+    )
+
+    xml = None
+    if with_xml:
+        attachment = ""
+        if rnd.random() < 0.05:
+            # Gerçek e-faturalardaki gömülü XSLT görüntüsü gibi büyük bir ek
+            payload = base64.b64encode(rnd.randbytes(rnd.randint(20, 200) * 1024)).decode("ascii")
+            attachment = ATTACHMENT_TEMPLATE.format(evrak_id=evrak_id, issue_date=issue_date.isoformat(), payload=payload)
+        issue_time = f"{rnd.randint(8, 18):02d}:{rnd.randint(0, 59):02d}:00"
+        vkn = f"{rnd.randint(0, 9999999999):010d}"
+        supplier = rnd.choice(SUPPLIERS)
+        if xslts:
+            attachment = ATTACHMENT_TEMPLATE.format(evrak_id=evrak_id, issue_date=issue_date.isoformat(),
+                                                    payload=xslts[supplier])
+        xml = UBL_TEMPLATE.format(
+            profile=profile,
+            evrak_id=evrak_id,
+            ettn=ettn,
+            issue_date=issue_date.isoformat(),
+            issue_time=issue_time,
+            line_count=line_count,
+            attachment=attachment,
+            vkn=vkn,
+            supplier=supplier,
+            lines="".join(lines),
+            total=total,
+        )
+    return ettn, issue_date, evrak_id, html, xml
+
+
+def write_corpus_zip(zip_path, count, seed=2024, unmatched_ratio=0.1, nested_ratio=0.3, start_date=date(2024, 1, 1),
+                     xml_only_ratio=0.0):
+    """
+    count faturalık arşivi zip_path'e yazar.
+    :param unmatched_ratio: XML'i olmayan HTML oranı
+    :param nested_ratio: Aylık iç ZIP'lere konan fatura oranı
+    :param xml_only_ratio: HTML'i olmayan, gömülü XSLT'li XML fatura oranı (0'da arşiv
+                           önceki sürümlerle aynıdır)
+    :return: Üretilen faturaların {dosya adı kökü: (tarih, evrak_id veya None)} sözlüğü
+    """
+    rnd = random.Random(seed)
+    xslts = display_xslts(seed) if xml_only_ratio > 0 else None
+    manifest = {}
+    inner = {}
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("faturalar/logo.png", LOGO)
+        for number in range(count):
+            with_xml = rnd.random() >= unmatched_ratio
+            xml_only = xslts is not None and rnd.random() < xml_only_ratio
+            stem, issue_date, evrak_id, html, xml = make_invoice(rnd, number, start_date, with_xml or xml_only,
+                                                                 xslts if xml_only else None)
+            manifest[stem] = (issue_date, evrak_id if xml else None)
+            files = [] if xml_only else [(f"{stem}.html", html)]
+            if xml:
+                files.append((f"{stem}.xml", xml))
+            if rnd.random() < nested_ratio:
+                month = issue_date.strftime("%Y-%m")
+                inner.setdefault(month, []).extend(files)
+            else:
+                for name, content in files:
+                    archive.writestr(f"faturalar/{name}", content)
+
+        for month, files in sorted(inner.items()):
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as month_zip:
+                month_zip.writestr("logo.png", LOGO)
+                # Ayın ikinci yarısı bir düzey daha içte durur
+                half = len(files) // 2
+                for name, content in files[:half]:
+                    month_zip.writestr(name, content)
+                if files[half:]:
+                    nested = io.BytesIO()
+                    with zipfile.ZipFile(nested, "w", zipfile.ZIP_DEFLATED) as nested_zip:
+                        nested_zip.writestr("logo.png", LOGO)
+                        for name, content in files[half:]:
+                            nested_zip.writestr(name, content)
+                    month_zip.writestr(f"{month}_ek.zip", nested.getvalue())
+            archive.writestr(f"aylik/{month}.zip", buffer.getvalue())
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("zip_path", help="yazılacak ZIP dosyası")
+    parser.add_argument("--count", type=int, default=1000, help="fatura sayısı")
+    parser.add_argument("--seed", type=int, default=2024, help="rastgele üretim tohumu")
+    parser.add_argument("--unmatched", type=float, default=0.1, help="XML'i olmayan HTML oranı")
+    parser.add_argument("--nested", type=float, default=0.3, help="iç ZIP'lere konan fatura oranı")
+    parser.add_argument("--xml-only", type=float, default=0.0, help="HTML'i olmayan, gömülü XSLT'li XML fatura oranı")
+    args = parser.parse_args()
+
+    manifest = write_corpus_zip(args.zip_path, args.count, args.seed, args.unmatched, args.nested,
+                                xml_only_ratio=args.xml_only)
+    size_mb = os.path.getsize(args.zip_path) / (1024 * 1024)
+    print(f"{len(manifest)} fatura yazıldı: {args.zip_path} ({size_mb:.1f} MB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,312 @@
+"""
+sKub'un önceki sürümlerindeki ayrıştırma fonksiyonlarının birebir kopyaları.
+Karşılaştırmalı ölçümlerde ve sonuçların aynı kaldığını doğrulamada referans
+olarak kullanılır; uygulama bu modülü içe aktarmaz.
+
+Eski aşamalı yol (ZIP'i açma, dosyaları bulma, HTML-XML eşleştirme, paralel
+dönüştürme) da bench_stages.py'deki karşılaştırma için burada tutulur.
+"""
+import os
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pdfkit
+from bs4 import BeautifulSoup
+
+
+def _noop(message):
+    pass
+
+
+def _default_workers():
+    return max(2, os.cpu_count() - 1)
+
+
+def extract_date_from_xml(xml_file, log_message=_noop):
+    """XML dosyasından fatura tarihini çıkarır (eski sürüm)"""
+    try:
+        tree = ET.parse(xml_file)
+        root = tree.getroot()
+        namespaces = {
+            'cbc': 'urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2',
+            'cac': 'urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2',
+            'ubl': 'urn:oasis:names:specification:ubl:schema:xsd:Invoice-2'
+        }
+        issue_date = None
+
+        for ns_prefix in [None, 'cbc', 'ubl']:
+            tag = f"{{{namespaces[ns_prefix]}}}IssueDate" if ns_prefix else "IssueDate"
+            elements = root.findall(f".//{tag}")
+            if elements:
+                issue_date = elements[0].text
+                break
+
+        if not issue_date:
+            potential_date_tags = ["IssueDate", "DüzenlemeTarihi", "düzenlemetarihi", "BelgeTarihi", "belgetarihi"]
+            for tag in potential_date_tags:
+                elements = root.findall(f".//{tag}")
+                if elements:
+                    issue_date = elements[0].text
+                    break
+
+        if not issue_date:
+            log_message(f"XML'de tarih bulunamadı: {os.path.basename(xml_file)}")
+            return None
+
+        try:
+            if "-" in issue_date:
+                date_obj = datetime.strptime(issue_date, "%Y-%m-%d")
+            elif "." in issue_date:
+                date_obj = datetime.strptime(issue_date, "%d.%m.%Y")
+            else:
+                log_message(f"Geçersiz tarih formatı: {issue_date}")
+                return None
+            log_message(f"✓ XML'den fatura tarihi: {date_obj.strftime('%d.%m.%Y')}")
+            return date_obj
+        except ValueError as e:
+            log_message(f"Tarih ayrıştırma hatası: {str(e)}")
+            return None
+    except Exception as e:
+        log_message(f"XML işleme hatası: {os.path.basename(xml_file)} - {str(e)}")
+        return None
+
+
+def extract_evrak_id(xml_file, log_message=_noop):
+    """XML dosyasından evrak ID'sini çıkarır (eski sürüm)"""
+    try:
+        tree = ET.parse(xml_file)
+        root = tree.getroot()
+        namespaces = {'cbc': 'urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2'}
+        id_elem = root.find('.//cbc:ID', namespaces)
+        if id_elem is not None:
+            evrak_id = id_elem.text.strip()
+            if len(evrak_id) == 16:
+                log_message(f"Evrak ID bulundu: {evrak_id}")
+                return evrak_id
+            else:
+                log_message(f"Evrak ID uygun formatta değil: {evrak_id}")
+                return None
+        else:
+            log_message("XML'de Evrak ID bulunamadı.")
+            return None
+    except Exception as e:
+        log_message(f"XML evrak ID işleme hatası: {str(e)}")
+        return None
+
+
+def extract_invoice_dates(html_file, log_message=_noop):
+    """HTML dosyasından fatura tarihini çıkarır (eski sürüm)"""
+    try:
+        with open(html_file, 'r', encoding='utf-8', errors='ignore') as f:
+            content = f.read()
+        try:
+            soup = BeautifulSoup(content, 'html.parser')
+            text_content = soup.get_text()
+        except Exception as e:
+            log_message(f"HTML parse hatası: {str(e)}. Düz metin olarak devam ediliyor.")
+            text_content = content
+
+        date_formats = ["%d.%m.%Y", "%d/%m/%Y", "%d-%m-%Y"]
+        primary_date_keywords = [
+            "Düzenleme Tarihi", "Düzenleme tarihi", "düzenleme tarihi",
+            "Belge Tarihi", "Belge tarihi", "belge tarihi",
+            "Fatura Tarihi", "Fatura tarihi", "fatura tarihi",
+            "Düzenlenme Tarihi", "e-Fatura Tarihi", "e-Arşiv Fatura Tarihi",
+            "Tarih", "tarih", "TARİH"
+        ]
+        primary_dates = []
+        all_other_dates = []
+
+        for keyword in primary_date_keywords:
+            patterns = [
+                rf"{re.escape(keyword)}\s*[:=\-]?\s*(\d{{1,2}}\.\d{{1,2}}\.\d{{4}})",
+                rf"{re.escape(keyword)}\s*[:=\-]?\s*(\d{{1,2}}/\d{{1,2}}/\d{{4}})",
+                rf"{re.escape(keyword)}\s*[:=\-]?\s*(\d{{1,2}}-\d{{1,2}}-\d{{4}})"
+            ]
+            for pattern in patterns:
+                matches = re.findall(pattern, text_content, re.IGNORECASE)
+                for date_str in matches:
+                    for fmt in date_formats:
+                        try:
+                            date_obj = datetime.strptime(date_str, fmt)
+                            if not any(d[0] == date_obj for d in primary_dates):
+                                primary_dates.append((date_obj, keyword))
+                                log_message(f"Öncelikli '{keyword}' bulundu: {date_str} ({os.path.basename(html_file)})")
+                            break
+                        except ValueError:
+                            continue
+
+        if primary_dates:
+            invoice_date, _ = max(primary_dates, key=lambda x: x[0])
+            return invoice_date
+
+        date_patterns = [
+            r'\b(\d{1,2}\.\d{1,2}\.\d{4})\b',
+            r'\b(\d{1,2}/\d{1,2}/\d{4})\b',
+            r'\b(\d{1,2}-\d{1,2}-\d{4})\b'
+        ]
+        for pattern in date_patterns:
+            matches = re.findall(pattern, text_content)
+            for date_str in matches:
+                for fmt in date_formats:
+                    try:
+                        date_obj = datetime.strptime(date_str, fmt)
+                        if not any(d[0] == date_obj for d in all_other_dates):
+                            all_other_dates.append((date_obj, "Genel Arama"))
+                        break
+                    except ValueError:
+                        continue
+
+        if not all_other_dates:
+            log_message(f"⚠️ Hiçbir tarih bulunamadı: {os.path.basename(html_file)}")
+            return None
+
+        invoice_date, _ = max(all_other_dates, key=lambda x: x[0])
+        return invoice_date
+    except Exception as e:
+        log_message(f"⚠️ Tarih çıkarma hatası: {os.path.basename(html_file)} - {str(e)}")
+        return None
+
+
+def extract_zip_recursively(zip_path, extract_path, depth=0, max_depth=5, log_message=_noop, max_workers=None):
+    """ZIP dosyalarını özyinelemeli olarak çıkarır (eski sürüm)"""
+    if depth > max_depth:
+        log_message(f"Maksimum derinliğe ulaşıldı, daha fazla açılmıyor: {zip_path}")
+        return
+    try:
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            zip_ref.extractall(extract_path)
+        log_message(f"Zip dosyası açıldı: {os.path.basename(zip_path)}")
+    except Exception as e:
+        log_message(f"Hata: {os.path.basename(zip_path)} açılamadı: {str(e)}")
+        return
+
+    inner_zips = []
+    for root_dir, _, files in os.walk(extract_path):
+        for file in files:
+            if file.lower().endswith('.zip'):
+                inner_zips.append(os.path.join(root_dir, file))
+
+    if inner_zips:
+        with ThreadPoolExecutor(max_workers=max_workers or _default_workers()) as executor:
+            for inner_zip in inner_zips:
+                inner_extract_path = os.path.join(
+                    extract_path,
+                    f"extracted_{os.path.splitext(os.path.basename(inner_zip))[0]}"
+                )
+                os.makedirs(inner_extract_path, exist_ok=True)
+                executor.submit(extract_zip_recursively, inner_zip, inner_extract_path, depth + 1, max_depth,
+                                log_message, max_workers)
+
+
+def find_files(folder, extensions):
+    """Belirtilen uzantılara sahip dosyaları bulur (eski sürüm)"""
+    found_files = []
+    for root_dir, _, files in os.walk(folder):
+        for file in files:
+            if os.path.splitext(file)[1].lower() in extensions:
+                found_files.append(os.path.join(root_dir, file))
+    return found_files
+
+
+def match_html_with_xml(html_files, xml_files, log_message=_noop, max_workers=None):
+    """HTML ve XML dosyalarını eşleştirir ve tarihlerini çıkarır (eski sürüm)"""
+    log_message("HTML ve XML dosyaları eşleştiriliyor...")
+    files_with_dates = []
+    html_without_xml = []
+
+    xml_dict = {}
+    for xml_file in xml_files:
+        key = os.path.splitext(os.path.basename(xml_file))[0]
+        xml_dict[key] = xml_file
+
+    def process_html(html_file):
+        base = os.path.splitext(os.path.basename(html_file))[0]
+        if base in xml_dict:
+            xml_file = xml_dict[base]
+            date = extract_date_from_xml(xml_file, log_message)
+            evrak_id = extract_evrak_id(xml_file, log_message)
+            if not date:
+                log_message(f"⚠️ {base} için XML'de tarih bulunamadı. HTML'den çıkarılıyor.")
+                date = extract_invoice_dates(html_file, log_message)
+            else:
+                log_message(f"✓ HTML-XML eşleşmesi: {base} - Tarih: {date.strftime('%d.%m.%Y') if date else 'Bilinmiyor'}")
+            return (html_file, date, evrak_id, False)
+        else:
+            log_message(f"⚠️ {base} için eşleşen XML bulunamadı. HTML'den tarih çıkarılıyor.")
+            date = extract_invoice_dates(html_file, log_message)
+            return (html_file, date, None, True)
+
+    with ThreadPoolExecutor(max_workers=max_workers or _default_workers()) as executor:
+        results = list(executor.map(process_html, html_files))
+
+    for html_file, date, evrak_id, no_xml in results:
+        files_with_dates.append((html_file, date, evrak_id))
+        if no_xml:
+            html_without_xml.append(html_file)
+
+    log_message(f"Toplam {len(html_files)} HTML dosyasından:")
+    log_message(f"- {len(html_files) - len(html_without_xml)} dosya XML ile eşleştirildi")
+    log_message(f"- {len(html_without_xml)} dosya için XML bulunamadı")
+    return files_with_dates
+
+
+def convert_html_to_pdf(html_file, output_path, config, pdf_options, log_message=_noop):
+    """HTML dosyasını PDF'e dönüştürür, hata durumunda alternatif yöntemleri dener (eski sürüm)"""
+    base_name = os.path.basename(html_file)
+    try:
+        pdfkit.from_file(html_file, output_path, configuration=config, options=pdf_options)
+        return True, ""
+    except Exception as e1:
+        error_detail = str(e1)
+        log_message(f"⚠️ İlk deneme hatası: {base_name} - {error_detail}")
+        try:
+            log_message(f"Alternatif dönüştürme deneniyor: {base_name}")
+            simplified_options = {"enable-local-file-access": ""}
+            pdfkit.from_file(html_file, output_path, configuration=config, options=simplified_options)
+            return True, ""
+        except Exception as e2:
+            error_detail = str(e2)
+            log_message(f"⚠️ İkinci deneme başarısız: {base_name} - {error_detail}")
+            try:
+                log_message(f"Son deneme: {base_name}")
+                with open(html_file, 'r', encoding='utf-8', errors='ignore') as f:
+                    html_content = f.read()
+                pdfkit.from_string(html_content, output_path, configuration=config, options=simplified_options)
+                return True, ""
+            except Exception as e3:
+                error_detail = str(e3)
+                log_message(f"✗ Tüm denemeler başarısız: {base_name} - {error_detail}")
+                return False, error_detail
+
+
+def convert_html_to_pdf_parallel(html_files_with_dates, temp_dir, config, pdf_options, log_message=_noop,
+                                 max_workers=None):
+    """Birden fazla HTML dosyasını paralel olarak PDF'e dönüştürür (eski sürüm)"""
+    pdf_files_with_info = []
+    error_list = []
+
+    def convert_one_file(idx, html_file, invoice_date, evrak_id):
+        if invoice_date:
+            pdf_name = f"fatura_{invoice_date.strftime('%Y%m%d')}_{idx+1}.pdf"
+        else:
+            pdf_name = f"fatura_tarihsiz_{idx+1}.pdf"
+        pdf_path = os.path.join(temp_dir, pdf_name)
+        success, error = convert_html_to_pdf(html_file, pdf_path, config, pdf_options, log_message)
+        if success:
+            return (pdf_path, invoice_date, evrak_id, None)
+        return (None, invoice_date, evrak_id, (evrak_id if evrak_id else "Bilinmiyor", f"Dönüştürme hatası: {error}"))
+
+    with ThreadPoolExecutor(max_workers=max_workers or _default_workers()) as executor:
+        futures = [executor.submit(convert_one_file, idx, html_file, invoice_date, evrak_id)
+                   for idx, (html_file, invoice_date, evrak_id) in enumerate(html_files_with_dates)]
+        for future in futures:
+            pdf_path, invoice_date, evrak_id, error = future.result()
+            if pdf_path:
+                pdf_files_with_info.append((pdf_path, invoice_date, evrak_id))
+            if error:
+                error_list.append(error)
+    return pdf_files_with_info, error_list
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+"""
+Ölçümler için sahte wkhtmltopdf. Gerçek wkhtmltopdf kurulu olmayan Linux CI
+makinelerinde pdfkit'in çağırdığı komut satırını taklit eder:
+
+- --version ile sürüm yazar,
+- birden çok girdi (dosya yolu veya stdin için "-") alır,
+- her girdi için 1 + "page-break" sayısı kadar A4 sayfalı geçerli bir PDF yazar
+  (sayfa metni girdinin <title>'ı, yoksa "Belge N", ardından "sayfa M"),
+- --dump-outline verilirse her girdinin başladığı sayfayı ana hatta yazar,
+- içinde "FAIL" geçen girdide hata koduyla çıkar,
+- içinde "HANG" geçen girdide takılır (süre sınırını denemek için),
+- içinde "MISSING" geçen girdide gerçek wkhtmltopdf'in eksik kaynak davranışını
+  taklit eder: PDF'i yazar ama ağ hatasıyla 1 koduyla çıkar.
+
+SKUB_STUB_RENDER_MS ortam değişkeni verilirse her girdi için o kadar bekler
+(gerçek dönüştürme süresini taklit etmek için).
+"""
+import os
+import re
+import sys
+import time
+
+VERSION = "wkhtmltopdf 0.12.6 (stub)"
+# Bu seçeneklerin değeri yoktur; diğer tüm "--" seçenekleri bir değer alır
+FLAG_OPTIONS = {"--enable-local-file-access", "--quiet", "-q", "--disable-smart-shrinking",
+                "--print-media-type", "--no-outline", "--outline", "--disable-javascript"}
+
+
+def parse_args(args):
+    inputs = []
+    outline_path = None
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg in FLAG_OPTIONS:
+            i += 1
+        elif arg.startswith("--"):
+            if arg == "--dump-outline":
+                outline_path = args[i + 1]
+            i += 2
+        else:
+            inputs.append(arg)
+            i += 1
+    return inputs[:-1], inputs[-1], outline_path
+
+
+def read_input(path):
+    if path == "-":
+        return sys.stdin.buffer.read()
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def write_pdf(output_path, page_texts):
+    """Her sayfasında kısa bir metin bulunan en küçük geçerli PDF'i yazar"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # sayfa ağacı, sayfa numaraları belli olunca doldurulur
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for text in page_texts:
+        stream = f"BT /F1 12 Tf 72 770 Td ({text}) Tj ET".encode("latin-1", errors="replace")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id)
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref_at = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_at)
+    with open(output_path, "wb") as f:
+        f.write(out)
+
+
+def main(args):
+    if args and args[0] in ("--version", "-V"):
+        print(VERSION)
+        return 0
+    inputs, output_path, outline_path = parse_args(args)
+    delay = float(os.environ.get("SKUB_STUB_RENDER_MS", "0")) / 1000.0
+
+    page_texts = []
+    starts = []
+    missing = False
+    for number, path in enumerate(inputs, 1):
+        content = read_input(path)
+        if b"FAIL" in content:
+            sys.stderr.write(f"Error: Failed loading page {path}\n")
+            return 1
+        if b"HANG" in content:
+            while True:
+                time.sleep(60)
+        missing = missing or b"MISSING" in content
+        if delay:
+            time.sleep(delay)
+        starts.append(len(page_texts) + 1)
+        title = re.search(rb"<title>([^<]*)</title>", content)
+        label = title.group(1).decode("utf-8", errors="replace").strip() if title else f"Belge {number}"
+        for page in range(1 + content.count(b"page-break")):
+            page_texts.append(f"{label} sayfa {page + 1}")
+
+    write_pdf(output_path, page_texts)
+    if outline_path:
+        with open(outline_path, "w", encoding="utf-8") as f:
+            f.write('<?xml version="1.0" encoding="UTF-8"?>\n<outline xmlns="http://wkhtmltopdf.org/outline">\n')
+            for start in starts:
+                f.write(f'  <item title="" page="{start}" link="" backLink=""/>\n')
+            f.write("</outline>\n")
+    if missing:
+        sys.stderr.write("Warning: Failed to load file:///logo.png (ignore)\n"
+                         "Exit with code 1 due to network error: ContentNotFoundError\n")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,337 +1,4712 @@
 #!/usr/bin/env python
 import os
+import io
 import re
+import base64
+import html
 import zipfile
+import posixpath
 import tempfile
 import shutil
 import threading
+import queue
 import subprocess
 import traceback
 import locale
+import hashlib
+import zlib
+import json
+import functools
+import heapq
+import time
+import ctypes
 import multiprocessing
+import importlib
+import importlib.util
+import types
+from collections import namedtuple, OrderedDict, deque
+from contextlib import contextmanager
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor
-import tkinter as tk
-from tkinter import filedialog, messagebox, ttk
+from urllib.parse import unquote
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+import sys
+import argparse
+try:
+    import tkinter as tk
+    from tkinter import filedialog, messagebox, ttk
+except ImportError:
+    # Başsız (komut satırı) kullanımda Tk kurulu olmayabilir
+    tk = None
 
-# 3. Parti kütüphaneler
-import pdfkit
-from PyPDF2 import PdfMerger
-from bs4 import BeautifulSoup
-import xml.etree.ElementTree as ET
+
+class _LazyModule(types.ModuleType):
+    """
+    Modülü ilk öznitelik erişiminde içe aktaran vekil. PyPDF2 ve bs4 gibi ağır
+    kütüphaneler program açılırken değil, iş hattı onlara ilk kez ihtiyaç
+    duyduğunda yüklenir; böylece pencere hemen ekrana gelir. Yüklemeden sonra
+    öznitelikler vekilin kendi sözlüğüne kopyalanır, sonraki erişimler sıradan
+    modül erişimi kadar hızlıdır.
+    """
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+# 3. Parti kütüphaneler (ilk kullanımda yüklenir)
+pdfkit = _LazyModule("pdfkit")
+PyPDF2 = _LazyModule("PyPDF2")
+generic = _LazyModule("PyPDF2.generic")
+bs4 = _LazyModule("bs4")
+ET = _LazyModule("xml.etree.ElementTree")
+# İsteğe bağlı: yalnızca XML'i olan faturaların gömülü XSLT ile HTML'e çevrilmesi
+lxml_etree = _LazyModule("lxml.etree")
+LAZY_MODULES = (pdfkit, PyPDF2, generic, bs4, ET, lxml_etree)
+# PyInstaller gibi paketleyiciler bağımlılıkları bayt kodundaki import
+# satırlarından bulur; ertelenmiş modüllerin pakete girmesi için burada
+# anılırlar. Bu blok hiçbir zaman çalışmaz.
+_PACKAGER_HINTS = False
+if _PACKAGER_HINTS:
+    import pdfkit, PyPDF2, PyPDF2.generic, bs4, xml.etree.ElementTree, lxml.etree  # noqa: F401,E401
+# Arayüz açıldıktan ne kadar sonra kütüphanelerin arka planda yükleneceği (ms)
+GUI_PRELOAD_DELAY_MS = 300
+
+
+def preload_dependencies():
+    """
+    Ertelenmiş kütüphaneleri şimdi yükler. Arayüz pencere açıldıktan sonra
+    bunu arka planda çağırır, böylece ilk iş yükleme süresini beklemez. Eksik
+    bir kütüphanenin hatası burada değil, onu kullanan işte raporlanır.
+    """
+    for module in LAZY_MODULES:
+        try:
+            importlib.import_module(module.__name__)
+        except ImportError:
+            pass
 
 # NOT: Loglama kütüphanesi yapılandırması tamamen kaldırıldı.
 # Disk üzerinde .log dosyası oluşturulmayacak ve RAM'de log listesi tutulmayacak.
 
-# ***** İş Mantığı Sınıfı: InvoiceProcessor *****
-class InvoiceProcessor:
-    def __init__(self, log_callback):
+UBL_NAMESPACES = {
+    'cbc': 'urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2',
+    'cac': 'urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2',
+    'ubl': 'urn:oasis:names:specification:ubl:schema:xsd:Invoice-2'
+}
+
+# Akış halinde XML okurken aranan etiketler (ElementTree '{ns}yerel' biçiminde)
+_XML_ISSUE_DATE_TAGS = frozenset([
+    "IssueDate",
+    f"{{{UBL_NAMESPACES['cbc']}}}IssueDate",
+    f"{{{UBL_NAMESPACES['ubl']}}}IssueDate",
+])
+_XML_FALLBACK_DATE_TAGS = ("DüzenlemeTarihi", "düzenlemetarihi", "BelgeTarihi", "belgetarihi")
+_XML_ID_TAG = f"{{{UBL_NAMESPACES['cbc']}}}ID"
+
+# wkhtmltopdf --dump-outline çıktısının ad alanı
+_WK_OUTLINE_NS = "{http://wkhtmltopdf.org/outline}"
+
+# XML'den tek geçişte okunan fatura bilgileri
+XmlMetadata = namedtuple("XmlMetadata", ["issue_date", "evrak_id"])
+
+# HTML'den tarih çıkarmada öncelikli anahtar kelimeler
+PRIMARY_DATE_KEYWORDS = [
+    "Düzenleme Tarihi", "Düzenleme tarihi", "düzenleme tarihi",
+    "Belge Tarihi", "Belge tarihi", "belge tarihi",
+    "Fatura Tarihi", "Fatura tarihi", "fatura tarihi",
+    "Düzenlenme Tarihi", "e-Fatura Tarihi", "e-Arşiv Fatura Tarihi",
+    "Tarih", "tarih", "TARİH"
+]
+
+# Tüm anahtar kelime/biçim kombinasyonlarını ve genel tarih aramasını tek
+# desende toplar. GG.AA.YYYY, GG/AA/YYYY ve GG-AA-YYYY biçimleri aynı ayırıcının
+# iki kez kullanılmasını şart koşan geri başvuru ile tek alt desende ifade edilir.
+# Eşleşmede 'kw' grubu doluysa öncelikli, boşsa genel (kelime sınırlı) tarihtir.
+# Baştaki ileri bakış, alternatiflerin denenmeyeceği konumları hızla eler.
+_DATE_SCAN_RE = re.compile(
+    r"(?=[\d" + "".join(sorted({k[0].lower() for k in PRIMARY_DATE_KEYWORDS})) + r"])"
+    r"(?:(?P<kw>" + "|".join(re.escape(k) for k in sorted(PRIMARY_DATE_KEYWORDS, key=len, reverse=True)) + r")"
+    r"\s*[:=\-]?\s*(?P<pd>\d{1,2})(?P<ps>[./\-])(?P<pm>\d{1,2})(?P=ps)(?P<py>\d{4})"
+    r"|\b(?P<gd>\d{1,2})(?P<gs>[./\-])(?P<gm>\d{1,2})(?P=gs)(?P<gy>\d{4})\b)",
+    re.IGNORECASE
+)
+
+# HTML'den düz metin çıkarırken atılacak kısımlar: yorumlar, script/style/template
+# içerikleri, doctype ve işlem talimatları ile etiketler. CDATA içeriği korunur.
+# Tırnaklı öznitelik değerlerindeki ">" etiketi bitirmez (<td title="a>b">).
+_HTML_STRIP_RE = re.compile(
+    r"<!--.*?-->"
+    r"|<(script|style|template)\b.*?</\1\s*>"
+    r"|<!\[CDATA\[(.*?)\]\]>"
+    r"|<[!?][^>]*>"
+    r"""|</?[a-zA-Z](?:"[^"]*"|'[^']*'|[^'">])*>""",
+    re.DOTALL | re.IGNORECASE
+)
+
+
+def html_to_text(content):
+    """
+    HTML içeriğini BeautifulSoup ağacı kurmadan düz metne çevirir.
+    Etiketler arasındaki metinler get_text() ile aynı şekilde ayırıcısız
+    birleştirilir ve HTML varlıkları (&nbsp; vb.) çözülür.
+    """
+    # CDATA yoksa sabit boş değiştirme kullanılır; şablonlu değiştirme her
+    # eşleşmede Python seviyesinde çalıştığı için belirgin şekilde yavaştır.
+    if "<![CDATA[" in content:
+        return html.unescape(_HTML_STRIP_RE.sub(r"\2", content))
+    return html.unescape(_HTML_STRIP_RE.sub("", content))
+
+
+# HTML içindeki göreli kaynak başvuruları (resim, stil dosyası vb.)
+_LOCAL_REF_RE = re.compile(rb"""(?:src|href)\s*=\s*["']([^"'#?]+)""", re.IGNORECASE)
+
+# İç içe ZIP'ler bu boyuta kadar bellekte, üzerindeyse doğrudan extract_root
+# altındaki geçici dosyada tutulur
+NESTED_ZIP_SPOOL_LIMIT = 8 * 1024 * 1024
+# Bellekte tutulan iç ZIP'lerin toplam sınırı; kaynak kapatılana kadar açık
+# kaldıkları için bu sınır dolunca yeni iç ZIP'ler de diske yazılır
+NESTED_ZIP_MEMORY_LIMIT = 64 * 1024 * 1024
+
+
+def _source_name(source):
+    """Dosya yolu veya ZipMember için ekranda gösterilecek dosya adını döndürür"""
+    if isinstance(source, ZipMember):
+        return source.name
+    return os.path.basename(source)
+
+
+def _source_path(source):
+    """
+    Raporlar için dosyanın arşiv içindeki yolu. İç içe ZIP'lerdeki dosyalar
+    çıkarıldıkları extracted_* klasörleriyle birlikte gösterilir.
+    """
+    if isinstance(source, ZipMember):
+        root = os.path.relpath(source.archive_root, source.source.extract_root).replace(os.sep, '/')
+        return source.info.filename if root == '.' else f"{root}/{source.info.filename}"
+    return source
+
+
+def _open_binary(source):
+    """Dosya yolu veya ZipMember'ı ikili okuma için açar"""
+    if isinstance(source, ZipMember):
+        return source.open()
+    return open(source, 'rb')
+
+
+def _read_bytes(source):
+    """Dosya yolu veya ZipMember içeriğini bayt olarak okur"""
+    with _open_binary(source) as f:
+        return f.read()
+
+
+def _local_refs(content):
+    """HTML baytlarındaki göreli kaynak başvurularını (ör. "img/logo.png") üretir"""
+    for match in _LOCAL_REF_RE.finditer(content):
+        ref = unquote(match.group(1).decode('utf-8', errors='ignore')).strip()
+        if ref and ':' not in ref and not ref.startswith('/'):
+            yield ref
+
+
+def _read_text(source):
+    """Dosya yolu veya ZipMember içeriğini UTF-8 metin olarak okur"""
+    if isinstance(source, ZipMember):
+        return source.read_text()
+    with open(source, 'r', encoding='utf-8', errors='ignore') as f:
+        return f.read()
+
+
+# ***** İptal: çalışan işi durdurma *****
+class JobCancelled(Exception):
+    """Çalıştırma kullanıcı tarafından iptal edildi"""
+
+
+class CancelToken:
+    """
+    Bir çalıştırmanın iptal bayrağı. Aşamalar check() ile düzenli olarak yoklar
+    ve iptal edilmişse JobCancelled fırlatır. Beklemede olan işler (ör. çalışan
+    bir wkhtmltopdf süreci) add_callback ile kaydolur; cancel() çağrılınca bu
+    geri çağırmalar hemen çalıştırılır, böylece iş yoklamayı beklemeden durur.
+    """
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks = set()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        """İptali işaretler ve kayıtlı geri çağırmaları çalıştırır (her iş parçacığından çağrılabilir)"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = list(self._callbacks), set()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def check(self):
+        """:raises JobCancelled: Çalıştırma iptal edildiyse"""
+        if self._event.is_set():
+            raise JobCancelled("İşlem iptal edildi")
+
+    def add_callback(self, callback):
+        """İptalde çağrılacak fonksiyonu kaydeder; zaten iptal edildiyse hemen çağırır"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.add(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback):
+        with self._lock:
+            self._callbacks.discard(callback)
+
+
+def check_cancelled(cancel_token):
+    """cancel_token verilmişse ve iptal edildiyse JobCancelled fırlatır"""
+    if cancel_token is not None:
+        cancel_token.check()
+
+
+# ***** Arşiv Sınırları: zip bombasına karşı *****
+# Bir arşivin iç içe ZIP'leriyle birlikte toplamda açılabilecek en fazla bayt ve dosya sayısı
+ARCHIVE_MAX_EXPANDED_BYTES = 8 * 1024 * 1024 * 1024
+ARCHIVE_MAX_ENTRIES = 200000
+# Bu boyuttan büyük üyelerde açılmış/sıkıştırılmış boyut oranı sınırı aşılırsa üye atlanır
+ARCHIVE_MAX_RATIO = 200
+ARCHIVE_RATIO_MIN_BYTES = 1024 * 1024
+ARCHIVE_MAX_DEPTH = 5
+
+
+class ArchiveLimitError(Exception):
+    """Arşiv, açma sınırlarından birini aştı; arşivin işlenmesi durdurulur"""
+
+
+class ArchiveLimits:
+    """Bir arşivin (iç içe ZIP'leri dahil) açılmasında uyulacak sınırlar"""
+    def __init__(self, max_expanded_bytes=ARCHIVE_MAX_EXPANDED_BYTES, max_entries=ARCHIVE_MAX_ENTRIES,
+                 max_ratio=ARCHIVE_MAX_RATIO, max_depth=ARCHIVE_MAX_DEPTH):
+        self.max_expanded_bytes = max_expanded_bytes
+        self.max_entries = max_entries
+        self.max_ratio = max_ratio
+        self.max_depth = max_depth
+
+
+class ArchiveBudget:
+    """
+    Bir arşivin açılmasında harcanan bütçeyi tutar. Boyutlar ZIP dizininde
+    bildirilen değerlerden okunur; zipfile bir üyeden bildirilen boyuttan
+    fazlasını açmadığı için bu değerler gerçek üst sınırdır. Aynı içerikli iç
+    ZIP'ler (SHA-256) yalnızca bir kez açılır. İş parçacıkları arasında paylaşılabilir.
+    """
+    def __init__(self, limits=None):
+        self.limits = limits or ArchiveLimits()
+        self.entries = 0
+        self.expanded_bytes = 0
+        self.skipped_members = 0
+        self.skipped_archives = 0
+        self._seen_archives = set()
+        self._lock = threading.Lock()
+
+    def admit_member(self, info, archive_name):
+        """
+        Üyeyi bütçeye ekler. Sıkıştırma oranı şüpheli derecede yüksekse False
+        döndürür; üye açılmadan atlanmalıdır.
+        :raises ArchiveLimitError: Toplam dosya sayısı veya açılmış boyut sınırı aşılırsa
+        """
+        limits = self.limits
+        if info.file_size >= ARCHIVE_RATIO_MIN_BYTES and info.file_size > max(1, info.compress_size) * limits.max_ratio:
+            with self._lock:
+                self.skipped_members += 1
+            return False
+        with self._lock:
+            self.entries += 1
+            self.expanded_bytes += info.file_size
+            if self.entries > limits.max_entries:
+                raise ArchiveLimitError(f"Arşivde {limits.max_entries} dosyadan fazlası var, açma durduruldu ({archive_name})")
+            if self.expanded_bytes > limits.max_expanded_bytes:
+                raise ArchiveLimitError(f"Arşivin açılmış boyutu {limits.max_expanded_bytes // (1024 * 1024)} MB "
+                                        f"sınırını aştı, açma durduruldu ({archive_name})")
+        return True
+
+    def admit_archive(self, digest):
+        """İç ZIP aynı içerikle daha önce açılmadıysa kaydedip True döndürür"""
+        with self._lock:
+            if digest in self._seen_archives:
+                self.skipped_archives += 1
+                return False
+            self._seen_archives.add(digest)
+            return True
+
+    def record(self, profile):
+        """Sayaçları RunProfile'a yazar"""
+        profile.count("archive_entries", self.entries)
+        profile.count("expanded_bytes", self.expanded_bytes)
+        profile.count("skipped_members", self.skipped_members)
+        profile.count("skipped_archives", self.skipped_archives)
+
+
+# ***** Geçici Klasör Bütçesi *****
+class TempBudget:
+    """
+    Bir işin geçici klasörde tuttuğu dosyaların toplam boyutunu izler: diske
+    yazılan fatura HTML'leri ve kaynakları, diskte tutulan iç ZIP'ler, XML'den
+    üretilen HTML'ler ve ara PDF'ler. En yüksek kullanım her durumda raporlanır.
+    max_bytes verilirse (disk bütçesi kipi) dosyalar işleri biter bitmez
+    silinir ve throttle açıksa yeni dönüştürmeler bütçe dolduğunda yer açılana
+    kadar bekletilir. İş parçacıkları arasında paylaşılabilir.
+    """
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes
+        # Ara PDF'ler işin sonuna kadar geçici klasörde kalıyorsa (ciltler, eşitleme)
+        # beklemek yer açmaz; bu durumda dönüştürmeler bekletilmez
+        self.throttle = True
+        self.used_bytes = 0
+        self.peak_bytes = 0
+        self.deleted_files = 0
+        self.wait_sec = 0.0
+        self._files = {}
+        self._invoice_bytes = 0
+        self._invoice_count = 0
+        self._condition = threading.Condition()
+
+    @property
+    def enabled(self):
+        return bool(self.max_bytes)
+
+    def add(self, key, size=None):
+        """
+        Geçici klasöre yazılan dosyayı hesaba katar; aynı anahtar yeniden eklenirse
+        boyutu güncellenir. key dosya yoludur (adı olmayan geçici dosyalarda nesnenin kendisi).
+        """
+        if size is None:
+            try:
+                size = os.path.getsize(key)
+            except OSError:
+                return
+        with self._condition:
+            self.used_bytes += size - self._files.get(key, 0)
+            self._files[key] = size
+            self.peak_bytes = max(self.peak_bytes, self.used_bytes)
+
+    def forget(self, key):
+        """Dosyayı silmeden hesaptan çıkarır (ör. çıktı klasörüne taşındı)"""
+        with self._condition:
+            size = self._files.pop(key, None)
+            if size is not None:
+                self.used_bytes -= size
+                self._condition.notify_all()
+
+    def release(self, path):
+        """
+        Disk bütçesi kipinde işi biten dosyayı siler ve hesaptan çıkarır.
+        :return: Dosya silindiyse True (kip kapalıysa hiçbir şey yapılmaz)
+        """
+        if not self.enabled:
+            return False
+        try:
+            os.remove(path)
+            removed = True
+        except OSError:
+            removed = False
+        with self._condition:
+            if removed:
+                self.deleted_files += 1
+        self.forget(path)
+        return removed
+
+    def note_invoice(self, size):
+        """Tamamlanan bir faturanın geçici klasörde kapladığı yeri (HTML + PDF) kaydeder"""
+        with self._condition:
+            self._invoice_bytes += size
+            self._invoice_count += 1
+
+    def estimate(self, count):
+        """count faturanın geçici klasörde kaplaması beklenen yer (şimdiye kadarki ortalamayla)"""
+        with self._condition:
+            if not self._invoice_count:
+                return 0
+            return self._invoice_bytes * count // self._invoice_count
+
+    def wait_for_space(self, needed, busy, stop_event=None):
+        """
+        Kullanım + needed bütçeye sığana kadar bekler. Yer açabilecek iş kalmadıysa
+        (busy() False) beklemez; tek fatura bütçeden büyük olsa bile iş ilerler.
+        :return: Beklenen süre (sn)
+        """
+        if not self.enabled or not self.throttle:
+            return 0.0
+        started = None
+        with self._condition:
+            while self.used_bytes + needed > self.max_bytes and busy():
+                if stop_event is not None and stop_event.is_set():
+                    break
+                if started is None:
+                    started = time.perf_counter()
+                self._condition.wait(0.1)
+            waited = time.perf_counter() - started if started is not None else 0.0
+            self.wait_sec += waited
+        return waited
+
+    def record(self, profile):
+        """Tepe kullanımı, silinen dosya sayısını ve bütçe beklemesini sayaçlara yazar"""
+        profile.count("temp_peak_bytes", self.peak_bytes)
+        if self.deleted_files:
+            profile.count("temp_deleted_files", self.deleted_files)
+        if self.wait_sec:
+            profile.count("temp_wait_ms", int(self.wait_sec * 1000))
+
+
+# ***** ZIP Kaynağı: Diske çıkarmadan okuma *****
+class ZipMember:
+    """ZIP arşivi içindeki tek bir dosya. İçerik arşivden doğrudan akış olarak okunur."""
+    __slots__ = ("source", "archive", "info", "archive_root", "name")
+
+    def __init__(self, source, archive, info, archive_root):
+        self.source = source
+        self.archive = archive
+        self.info = info
+        self.archive_root = archive_root
+        self.name = os.path.basename(info.filename)
+
+    def __repr__(self):
+        return f"ZipMember({self.info.filename!r})"
+
+    def open(self):
+        return self.archive.open(self.info)
+
+    def read_text(self):
+        with self.open() as f:
+            return f.read().decode('utf-8', errors='ignore')
+
+    def materialize(self):
+        """
+        Dosyayı (ve HTML ise aynı arşivdeki göreli kaynaklarını) diske yazar.
+        wkhtmltopdf yalnızca diskteki dosyaları okuyabildiği için dönüştürmeden
+        hemen önce çağrılır.
+        :return: Diskteki dosya yolu
+        """
+        return self.source.materialize(self)
+
+
+class ZipSource:
+    """
+    ZIP dosyasını (iç içe ZIP'ler dahil) diske çıkarmadan dolaşır.
+    Küçük iç içe ZIP'ler bellekten, büyükleri (veya bellek sınırı dolduktan
+    sonrakiler) extract_root altındaki geçici dosyadan açılır; arşivler kaynak
+    kapatılana kadar açık tutulur.
+    """
+    def __init__(self, zip_path, extract_root, log_callback=None, max_depth=None, limits=None, cancel_token=None,
+                 temp_budget=None):
+        """
+        :param limits: Açma sınırları (ArchiveLimits); aşılırsa iter_members ArchiveLimitError fırlatır
+        :param cancel_token: Verilirse iptalde iter_members JobCancelled fırlatır (CancelToken)
+        :param temp_budget: Verilirse (TempBudget) diske yazılan üyeler ve diskteki iç ZIP'ler
+                            hesaba katılır; bütçe kipinde release ile silinebilirler
+        """
+        self.zip_path = zip_path
+        self.extract_root = extract_root
+        self.log_callback = log_callback
+        self.cancel_token = cancel_token
+        self.temp_budget = temp_budget
+        self.limits = limits or ArchiveLimits()
+        self.max_depth = max_depth if max_depth is not None else self.limits.max_depth
+        # Son iter_members çağrısının bütçesi (sayaçlar için)
+        self.budget = ArchiveBudget(self.limits)
+        self._archives = []
+        self._spools = []
+        self._spool_memory = 0
+        self._materialized = {}
+        self._extract_locks = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def log_message(self, message):
+        if self.log_callback:
+            self.log_callback(message)
+
+    def close(self):
+        """Açık arşivleri ve geçici iç ZIP dosyalarını kapatır"""
+        for archive in self._archives:
+            try:
+                archive.close()
+            except Exception:
+                pass
+        for spool in self._spools:
+            try:
+                spool.close()
+            except Exception:
+                pass
+            if self.temp_budget is not None:
+                self.temp_budget.forget(spool)
+        self._archives = []
+        self._spools = []
+        self._spool_memory = 0
+
+    def iter_members(self):
+        """
+        Arşivdeki (iç içe ZIP'ler dahil) tüm dosyaları ZipMember olarak üretir.
+        Arşivler tek iş parçacığında sırayla dolaşılır; aynı içerikli iç ZIP'ler atlanır.
+        :raises ArchiveLimitError: Açma sınırları aşılırsa
+        """
+        os.makedirs(self.extract_root, exist_ok=True)
+        self.budget = ArchiveBudget(self.limits)
+        try:
+            archive = zipfile.ZipFile(self.zip_path, 'r')
+        except Exception as e:
+            self.log_message(f"Hata: {os.path.basename(self.zip_path)} açılamadı: {str(e)}")
+            return
+        yield from self._iter_archive(archive, os.path.basename(self.zip_path), self.extract_root, 0)
+
+    def _iter_archive(self, archive, display_name, archive_root, depth):
+        self._archives.append(archive)
+        self.log_message(f"Zip dosyası açıldı: {display_name}")
+        inner_zips = []
+        for info in archive.infolist():
+            check_cancelled(self.cancel_token)
+            if info.is_dir():
+                continue
+            if not self.budget.admit_member(info, display_name):
+                self.log_message(f"⚠️ Şüpheli sıkıştırma oranı, açılmıyor: {info.filename} ({display_name})")
+                continue
+            if info.filename.lower().endswith('.zip'):
+                inner_zips.append(info)
+                continue
+            yield ZipMember(self, archive, info, archive_root)
+
+        for info in inner_zips:
+            inner_name = os.path.basename(info.filename)
+            if depth + 1 > self.max_depth:
+                self.log_message(f"Maksimum derinliğe ulaşıldı, daha fazla açılmıyor: {inner_name}")
+                continue
+            in_memory = (info.file_size <= NESTED_ZIP_SPOOL_LIMIT
+                         and self._spool_memory + info.file_size <= NESTED_ZIP_MEMORY_LIMIT)
+            if in_memory:
+                spool = tempfile.SpooledTemporaryFile(max_size=NESTED_ZIP_SPOOL_LIMIT, dir=self.extract_root)
+            else:
+                spool = tempfile.TemporaryFile(dir=self.extract_root)
+            try:
+                digest = hashlib.sha256()
+                written = 0
+                with archive.open(info) as src:
+                    for chunk in iter(lambda: src.read(1024 * 1024), b""):
+                        check_cancelled(self.cancel_token)
+                        digest.update(chunk)
+                        spool.write(chunk)
+                        written += len(chunk)
+                if not self.budget.admit_archive(digest.digest()):
+                    spool.close()
+                    self.log_message(f"Aynı içerikli iç ZIP zaten açıldı, atlanıyor: {inner_name}")
+                    continue
+                spool.seek(0)
+                inner_archive = zipfile.ZipFile(spool, 'r')
+            except JobCancelled:
+                spool.close()
+                raise
+            except Exception as e:
+                spool.close()
+                self.log_message(f"Hata: {inner_name} açılamadı: {str(e)}")
+                continue
+            self._spools.append(spool)
+            if in_memory and written <= NESTED_ZIP_SPOOL_LIMIT:
+                self._spool_memory += written
+            elif self.temp_budget is not None:
+                self.temp_budget.add(spool, written)
+            inner_root = os.path.join(archive_root, f"extracted_{os.path.splitext(inner_name)[0]}")
+            yield from self._iter_archive(inner_archive, inner_name, inner_root, depth + 1)
+
+    def find_members(self, *extension_groups):
+        """
+        Arşivi tek geçişte dolaşır ve dosyaları uzantı gruplarına ayırır.
+        Örnek: html, xml = source.find_members(['.html', '.htm'], ['.xml'])
+        """
+        groups = [[] for _ in extension_groups]
+        for member in self.iter_members():
+            ext = os.path.splitext(member.name)[1].lower()
+            for extensions, found in zip(extension_groups, groups):
+                if ext in extensions:
+                    found.append(member)
+                    break
+        return groups
+
+    def materialize(self, member):
+        """Üyeyi ve HTML ise göreli kaynaklarını archive_root altına çıkarır"""
+        path = self._extract(member.archive, member.info, member.archive_root)
+        if os.path.splitext(member.name)[1].lower() in ('.html', '.htm'):
+            try:
+                with open(path, 'rb') as f:
+                    content = f.read()
+                base_dir = posixpath.dirname(member.info.filename)
+                for ref in _local_refs(content):
+                    name = posixpath.normpath(posixpath.join(base_dir, ref))
+                    try:
+                        info = member.archive.getinfo(name)
+                    except KeyError:
+                        continue
+                    self._extract(member.archive, info, member.archive_root)
+            except Exception as e:
+                self.log_message(f"⚠️ Kaynak dosyaları çıkarılamadı: {member.name} - {str(e)}")
+        return path
+
+    def _extract(self, archive, info, archive_root):
+        # Aynı dosya (ör. ortak logo) birden çok iş parçacığından istenebilir;
+        # her üye bir kez ve tek iş parçacığı tarafından yazılır.
+        key = (id(archive), info.filename)
+        with self._lock:
+            member_lock = self._extract_locks.setdefault(key, threading.Lock())
+        with member_lock:
+            path = self._materialized.get(key)
+            if path is None:
+                # Üst klasörler önceden açılır: zipfile eş zamanlı çıkarmalarda
+                # aynı klasörü iki kez açmaya çalışıp FileExistsError verebilir.
+                parts = [part for part in info.filename.split('/')[:-1] if part not in ('', '.', '..')]
+                os.makedirs(os.path.join(archive_root, *parts), exist_ok=True)
+                path = archive.extract(info, archive_root)
+                self._materialized[key] = path
+                if self.temp_budget is not None:
+                    self.temp_budget.add(path, info.file_size)
+        return path
+
+    def release(self, member):
+        """
+        Disk bütçesi kipinde üyenin diske yazılmış kopyasını siler (göreli
+        kaynakları başka faturalarca da kullanıldığı için kalır). Üye yeniden
+        istenirse tekrar çıkarılır.
+        """
+        if self.temp_budget is None or not self.temp_budget.enabled:
+            return
+        key = (id(member.archive), member.info.filename)
+        with self._lock:
+            member_lock = self._extract_locks.get(key)
+        if member_lock is None:
+            return
+        with member_lock:
+            path = self._materialized.pop(key, None)
+            if path is not None:
+                self.temp_budget.release(path)
+
+
+# PDF önbelleğinin varsayılan boyut sınırı
+DEFAULT_PDF_CACHE_BYTES = 1024 * 1024 * 1024
+
+
+def default_cache_dir():
+    """Kullanıcıya özel önbellek klasörünü döndürür"""
+    if os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser("~"), "AppData", "Local")
+        return os.path.join(base, "sKub", "pdf_cache")
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "skub", "pdf_cache")
+
+
+@functools.lru_cache(maxsize=None)
+def wkhtmltopdf_version(wkhtmltopdf_path):
+    """wkhtmltopdf sürüm metnini döndürür (önbellek anahtarının parçası)"""
+    try:
+        result = subprocess.run([wkhtmltopdf_path, "--version"], capture_output=True, timeout=30)
+        return result.stdout.decode('utf-8', errors='ignore').strip() or "bilinmiyor"
+    except Exception:
+        return "bilinmiyor"
+
+
+def resource_digests(source, html_bytes):
+    """
+    HTML'in başvurduğu göreli kaynakların (resim, stil dosyası vb.) (ad, sha256)
+    listesini döndürür; bulunamayan kaynakların özeti None'dır. ZipMember için
+    kaynaklar aynı arşivden, dosya yolu için HTML'in klasöründen okunur.
+    """
+    digests = []
+    for ref in sorted(set(_local_refs(html_bytes))):
+        try:
+            if isinstance(source, ZipMember):
+                name = posixpath.normpath(posixpath.join(posixpath.dirname(source.info.filename), ref))
+                f = source.archive.open(source.archive.getinfo(name))
+            else:
+                f = open(os.path.normpath(os.path.join(os.path.dirname(source), ref)), 'rb')
+        except (KeyError, OSError):
+            digests.append((ref, None))
+            continue
+        digest = hashlib.sha256()
+        with f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        digests.append((ref, digest.hexdigest()))
+    return digests
+
+
+# ***** PDF Önbelleği *****
+class PdfCache:
+    """
+    İçerik adresli, diskte kalıcı PDF önbelleği. Anahtar; HTML baytlarının,
+    başvurduğu göreli kaynakların (resource_digests), dönüştürücü seçeneklerinin
+    ve dönüştürücü sürümünün özetidir. Toplam boyut
+    max_bytes'ı aşınca en uzun süredir kullanılmayan kayıtlar silinir.
+    Kullanım sırası dosya değişiklik zamanında tutulur, böylece uygulama
+    yeniden açıldığında da korunur.
+    """
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_PDF_CACHE_BYTES):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # anahtar -> boyut, eskiden yeniye
+        self._total_bytes = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(".pdf"):
+                    st = entry.stat()
+                    entries.append((st.st_mtime, entry.name[:-4], st.st_size))
+        for _, key, size in sorted(entries):
+            self._entries[key] = size
+            self._total_bytes += size
+        self._evict()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".pdf")
+
+    def make_key(self, html_bytes, pdf_options, renderer_version, resources=()):
+        digest = hashlib.sha256()
+        digest.update(html_bytes)
+        if resources:
+            digest.update(json.dumps(list(resources)).encode('utf-8'))
+        digest.update(json.dumps(pdf_options, sort_keys=True).encode('utf-8'))
+        digest.update(renderer_version.encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key, output_path):
+        """Kayıt varsa PDF'i output_path'e kopyalar ve True döndürür"""
+        with self._lock:
+            found = key in self._entries
+            if found:
+                self._entries.move_to_end(key)
+        if found:
+            try:
+                shutil.copyfile(self._path(key), output_path)
+                os.utime(self._path(key))
+                with self._lock:
+                    self.hits += 1
+                return True
+            except OSError:
+                # Başka bir sKub örneği kaydı silmiş olabilir
+                with self._lock:
+                    size = self._entries.pop(key, None)
+                    if size is not None:
+                        self._total_bytes -= size
+        with self._lock:
+            self.misses += 1
+        return False
+
+    def put(self, key, pdf_path):
+        """Üretilen PDF'i önbelleğe ekler"""
+        try:
+            tmp_path = self._path(key) + f".{threading.get_ident()}.tmp"
+            shutil.copyfile(pdf_path, tmp_path)
+            os.replace(tmp_path, self._path(key))
+            size = os.path.getsize(self._path(key))
+        except OSError:
+            return
+        with self._lock:
+            old_size = self._entries.pop(key, None)
+            if old_size is not None:
+                self._total_bytes -= old_size
+            self._entries[key] = size
+            self._total_bytes += size
+            self._evict()
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+
+def peak_rss_bytes():
+    """İşlemin şimdiye kadarki en yüksek bellek (RSS) kullanımını bayt olarak döndürür"""
+    try:
+        if os.name == 'nt':
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [("cb", ctypes.c_ulong), ("PageFaultCount", ctypes.c_ulong),
+                            ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                            ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                return counters.PeakWorkingSetSize
+            return None
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux KB, macOS bayt döndürür
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except Exception:
+        return None
+
+
+def available_memory_bytes():
+    """Sistemde kullanılabilir (boş + geri kazanılabilir) belleği bayt olarak döndürür"""
+    try:
+        if os.name == 'nt':
+            class MEMORYSTATUSEX(ctypes.Structure):
+                _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                            ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                            ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                            ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                            ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+            status = MEMORYSTATUSEX()
+            status.dwLength = ctypes.sizeof(status)
+            if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+                return status.ullAvailPhys
+            return None
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except Exception:
+        return None
+
+
+# ***** Çalıştırma Profili: aşama süreleri, gecikme dağılımı, G/Ç sayaçları *****
+# Fatura başına dönüştürme gecikmesi dağılımının üst sınırları (ms)
+RENDER_LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class RunProfile:
+    """
+    Bir işin nereye zaman harcadığını kaydeder. Aşamalar birden çok iş
+    parçacığında eş zamanlı çalıştığı için her aşamanın toplam meşguliyet süresi
+    (wall), iş parçacığı işlemci süresi (cpu) ve ilk başlangıcından son bitişine
+    kadar geçen süre (span) ayrı ayrı tutulur. Tüm yöntemler iş parçacığı güvenlidir.
+    cprofile=True ise profile edilen iş parçacıklarının cProfile çıktıları
+    birleştirilir; tracemalloc=True ise bellek ayırmaları izlenir.
+    """
+    def __init__(self, slowest_count=20, cprofile=False, tracemalloc=False):
+        self.slowest_count = slowest_count
+        self.cprofile = cprofile
+        self.tracemalloc = tracemalloc
+        self.stages = {}
+        self.counters = {}
+        self.latencies_ms = []
+        self._slowest = []
+        self._profilers = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self.tracemalloc:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+        if self.cprofile and sys.version_info >= (3, 12):
+            # 3.12'den itibaren cProfile tüm iş parçacıklarını tek profille izler
+            import cProfile
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+                self._profilers.append(profiler)
+            except ValueError:
+                pass
+
+    def add_stage(self, name, wall, cpu, started=None, finished=None):
+        """Bir aşamaya ait ölçümü ekler"""
+        finished = time.perf_counter() if finished is None else finished
+        started = finished - wall if started is None else started
+        with self._lock:
+            stage = self.stages.get(name)
+            if stage is None:
+                stage = self.stages[name] = {"calls": 0, "wall": 0.0, "cpu": 0.0,
+                                             "first": started, "last": finished}
+            stage["calls"] += 1
+            stage["wall"] += wall
+            stage["cpu"] += cpu
+            stage["first"] = min(stage["first"], started)
+            stage["last"] = max(stage["last"], finished)
+
+    @contextmanager
+    def stage(self, name):
+        """with bloğunun süresini çağıran iş parçacığında ölçüp aşamaya ekler"""
+        started = time.perf_counter()
+        cpu = time.thread_time()
+        profiler = self._thread_profiler()
+        if profiler:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler:
+                profiler.disable()
+            finished = time.perf_counter()
+            self.add_stage(name, finished - started, time.thread_time() - cpu, started, finished)
+
+    def _thread_profiler(self):
+        """cProfile açıksa bu iş parçacığına ait profil nesnesini döndürür"""
+        if not self.cprofile or sys.version_info >= (3, 12):
+            return None
+        profiler = getattr(self._local, "profiler", None)
+        if profiler is None:
+            import cProfile
+            profiler = self._local.profiler = cProfile.Profile()
+            with self._lock:
+                self._profilers.append(profiler)
+        return profiler
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record_render(self, label, latency_ms):
+        """Bir faturanın dönüştürme gecikmesini kaydeder; en yavaş N fatura ayrıca tutulur"""
+        with self._lock:
+            self.latencies_ms.append(latency_ms)
+            item = (latency_ms, label)
+            if len(self._slowest) < self.slowest_count:
+                heapq.heappush(self._slowest, item)
+            elif item > self._slowest[0]:
+                heapq.heapreplace(self._slowest, item)
+
+    def latency_summary(self):
+        with self._lock:
+            values = sorted(self.latencies_ms)
+        if not values:
+            return {"count": 0}
+        histogram = OrderedDict((f"<={bound}", 0) for bound in RENDER_LATENCY_BUCKETS_MS)
+        histogram[f">{RENDER_LATENCY_BUCKETS_MS[-1]}"] = 0
+        keys = list(histogram)
+        for value in values:
+            for key, bound in zip(keys, RENDER_LATENCY_BUCKETS_MS):
+                if value <= bound:
+                    histogram[key] += 1
+                    break
+            else:
+                histogram[keys[-1]] += 1
+
+        def percentile(p):
+            return round(values[min(len(values) - 1, int(len(values) * p))], 1)
+        return {
+            "count": len(values),
+            "mean": round(sum(values) / len(values), 1),
+            "p50": percentile(0.50),
+            "p90": percentile(0.90),
+            "p99": percentile(0.99),
+            "max": round(values[-1], 1),
+            "histogram": histogram,
+        }
+
+    def stage_summary(self):
+        with self._lock:
+            return {name: {"calls": stage["calls"],
+                           "wall_sec": round(stage["wall"], 3),
+                           "cpu_sec": round(stage["cpu"], 3),
+                           "span_sec": round(stage["last"] - stage["first"], 3)}
+                    for name, stage in self.stages.items()}
+
+    def report(self, cprofile_path=None):
+        """
+        Profilin JSON'a yazılabilir özetini döndürür. cprofile_path verilirse
+        birleştirilmiş cProfile istatistikleri bu dosyaya yazılır.
+        """
+        with self._lock:
+            slowest = sorted(self._slowest, reverse=True)
+            counters = dict(self.counters)
+        report = {
+            "stages": self.stage_summary(),
+            "render_latency_ms": self.latency_summary(),
+            "slowest": [{"invoice": label, "ms": round(latency, 1)} for latency, label in slowest],
+            "counters": counters,
+        }
+        if self.tracemalloc:
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                top = tracemalloc.take_snapshot().statistics("lineno")[:15]
+                tracemalloc.stop()
+                report["tracemalloc"] = {
+                    "current_mb": round(current / (1024 * 1024), 1),
+                    "peak_mb": round(peak / (1024 * 1024), 1),
+                    "top": [{"where": str(stat.traceback), "kb": round(stat.size / 1024, 1), "count": stat.count}
+                            for stat in top],
+                }
+        if self.cprofile and self._profilers:
+            import pstats
+            if sys.version_info >= (3, 12):
+                self._profilers[0].disable()
+            stats = pstats.Stats(self._profilers[0])
+            for profiler in self._profilers[1:]:
+                stats.add(profiler)
+            if cprofile_path:
+                stats.dump_stats(cprofile_path)
+            rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:25]
+            report["cprofile"] = {
+                "path": cprofile_path,
+                "top_cumulative": [{"function": f"{path}:{line}({name})", "calls": nc,
+                                    "tottime": round(tt, 3), "cumtime": round(ct, 3)}
+                                   for (path, line, name), (_, nc, tt, ct, _) in rows],
+            }
+        return report
+
+
+# ***** Akış Halinde PDF Birleştirme *****
+# Sıkıştırılmış kipte bir nesne akışına (ObjStm) konan en fazla nesne sayısı
+PDF_OBJSTM_SIZE = 200
+# Sıkıştırılmış kipte yeniden sıkıştırılacak filtresiz akışların en küçük boyutu
+PDF_COMPRESS_MIN_BYTES = 256
+
+
+class StreamingPdfWriter:
+    """
+    PDF'leri tek bir çıktı dosyasına artımlı olarak ekler. Her kaynak PDF'in
+    nesneleri yeniden numaralandırılıp hemen diske yazılır; bellekte yalnızca
+    nesne konumları ve sayfa listesi tutulur. PdfMerger'ın aksine tüm sayfalar
+    yazma anına kadar bellekte bekletilmez.
+
+    optimize açıkken:
+    - Faturalar arasında bayt bayt aynı nesneler (yazı tipi alt kümeleri, logolar,
+      XObject'ler ve bunlara bağlı sözlükler) SHA-256 özetiyle tanınıp bir kez
+      yazılır, sonraki faturalar aynı nesneye başvurur. Özet, alt nesneleri
+      yeniden numaralandırılmış haliyle alındığından aynı yazı tipine bağlı
+      sözlükler de ortaklaşır.
+    - Akış olmayan nesneler sıkıştırılmış nesne akışlarında (PDF 1.5 ObjStm),
+      çapraz başvuru tablosu sıkıştırılmış XRef akışında yazılır.
+    - Filtresiz akışlar Flate ile sıkıştırılır.
+    """
+    _CATALOG_ID = 1
+    _PAGES_ID = 2
+
+    def __init__(self, output_path, optimize=False):
+        self.output_path = output_path
+        self.optimize = optimize
+        self._file = open(output_path, 'wb')
+        self._file.write(b"%PDF-1.5\n%\xe2\xe3\xcf\xd3\n" if optimize else b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        # Nesne başına dosya konumu, nesne akışındaysa (akış no, sıra) ikilisi
+        self._offsets = [None, None, None]  # 0: boş kayıt, 1: katalog, 2: sayfa ağacı
+        self._kids = []
+        self.page_count = 0
+        # optimize: nesne özeti -> nesne no, nesne akışına girecek (no, gövde) listesi
+        self._digests = {}
+        self._pending = []
+        self.dedup_objects = 0
+        self.dedup_bytes = 0
+
+    def _allocate(self):
+        self._offsets.append(None)
+        return len(self._offsets) - 1
+
+    @staticmethod
+    def _serialize(obj):
+        buffer = io.BytesIO()
+        obj.write_to_stream(buffer, None)
+        return buffer.getvalue()
+
+    def _write_object(self, obj_id, obj, body=None):
+        if body is None:
+            body = self._serialize(obj)
+        if self.optimize and not isinstance(obj, generic.StreamObject):
+            self._pending.append((obj_id, body))
+            if len(self._pending) >= PDF_OBJSTM_SIZE:
+                self._flush_object_stream()
+            return
+        self._offsets[obj_id] = self._file.tell()
+        self._file.write(f"{obj_id} 0 obj\n".encode('ascii'))
+        self._file.write(body)
+        self._file.write(b"\nendobj\n")
+
+    def _flush_object_stream(self):
+        """Bekleyen nesneleri tek bir sıkıştırılmış nesne akışına yazar"""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        header = []
+        bodies = []
+        position = 0
+        for obj_id, body in pending:
+            header.append(f"{obj_id} {position}")
+            bodies.append(body)
+            position += len(body) + 1
+        header = " ".join(header).encode('ascii') + b"\n"
+        stream = generic.StreamObject()
+        stream._data = zlib.compress(header + b"\n".join(bodies) + b"\n")
+        stream[generic.NameObject("/Type")] = generic.NameObject("/ObjStm")
+        stream[generic.NameObject("/N")] = generic.NumberObject(len(pending))
+        stream[generic.NameObject("/First")] = generic.NumberObject(len(header))
+        stream[generic.NameObject("/Filter")] = generic.NameObject("/FlateDecode")
+        stream_id = self._allocate()
+        self._write_object(stream_id, stream)
+        for index, (obj_id, _) in enumerate(pending):
+            self._offsets[obj_id] = (stream_id, index)
+
+    def append_pdf(self, pdf, pages=None):
+        """
+        Bir PDF'in sayfalarını sona ekler ve eklenen sayfa sayısını döndürür.
+        :param pdf: PDF yolu veya aynı dosyadan birkaç aralık alınacaksa PdfReader
+        :param pages: Eklenecek sayfa numaraları (0'dan başlar; None ise tüm sayfalar)
+        """
+        reader = pdf if isinstance(pdf, PyPDF2.PdfReader) else PyPDF2.PdfReader(pdf)
+        pages = list(reader.pages) if pages is None else [reader.pages[i] for i in pages]
+        memo = {}
+        page_ids = []
+        # Sayfalar arası bağlantılar kopyalanırken sayfaların kendisi tekrar
+        # kopyalanmasın diye önce tüm sayfalara numara ayrılır.
+        for page in pages:
+            new_id = self._allocate()
+            page_ids.append(new_id)
+            ref = page.indirect_reference
+            if ref is not None:
+                memo[(ref.idnum, ref.generation)] = new_id
+        for page, new_id in zip(pages, page_ids):
+            new_page = generic.DictionaryObject()
+            for key, value in page.items():
+                if key == "/Parent":
+                    continue
+                new_page[generic.NameObject(key)] = self._copy(value, memo)
+            new_page[generic.NameObject("/Parent")] = generic.IndirectObject(self._PAGES_ID, 0, None)
+            self._write_object(new_id, new_page)
+        # Sayfalar yalnızca kaynak PDF'in tamamı başarıyla yazıldıktan sonra eklenir
+        self._kids.extend(page_ids)
+        self.page_count += len(page_ids)
+        return len(page_ids)
+
+    def _copy(self, obj, memo):
+        if isinstance(obj, generic.IndirectObject):
+            key = (obj.idnum, obj.generation)
+            if key in memo:
+                new_id = memo[key]
+                if new_id is None:
+                    # Kopyalanmakta olan nesneye döngüsel başvuru: numarası şimdi ayrılır
+                    new_id = memo[key] = self._allocate()
+                return generic.IndirectObject(new_id, 0, None)
+            target = obj.get_object()
+            if isinstance(target, generic.DictionaryObject):
+                obj_type = target.get("/Type")
+                if obj_type == "/Pages":
+                    return generic.IndirectObject(self._PAGES_ID, 0, None)
+                if obj_type == "/Catalog":
+                    return generic.NullObject()
+            if not self.optimize:
+                new_id = self._allocate()
+                memo[key] = new_id
+                self._write_object(new_id, self._copy(target, memo))
+                return generic.IndirectObject(new_id, 0, None)
+            # Numara, nesnenin (ve alt nesnelerinin) kopyası çıkıp özeti bilinince
+            # ayrılır; aynısı daha önce yazıldıysa o nesneye başvurulur
+            memo[key] = None
+            copied = self._copy(target, memo)
+            body = self._serialize(copied)
+            new_id = memo[key]
+            digest = None
+            if new_id is None:
+                digest = hashlib.sha256(body).digest()
+                existing = self._digests.get(digest)
+                if existing is not None:
+                    memo[key] = existing
+                    self.dedup_objects += 1
+                    self.dedup_bytes += len(body)
+                    return generic.IndirectObject(existing, 0, None)
+                new_id = memo[key] = self._allocate()
+            if isinstance(copied, generic.StreamObject) and self._compress(copied):
+                body = None
+            self._write_object(new_id, copied, body)
+            if digest is not None:
+                self._digests[digest] = new_id
+            return generic.IndirectObject(new_id, 0, None)
+        if isinstance(obj, generic.StreamObject):
+            new_obj = generic.StreamObject()
+            new_obj._data = obj._data
+            for key, value in obj.items():
+                if key != "/Length":
+                    new_obj[generic.NameObject(key)] = self._copy(value, memo)
+            return new_obj
+        if isinstance(obj, generic.DictionaryObject):
+            new_obj = generic.DictionaryObject()
+            for key, value in obj.items():
+                new_obj[generic.NameObject(key)] = self._copy(value, memo)
+            return new_obj
+        if isinstance(obj, generic.ArrayObject):
+            return generic.ArrayObject(self._copy(item, memo) for item in obj)
+        return obj
+
+    @staticmethod
+    def _compress(stream):
+        """Filtresiz akışı Flate ile sıkıştırır; küçülttüyse True döndürür"""
+        if "/Filter" in stream or len(stream._data) < PDF_COMPRESS_MIN_BYTES:
+            return False
+        compressed = zlib.compress(stream._data)
+        if len(compressed) >= len(stream._data):
+            return False
+        stream._data = compressed
+        stream[generic.NameObject("/Filter")] = generic.NameObject("/FlateDecode")
+        return True
+
+    def close(self):
+        """Sayfa ağacını, kataloğu ve çapraz başvuru tablosunu yazıp dosyayı kapatır"""
+        if self._file is None:
+            return
+        pages = generic.DictionaryObject()
+        pages[generic.NameObject("/Type")] = generic.NameObject("/Pages")
+        pages[generic.NameObject("/Kids")] = generic.ArrayObject(generic.IndirectObject(i, 0, None) for i in self._kids)
+        pages[generic.NameObject("/Count")] = generic.NumberObject(len(self._kids))
+        self._write_object(self._PAGES_ID, pages)
+        catalog = generic.DictionaryObject()
+        catalog[generic.NameObject("/Type")] = generic.NameObject("/Catalog")
+        catalog[generic.NameObject("/Pages")] = generic.IndirectObject(self._PAGES_ID, 0, None)
+        self._write_object(self._CATALOG_ID, catalog)
+        if self.optimize:
+            self._flush_object_stream()
+        # Yarıda kalan eklemelerden kalan boş numaralar null nesneyle doldurulur
+        for obj_id, offset in enumerate(self._offsets):
+            if obj_id and offset is None:
+                self._write_object(obj_id, generic.NullObject())
+        if self.optimize:
+            self._flush_object_stream()
+            self._write_xref_stream()
+        else:
+            self._write_xref_table()
+        self._file.close()
+        self._file = None
+
+    def _write_xref_table(self):
+        xref_offset = self._file.tell()
+        self._file.write(f"xref\n0 {len(self._offsets)}\n".encode('ascii'))
+        self._file.write(b"0000000000 65535 f \n")
+        self._file.write(b"".join(f"{offset:010d} 00000 n \n".encode('ascii') for offset in self._offsets[1:]))
+        self._file.write(f"trailer\n<< /Size {len(self._offsets)} /Root {self._CATALOG_ID} 0 R >>\n"
+                         f"startxref\n{xref_offset}\n%%EOF\n".encode('ascii'))
+
+    def _write_xref_stream(self):
+        """Çapraz başvuruları (nesne akışındaki nesneler dahil) sıkıştırılmış XRef akışı olarak yazar"""
+        xref_id = self._allocate()
+        xref_offset = self._file.tell()
+        self._offsets[xref_id] = xref_offset
+        width = max(4, (xref_offset.bit_length() + 7) // 8)
+        rows = [b"\x00" + bytes(width) + b"\xff\xff"]
+        for entry in self._offsets[1:]:
+            if isinstance(entry, tuple):
+                rows.append(b"\x02" + entry[0].to_bytes(width, "big") + entry[1].to_bytes(2, "big"))
+            else:
+                rows.append(b"\x01" + entry.to_bytes(width, "big") + b"\x00\x00")
+        stream = generic.StreamObject()
+        stream._data = zlib.compress(b"".join(rows))
+        stream[generic.NameObject("/Type")] = generic.NameObject("/XRef")
+        stream[generic.NameObject("/Size")] = generic.NumberObject(len(self._offsets))
+        stream[generic.NameObject("/W")] = generic.ArrayObject([generic.NumberObject(1), generic.NumberObject(width), generic.NumberObject(2)])
+        stream[generic.NameObject("/Root")] = generic.IndirectObject(self._CATALOG_ID, 0, None)
+        stream[generic.NameObject("/Filter")] = generic.NameObject("/FlateDecode")
+        self._file.write(f"{xref_id} 0 obj\n".encode('ascii'))
+        stream.write_to_stream(self._file, None)
+        self._file.write(f"\nendobj\nstartxref\n{xref_offset}\n%%EOF\n".encode('ascii'))
+
+    def abort(self):
+        """Yazımı bırakır ve yarım çıktı dosyasını siler"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        try:
+            os.remove(self.output_path)
+        except OSError:
+            pass
+
+
+class OrderedPdfMerger:
+    """
+    Dönüştürmeler tamamlandıkça PDF'leri istenen sırayla akış halinde birleştirir.
+    Sırası henüz gelmemiş PDF'ler yeniden sıralama tamponunda (yalnızca dosya
+    yolları) bekletilir; sıradaki PDF gelince tampondaki ardışık PDF'ler de eklenir.
+    Sıra, tüm tarihler bilinince set_order ile sonradan da verilebilir.
+    """
+    def __init__(self, output_path, log_callback=None, order=None, optimize=False, cancel_token=None,
+                 on_merged=None):
+        """
+        :param optimize: Ortak nesneleri bir kez yaz, nesne akışlarıyla sıkıştır (StreamingPdfWriter)
+        :param cancel_token: Verilirse (CancelToken) iptalde her PDF'ten önce JobCancelled fırlatılır
+        :param on_merged: Verilirse her PDF çıktıya eklendikten (veya eklenemedikten) sonra
+                          pdf_path ile çağrılır; ör. ara PDF'i silmek için
+        """
+        self.writer = StreamingPdfWriter(output_path, optimize=optimize)
+        self.log_callback = log_callback
+        self.cancel_token = cancel_token
+        self.on_merged = on_merged
+        self.success_count = 0
+        self.error_count = 0
+        self._order = None
+        self._position = 0
+        self._ready = {}
+        self._lock = threading.Lock()
+        if order is not None:
+            self.set_order(order)
+
+    def log_message(self, message):
+        if self.log_callback:
+            self.log_callback(message)
+
+    def set_order(self, keys):
+        with self._lock:
+            self._order = list(keys)
+            self._drain()
+
+    def add(self, key, pdf_path):
+        """Tamamlanan bir faturayı bildirir (pdf_path None ise dönüştürülememiştir)"""
+        with self._lock:
+            self._ready[key] = pdf_path
+            self._drain()
+
+    def _drain(self):
+        if self._order is None:
+            return
+        while self._position < len(self._order) and self._order[self._position] in self._ready:
+            pdf_path = self._ready.pop(self._order[self._position])
+            self._position += 1
+            if pdf_path is None:
+                continue
+            check_cancelled(self.cancel_token)
+            try:
+                self.writer.append_pdf(pdf_path)
+                self.success_count += 1
+            except Exception as e:
+                self.log_message(f"⚠️ Birleştirme hatası: {os.path.basename(pdf_path)} - {str(e)}")
+                self.error_count += 1
+            if self.on_merged:
+                self.on_merged(pdf_path)
+
+    def close(self):
+        """Eksik kalanları atlayarak tamponu boşaltır ve çıktıyı tamamlar"""
+        with self._lock:
+            if self._order is not None:
+                missing = [key for key in self._order[self._position:] if key not in self._ready]
+                for key in missing:
+                    self._ready[key] = None
+                self._drain()
+            self.writer.close()
+
+    def abort(self):
+        with self._lock:
+            self.writer.abort()
+
+
+# ***** Ciltlere bölünmüş birleşik çıktı *****
+# Birleşik PDF'in bölünme ölçütleri: en fazla MB, en fazla sayfa veya fatura ayı
+VOLUME_MODES = ("size", "pages", "month")
+
+
+def plan_volumes(items, volume_by, limit=None):
+    """
+    Birleştirme sırasındaki faturaları ciltlere böler; sıra korunur, bir fatura
+    hiçbir zaman iki cilde bölünmez (sınırı tek başına aşan fatura kendi cildinde kalır).
+    Boyut sınırı için tek tek PDF boyutlarının toplamı kullanılır; birleşik
+    dosya ortak nesneler paylaşıldığı için bu toplamdan büyük olmaz.
+    :param items: Sıralı [(pdf yolu, tarih), ...]
+    :param volume_by: "size" (limit MB), "pages" (limit sayfa) veya "month"
+    :return: [(cilt etiketi, [pdf yolu, ...]), ...]; month kipinde etiket YYYY-AA
+    """
+    volumes = []
+    current = []
+    label = None
+    used = 0
+    max_bytes = limit * 1024 * 1024 if volume_by == "size" else None
+    for pdf_path, invoice_date in items:
+        if volume_by == "month":
+            period = invoice_period(invoice_date)
+            if current and period != label:
+                volumes.append((label, current))
+                current = []
+            label = period
+        else:
+            if volume_by == "size":
+                weight = os.path.getsize(pdf_path)
+                over = used + weight > max_bytes
+            else:
+                weight = len(PyPDF2.PdfReader(pdf_path).pages)
+                over = used + weight > limit
+            if current and over:
+                volumes.append((None, current))
+                current = []
+                used = 0
+            used += weight
+        current.append(pdf_path)
+    if current:
+        volumes.append((label, current))
+    if volume_by != "month":
+        volumes = [(f"cilt{number:02d}", paths) for number, (_, paths) in enumerate(volumes, 1)]
+    return volumes
+
+
+def write_pdf_volume(output_path, pdf_paths, optimize=False, cancel_token=None):
+    """
+    Bir cildi StreamingPdfWriter ile yazar; işçi süreçte çalışabilir. Çıktı
+    önce .tmp dosyasına yazılır, en az bir fatura eklendiyse yerine konur.
+    :param cancel_token: Aynı süreçte çalışırken iptal için CancelToken (işçi süreçler
+                         iptalde sonlandırılır, bkz. InvoiceJob._write_volumes)
+    :return: (sayfa sayısı, eklenen fatura sayısı, [(dosya adı, hata), ...], paylaşılan nesne, tasarruf bayt)
+    """
+    writer = StreamingPdfWriter(output_path + ".tmp", optimize=optimize)
+    merged = 0
+    errors = []
+    try:
+        for pdf_path in pdf_paths:
+            check_cancelled(cancel_token)
+            try:
+                writer.append_pdf(pdf_path)
+                merged += 1
+            except Exception as e:
+                errors.append((os.path.basename(pdf_path), str(e)))
+        writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+    if merged:
+        os.replace(writer.output_path, output_path)
+    else:
+        writer.abort()
+    return writer.page_count, merged, errors, writer.dedup_objects, writer.dedup_bytes
+
+
+# ***** Aşama başına havuz boyutları *****
+# Bir wkhtmltopdf sürecinin yaklaşık bellek ihtiyacı
+RENDER_PROCESS_MEMORY_BYTES = 100 * 1024 * 1024
+# Dönüştürme eşzamanlılığı ayarlayıcısının verimi ölçtüğü pencere (sn)
+RENDER_TUNE_WINDOW_SEC = 2.0
+
+
+def default_render_workers():
+    """wkhtmltopdf alt süreçleri: çekirdek başına bir süreç, biri arayüze bırakılır"""
+    return max(2, multiprocessing.cpu_count() - 1)
+
+
+def default_metadata_workers():
+    """XML/HTML tarih çıkarma GIL'e bağlıdır; birkaç iş parçacığından fazlası fayda etmez"""
+    return max(2, min(4, multiprocessing.cpu_count()))
+
+
+# ***** Dönüştürücüler: HTML -> PDF arka uçları *****
+# Tek bir dönüştürmenin (veya toplu çağrının) varsayılan süre sınırı (sn)
+RENDER_TIMEOUT_SEC = 60
+
+# Dönüştürme hata sınıfları. Yalnızca RENDER_RETRYABLE içindekiler yeniden
+# denenir; aynı girdide her seferinde tekrarlanacak hatalar hemen karantinaya alınır.
+RENDER_ERROR_LABELS = {
+    "timeout": "zaman aşımı",
+    "binary": "dönüştürücü çalıştırılamadı",
+    "input": "girdi okunamadı",
+    "options": "geçersiz seçenek",
+    "load": "sayfa yüklenemedi",
+    "network": "kaynak bulunamadı",
+    "content": "içerik dönüştürülemedi",
+    "crash": "dönüştürücü çöktü",
+    "unknown": "bilinmeyen hata",
+}
+RENDER_RETRYABLE = frozenset(["options", "load", "crash", "unknown"])
+
+# wkhtmltopdf hata çıktısındaki ifadeler ve karşılık gelen hata sınıfları (sırayla denenir)
+_WK_ERROR_PATTERNS = (
+    ("options", ("Unknown long argument", "Unknown switch", "Unknown argument", "Invalid argument")),
+    ("network", ("network error", "ContentNotFoundError", "HostNotFoundError", "ProtocolUnknownError",
+                 "ConnectionRefusedError", "UnknownNetworkError")),
+    ("load", ("Failed loading page", "Failed to load")),
+    ("crash", ("cannot connect to X server", "QXcbConnection", "Segmentation fault", "bad_alloc",
+               "Out of memory")),
+)
+
+
+class RenderError(Exception):
+    """Sınıflandırılmış dönüştürme hatası; category RENDER_ERROR_LABELS anahtarlarından biridir"""
+    def __init__(self, category, detail):
+        super().__init__(f"{RENDER_ERROR_LABELS[category]} - {detail}")
+        self.category = category
+        self.detail = detail
+
+
+def classify_wkhtmltopdf_error(exit_code, stderr):
+    """wkhtmltopdf'in çıkış kodu ve hata çıktısından hata sınıfını belirler"""
+    for category, phrases in _WK_ERROR_PATTERNS:
+        if any(phrase in stderr for phrase in phrases):
+            return category
+    # Sinyal ile sonlanma (POSIX) veya Windows istisna kodları (0xC0000005 vb.)
+    if exit_code < 0 or exit_code >= 0xC0000000:
+        return "crash"
+    return "unknown"
+
+
+def _kill_pool_processes(pool):
+    """ProcessPoolExecutor'ın işçi süreçlerini sonlandırır; havuz bozulur, bekleyen işler BrokenProcessPool alır"""
+    for process in list((getattr(pool, "_processes", None) or {}).values()):
+        try:
+            process.kill()
+        except Exception:
+            pass
+
+
+def _is_pdf_file(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read(5) == b"%PDF-"
+    except OSError:
+        return False
+
+
+class Renderer:
+    """
+    HTML -> PDF dönüştürücü arayüzü. Alt sınıflar render'ı, toplu dönüştürme
+    destekliyorsa (supports_batch) render_batch'i de uygular.
+    options ve version() PDF önbelleği anahtarına girer; arka uç veya sürümü
+    değişince önbellekteki eski PDF'ler kullanılmaz.
+    """
+    name = "renderer"
+    supports_batch = False
+
+    def __init__(self, options=None, log_callback=None, profile=None, timeout=RENDER_TIMEOUT_SEC):
+        """:param timeout: Tek dönüştürmenin süre sınırı (sn); aşılırsa dönüştürme sonlandırılır (None: sınırsız)"""
+        self.options = dict(options or {})
+        self.log_callback = log_callback
+        # Verilirse yeniden deneme ve hata sayıları bu RunProfile'a yazılır
+        self.profile = profile
+        self.timeout = timeout or None
+        # Verilirse (CancelToken) iptalde çalışan dönüştürme sonlandırılır ve JobCancelled fırlatılır
+        self.cancel_token = None
+        # Dönüştürülemeyen girdiler: [{"file", "category", "error"}, ...]
+        self.quarantine = []
+        self._quarantine_lock = threading.Lock()
+
+    def log_message(self, message):
+        if self.log_callback:
+            self.log_callback(message)
+
+    def count(self, name, amount=1):
+        if self.profile:
+            self.profile.count(name, amount)
+
+    def version(self):
+        """Önbellek anahtarının parçası olan sürüm metni"""
+        return self.name
+
+    def add_to_quarantine(self, html_path, error):
+        """Dönüştürülemeyen girdiyi hata sınıfıyla karantina listesine ekler"""
+        with self._quarantine_lock:
+            self.quarantine.append({
+                "file": os.path.basename(html_path),
+                "category": error.category,
+                "error": error.detail[:500],
+            })
+        self.count("render_failures")
+        self.count(f"render_failures_{error.category}")
+
+    def render(self, html_path, output_path):
+        """
+        Tek bir HTML dosyasını PDF'e dönüştürür.
+        :return: (başarılı mı, hata mesajı)
+        """
+        raise NotImplementedError
+
+    def render_batch(self, html_paths, output_paths):
+        """
+        Birden fazla HTML dosyasını tek seferde dönüştürür, her girdi için ayrı PDF yazar.
+        :return: (başarılı mı, hata mesajı)
+        """
+        return False, f"{self.name} toplu dönüştürmeyi desteklemiyor"
+
+
+class WkhtmltopdfRenderer(Renderer):
+    """Her fatura (veya fatura grubu) için wkhtmltopdf alt süreci çalıştırır (pdfkit ile)"""
+    name = "wkhtmltopdf"
+    supports_batch = True
+
+    # İlk deneme seçeneklerle ilgili bir hatayla başarısız olursa kullanılan sade seçenekler
+    SIMPLIFIED_OPTIONS = {"enable-local-file-access": ""}
+
+    def __init__(self, config, options=None, log_callback=None, profile=None, timeout=RENDER_TIMEOUT_SEC):
+        """:param config: find_wkhtmltopdf'in döndürdüğü pdfkit yapılandırması"""
+        super().__init__(options, log_callback, profile, timeout)
+        self.config = config
+
+    def version(self):
+        return wkhtmltopdf_version(self.config.wkhtmltopdf)
+
+    def _run(self, html_input, output_path, options, use_stdin=False):
+        """
+        wkhtmltopdf'i çalıştırır. Süre sınırı aşılırsa süreç sonlandırılır.
+        Yalnızca eksik kaynak (resim vb.) nedeniyle hata kodu verip yine de PDF
+        yazdıysa çıktı kabul edilir. İş iptal edilirse süreç hemen sonlandırılır.
+        :param html_input: HTML dosya yolu veya yolları listesi
+        :return: Kabul edilen eksik kaynak uyarısı veya None
+        :raises RenderError: Dönüştürülemezse
+        :raises JobCancelled: İş iptal edildiyse
+        """
+        check_cancelled(self.cancel_token)
+        try:
+            if use_stdin:
+                with open(html_input, 'r', encoding='utf-8', errors='ignore') as f:
+                    html_content = f.read()
+                kit = pdfkit.PDFKit(html_content, 'string', options=options, configuration=self.config)
+                stdin = html_content.encode('utf-8')
+            else:
+                kit = pdfkit.PDFKit(html_input, 'file', options=options, configuration=self.config)
+                stdin = None
+        except (IOError, OSError) as e:
+            raise RenderError("input", str(e))
+        args = kit.command(output_path)
+        popen_kwargs = {}
+        if sys.platform == 'win32':
+            # Konsol penceresi açılmasın
+            startupinfo = subprocess.STARTUPINFO()
+            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+            startupinfo.wShowWindow = subprocess.SW_HIDE
+            popen_kwargs["startupinfo"] = startupinfo
+        try:
+            process = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                       stderr=subprocess.PIPE, env=kit.environ, **popen_kwargs)
+        except OSError as e:
+            raise RenderError("binary", str(e))
+        kill = process.kill
+        if self.cancel_token is not None:
+            self.cancel_token.add_callback(kill)
+        try:
+            stdout, stderr = process.communicate(input=stdin, timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            self.count("render_timeouts")
+            raise RenderError("timeout", f"wkhtmltopdf {self.timeout:g} sn içinde bitmedi, sonlandırıldı")
+        finally:
+            if self.cancel_token is not None:
+                self.cancel_token.remove_callback(kill)
+        # İptalde sonlandırılan süreç çökmüş gibi görünür; karantinaya alınmaz
+        check_cancelled(self.cancel_token)
+        stderr = (stderr or stdout or b"").decode('utf-8', errors='replace').strip()
+        if process.returncode == 0 and _is_pdf_file(output_path):
+            return None
+        category = classify_wkhtmltopdf_error(process.returncode, stderr) if process.returncode else "unknown"
+        if category == "network" and _is_pdf_file(output_path):
+            self.count("render_missing_resources")
+            return stderr.splitlines()[-1] if stderr else "eksik kaynak"
+        raise RenderError(category, stderr or f"wkhtmltopdf {process.returncode} koduyla çıktı")
+
+    def render(self, html_path, output_path):
+        """
+        HTML dosyasını PDF'e dönüştürür. Yeniden denenebilir hatalarda alternatif
+        yöntemler denenir: seçenek hatasında sade seçenekler, sayfa yüklenemezse
+        HTML'in stdin'den verilmesi (ör. yolda sorunlu karakterler). Zaman aşımı,
+        eksik kaynak ve girdi hataları yeniden denenmez, girdi karantinaya alınır.
+        """
+        base_name = os.path.basename(html_path)
+        attempts = (
+            (self.options, False, "İlk deneme"),
+            (self.SIMPLIFIED_OPTIONS, False, "Alternatif dönüştürme"),
+            (self.SIMPLIFIED_OPTIONS, True, "Son deneme"),
+        )
+        step = 0
+        while True:
+            options, use_stdin, _ = attempts[step]
+            try:
+                warning = self._run(html_path, output_path, options, use_stdin)
+                if warning:
+                    self.log_message(f"⚠️ Eksik kaynakla dönüştürüldü: {base_name} - {warning}")
+                return True, ""
+            except RenderError as e:
+                error = e
+            next_step = None
+            if error.category in RENDER_RETRYABLE and step + 1 < len(attempts):
+                # Sayfa yüklenemiyorsa seçenekleri sadeleştirmek işe yaramaz, doğrudan stdin denenir
+                next_step = len(attempts) - 1 if error.category == "load" else step + 1
+            if next_step is None:
+                self.log_message(f"✗ Dönüştürülemedi, karantinaya alındı: {base_name} - {str(error)}")
+                self.add_to_quarantine(html_path, error)
+                return False, str(error)
+            self.log_message(f"⚠️ {attempts[step][2]} başarısız: {base_name} - {str(error)}")
+            self.log_message(f"{attempts[next_step][2]} deneniyor: {base_name}")
+            self.count("render_retries")
+            step = next_step
+
+    def render_batch(self, html_paths, output_paths):
+        """
+        Birden fazla HTML dosyasını tek wkhtmltopdf çağrısıyla dönüştürür ve
+        sonucu her fatura için ayrı PDF'lere böler. Böylece her faturada
+        wkhtmltopdf'in açılış ve Qt/WebKit hazırlık maliyeti ödenmez.
+        Her girdinin başladığı sayfa, --dump-outline ile yazılan ana hattaki
+        belge düzeyindeki öğelerden okunur.
+        :return: (başarılı mı, hata mesajı)
+        """
+        batch_path = os.path.splitext(output_paths[0])[0] + "_toplu.pdf"
+        outline_path = batch_path + ".outline.xml"
+        options = dict(self.options)
+        options["dump-outline"] = outline_path
+        try:
+            # Toplu çağrı da tek fatura süre sınırına tabidir; aşarsa faturalar
+            # tek tek, her biri kendi süre sınırıyla yeniden dönüştürülür
+            self._run(list(html_paths), batch_path, options)
+            reader = PyPDF2.PdfReader(batch_path)
+            total_pages = len(reader.pages)
+            page_ranges = self._read_batch_page_ranges(outline_path, len(html_paths), total_pages)
+            for output_path, (first, last) in zip(output_paths, page_ranges):
+                writer = PyPDF2.PdfWriter()
+                for page_no in range(first, last):
+                    writer.add_page(reader.pages[page_no])
+                with open(output_path, 'wb') as f:
+                    writer.write(f)
+            return True, ""
+        except Exception as e:
+            for output_path in output_paths:
+                try:
+                    os.remove(output_path)
+                except OSError:
+                    pass
+            if isinstance(e, JobCancelled):
+                raise
+            return False, str(e)
+        finally:
+            for path in (batch_path, outline_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _read_batch_page_ranges(self, outline_path, input_count, total_pages):
+        """
+        wkhtmltopdf ana hat dökümünden her girdinin [ilk, son) sayfa aralığını çıkarır.
+        Döküm girdi sayısıyla tutarlı değilse ValueError fırlatır.
+        """
+        root = ET.parse(outline_path).getroot()
+        starts = [int(item.get("page", "-1")) for item in root if item.tag in (_WK_OUTLINE_NS + "item", "item")]
+        if len(starts) != input_count:
+            raise ValueError(f"Ana hatta {len(starts)} belge var, {input_count} bekleniyordu")
+        # Sayfa numaraları sürüme göre 0 veya 1'den başlayabilir
+        offset = starts[0]
+        starts = [start - offset for start in starts]
+        bounds = starts + [total_pages]
+        if any(bounds[i] >= bounds[i + 1] for i in range(input_count)):
+            raise ValueError("Ana hattaki sayfa numaraları tutarsız")
+        return [(bounds[i], bounds[i + 1]) for i in range(input_count)]
+
+
+def _xhtml2pdf_page_css(pdf_options):
+    """wkhtmltopdf sayfa seçeneklerini (boyut, kenar boşlukları) @page kuralına çevirir"""
+    margins = " ".join(pdf_options.get(f"margin-{side}", "10mm") for side in ("top", "right", "bottom", "left"))
+    return f"<style>@page {{ size: {pdf_options.get('page-size', 'A4').lower()}; margin: {margins}; }}</style>\n"
+
+
+# xhtml2pdf'in yerleşik PDF yazı tiplerinde (Helvetica, Times) ı, ş, ğ, İ gibi
+# Türkçe harfler yoktur; yerine bulunan ilk Unicode TrueType yazı tipi kullanılır
+XHTML2PDF_FONT_CANDIDATES = (
+    (os.path.join(os.environ.get('WINDIR', r'C:\Windows'), 'Fonts', 'arial.ttf'),
+     os.path.join(os.environ.get('WINDIR', r'C:\Windows'), 'Fonts', 'arialbd.ttf')),
+    ('/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf', '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf'),
+    ('/usr/share/fonts/TTF/DejaVuSans.ttf', '/usr/share/fonts/TTF/DejaVuSans-Bold.ttf'),
+    ('/usr/share/fonts/dejavu/DejaVuSans.ttf', '/usr/share/fonts/dejavu/DejaVuSans-Bold.ttf'),
+    ('/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf',
+     '/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf'),
+    ('/System/Library/Fonts/Supplemental/Arial.ttf', '/System/Library/Fonts/Supplemental/Arial Bold.ttf'),
+    ('/Library/Fonts/Arial.ttf', '/Library/Fonts/Arial Bold.ttf'),
+)
+
+
+def find_unicode_font():
+    """(normal, kalın) yazı tipi yollarını döndürür; kalını yoksa normali kullanılır, hiç yoksa (None, None)"""
+    for regular, bold in XHTML2PDF_FONT_CANDIDATES:
+        if os.path.exists(regular):
+            return regular, bold if os.path.exists(bold) else regular
+    return None, None
+
+
+def _xhtml2pdf_init(font_path=None, bold_font_path=None):
+    """
+    Havuz süreci açılırken xhtml2pdf ve reportlab bir kez yüklenir. Verilen
+    Unicode yazı tipi, xhtml2pdf'in Helvetica/Times/Arial vb. yerleşik yazı tipi
+    eşlemelerinin yerine geçer. Uyarılar sürecin standart hatasına yazılmaz;
+    dönüştürme hataları sonuçla birlikte döner.
+    """
+    import logging
+    from xhtml2pdf import default, pisa  # noqa: F401
+    logging.getLogger("xhtml2pdf").setLevel(logging.CRITICAL)
+    if not font_path:
+        return
+    from reportlab.lib.fonts import addMapping
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    pdfmetrics.registerFont(TTFont("SkubSans", font_path))
+    pdfmetrics.registerFont(TTFont("SkubSans-Bold", bold_font_path or font_path))
+    for bold, italic, name in ((0, 0, "SkubSans"), (0, 1, "SkubSans"), (1, 0, "SkubSans-Bold"), (1, 1, "SkubSans-Bold")):
+        addMapping("SkubSans", bold, italic, name)
+    for family, target in list(default.DEFAULT_FONT.items()):
+        if target.startswith(("Helvetica", "Times")):
+            default.DEFAULT_FONT[family] = "SkubSans-Bold" if "Bold" in target else "SkubSans"
+
+
+# xhtml2pdf'e reddedilen kaynak yerine verilen boş satır içi veri; resim/stil
+# yüklenemedi diye atlanır, diskten veya ağdan hiçbir şey okunmaz
+_XHTML2PDF_BLOCKED_URI = "data:,"
+
+
+def _confined_link_callback(base_dir):
+    """
+    xhtml2pdf için yalnızca base_dir altındaki göreli yolları çözen link_callback
+    döndürür. Mutlak yollar, file:// ve http(s):// gibi adresler ile klasör
+    dışına çıkan (../) yollar reddedilir; satır içi data: kaynakları olduğu gibi kalır.
+    """
+    base_dir = os.path.realpath(base_dir)
+
+    def link_callback(uri, rel):
+        if uri.startswith("data:"):
+            return uri
+        ref = unquote(uri.split('#', 1)[0].split('?', 1)[0]).strip()
+        if not ref or ':' in ref or ref.startswith(('/', '\\')):
+            return _XHTML2PDF_BLOCKED_URI
+        path = os.path.realpath(os.path.join(base_dir, ref))
+        if os.path.commonpath([base_dir, path]) != base_dir:
+            return _XHTML2PDF_BLOCKED_URI
+        return path
+    return link_callback
+
+
+def _xhtml2pdf_render(html_path, output_path, page_css):
+    """
+    xhtml2pdf havuz sürecinde çalışır. Göreli kaynaklar (logo vb.) HTML'in
+    bulunduğu klasöre göre çözülür ve yalnızca bu klasörden okunabilir
+    (_confined_link_callback); faturanın kendi @page kuralı varsa sonra geldiği
+    için varsayılan sayfa ayarını ezer.
+    :return: (hata sınıfı, hata mesajı); başarılıysa (None, "")
+    """
+    from xhtml2pdf import pisa
+    try:
+        with open(html_path, 'r', encoding='utf-8', errors='ignore') as f:
+            html_content = page_css + f.read()
+    except OSError as e:
+        return "input", str(e)
+    try:
+        with open(output_path, 'wb') as dest:
+            result = pisa.CreatePDF(html_content, dest=dest, encoding='utf-8', path=os.path.abspath(html_path),
+                                    link_callback=_confined_link_callback(os.path.dirname(os.path.abspath(html_path))))
+        if result.err:
+            raise ValueError(f"{result.err} hata")
+    except Exception as e:
+        try:
+            os.remove(output_path)
+        except OSError:
+            pass
+        return "content", str(e)
+    return None, ""
+
+
+class XhtmlToPdfRenderer(Renderer):
+    """
+    Saf Python xhtml2pdf ile dönüştürür. Her fatura için yeni süreç açılmaz;
+    dönüştürmeler, xhtml2pdf'i bir kez yüklemiş sıcak süreçlerden oluşan bir
+    havuzda çalışır. Havuz sınıf düzeyindedir, aynı süreçteki tüm işler ve
+    GUI'deki art arda çalıştırmalar onu paylaşır (shutdown_pool ile kapatılır).
+    wkhtmltopdf kadar CSS desteklemez; karmaşık düzenli faturalarda görünüm farklı olabilir.
+    """
+    name = "xhtml2pdf"
+    _pool = None
+    _pool_workers = 0
+    _pool_lock = threading.Lock()
+
+    def __init__(self, options=None, log_callback=None, profile=None, workers=None, timeout=RENDER_TIMEOUT_SEC):
+        """:raises ImportError: xhtml2pdf kurulu değilse"""
+        if importlib.util.find_spec("xhtml2pdf") is None:
+            raise ImportError("xhtml2pdf kurulu değil (pip install xhtml2pdf)")
+        super().__init__(options, log_callback, profile, timeout)
+        self.workers = workers or default_render_workers()
+        self._page_css = _xhtml2pdf_page_css(self.options)
+        if find_unicode_font()[0] is None:
+            self.log_message("⚠️ Unicode yazı tipi bulunamadı; Türkçe karakterler PDF'te boş görünebilir")
+
+    @classmethod
+    def _get_pool(cls, workers):
+        with cls._pool_lock:
+            if cls._pool is None or cls._pool_workers < workers:
+                if cls._pool is not None:
+                    cls._pool.shutdown(wait=False)
+                cls._pool = ProcessPoolExecutor(max_workers=workers, initializer=_xhtml2pdf_init,
+                                                initargs=find_unicode_font())
+                cls._pool_workers = workers
+            return cls._pool
+
+    @classmethod
+    def shutdown_pool(cls):
+        """Sıcak süreç havuzunu kapatır (sonraki dönüştürmede yeniden açılır)"""
+        with cls._pool_lock:
+            pool, cls._pool, cls._pool_workers = cls._pool, None, 0
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    def version(self):
+        try:
+            import importlib.metadata
+            return f"xhtml2pdf {importlib.metadata.version('xhtml2pdf')}"
+        except importlib.metadata.PackageNotFoundError:
+            return "xhtml2pdf bilinmiyor"
+
+    @classmethod
+    def _discard_pool(cls, pool, kill=False):
+        """
+        Bozulan veya süresi aşılan havuzu bırakır; sonraki dönüştürme yeni havuz açar.
+        kill verilirse havuzun süreçleri sonlandırılır (takılan xhtml2pdf çağrısı
+        başka türlü durdurulamaz). Aynı havuzda çalışan diğer dönüştürmeler
+        "crash" hatası alıp bir kez yeniden denenir.
+        """
+        with cls._pool_lock:
+            if cls._pool is pool:
+                cls._pool = None
+                cls._pool_workers = 0
+        if kill:
+            _kill_pool_processes(pool)
+            pool.shutdown(wait=False)
+
+    def _run(self, html_path, output_path):
+        """
+        İş iptal edilirse havuzun süreçleri sonlandırılır (bkz. _discard_pool).
+        :raises RenderError: Dönüştürülemezse
+        :raises JobCancelled: İş iptal edildiyse
+        """
+        check_cancelled(self.cancel_token)
+        pool = self._get_pool(self.workers)
+
+        def kill_pool():
+            self._discard_pool(pool, kill=True)
+
+        if self.cancel_token is not None:
+            self.cancel_token.add_callback(kill_pool)
+        try:
+            future = pool.submit(_xhtml2pdf_render, html_path, output_path, self._page_css)
+            category, error = future.result(timeout=self.timeout)
+        except FuturesTimeoutError:
+            self._discard_pool(pool, kill=True)
+            self.count("render_timeouts")
+            raise RenderError("timeout", f"xhtml2pdf {self.timeout:g} sn içinde bitmedi, sonlandırıldı")
+        except BrokenProcessPool as e:
+            self._discard_pool(pool)
+            check_cancelled(self.cancel_token)
+            raise RenderError("crash", f"Dönüştürme süreci beklenmedik şekilde sonlandı: {str(e)}")
+        except RuntimeError as e:
+            # Başka bir dönüştürmenin zaman aşımı (veya iptal) yüzünden kapatılan havuz
+            check_cancelled(self.cancel_token)
+            raise RenderError("crash", str(e))
+        finally:
+            if self.cancel_token is not None:
+                self.cancel_token.remove_callback(kill_pool)
+        if category:
+            raise RenderError(category, error)
+
+    def render(self, html_path, output_path):
+        """xhtml2pdf hataları içerikten kaynaklanır ve yeniden denenmez; çöken süreç bir kez yeniden denenir."""
+        for attempt in range(2):
+            try:
+                self._run(html_path, output_path)
+                return True, ""
+            except RenderError as e:
+                error = e
+            if error.category != "crash" or attempt:
+                break
+            self.log_message(f"⚠️ {os.path.basename(html_path)} - {str(error)}, yeniden deneniyor")
+            self.count("render_retries")
+        self.log_message(f"✗ xhtml2pdf dönüştüremedi, karantinaya alındı: {os.path.basename(html_path)} - {str(error)}")
+        self.add_to_quarantine(html_path, error)
+        return False, str(error)
+
+
+# ***** Yinelenen Fatura Ayıklama *****
+def content_digest(html_file):
+    """HTML içeriğinin SHA-256 özeti (hex); dosya okunamazsa None"""
+    try:
+        return hashlib.sha256(_read_bytes(html_file)).hexdigest()
+    except Exception:
+        return None
+
+
+class DuplicateFilter:
+    """
+    Aynı faturanın birden fazla kopyasını dönüştürmeden önce ayıklar. Bir fatura,
+    daha önce görülen bir faturayla aynı evrak numarası ve tarihe (XML'den) veya
+    bayt bayt aynı HTML içeriğine sahipse yinelenen sayılır; ilk görülen kopya
+    tutulur. Evrak numarası tarihle birlikte kullanılır, çünkü farklı
+    düzenleyiciler aynı numarayı kullanabilir. İş parçacıkları arasında paylaşılabilir.
+    """
+    def __init__(self):
+        self._seen = {}
+        self._lock = threading.Lock()
+        # (yinelenen idx, tutulan idx, neden) listesi; neden "evrak_id" veya "content"
+        self.duplicates = []
+
+    def check(self, idx, html_file, invoice_date, evrak_id, digest=None):
+        """
+        Faturayı kaydeder; yinelenen ise tutulan kopyanın idx'ini, değilse None döndürür.
+        HTML okunamazsa yalnızca evrak numarasına bakılır.
+        :param digest: Önceden hesaplanmış içerik özeti (None ise HTML okunup hesaplanır)
+        """
+        keys = []
+        if evrak_id:
+            keys.append(("evrak_id", (evrak_id, invoice_date)))
+        if digest is None:
+            digest = content_digest(html_file)
+        if digest is not None:
+            keys.append(("content", digest))
+        with self._lock:
+            for key in keys:
+                original = self._seen.get(key)
+                if original is not None:
+                    # Kopyanın diğer anahtarları da tutulan faturayı göstersin
+                    for other in keys:
+                        self._seen.setdefault(other, original)
+                    self.duplicates.append((idx, original, key[0]))
+                    return original
+            for key in keys:
+                self._seen[key] = idx
+        return None
+
+    def report(self, files_with_dates):
+        """
+        Hangi dosyanın hangisine katıldığını raporlar.
+        :param files_with_dates: idx sırasıyla [(html, tarih, evrak_id), ...]
+        """
+        return [{
+            "file": _source_path(files_with_dates[idx][0]),
+            "kept": _source_path(files_with_dates[original][0]),
+            "evrak_id": files_with_dates[idx][2],
+            "reason": reason,
+        } for idx, original, reason in sorted(self.duplicates)]
+
+
+# ***** Artımlı Eşitleme: çalıştırma manifesti *****
+# Eşitleme kipinde çıktı klasörüne yazılan manifest ve sabit adlı çıktılar
+MANIFEST_NAME = "skub_manifest.json"
+MANIFEST_VERSION = 1
+SYNC_SPLIT_FOLDER = "faturalar"
+SYNC_UNDATED_PERIOD = "tarihsiz"
+
+
+def invoice_period(invoice_date):
+    """Birleşik çıktının dönemi: fatura tarihinin ayı (YYYY-MM) veya tarihsiz"""
+    return invoice_date.strftime("%Y-%m") if invoice_date else SYNC_UNDATED_PERIOD
+
+
+class RunManifest:
+    """
+    Bir çıktı klasöründe önceki çalıştırmaların ürettiği faturaların kaydı.
+    Her kayıt evrak no, tarih, HTML içerik özeti ve faturanın nerede olduğunu
+    tutar: ayrı PDF ("file", çıktı klasörüne göre) ve/veya dönemin birleşik
+    PDF'indeki sayfa aralığı ("period", "page_start", "page_count"). Bir
+    fatura, aynı içerik özetiyle veya aynı evrak no ve tarihle kayıtlıysa ve
+    istenen çıktı türünde yeri varsa yeniden dönüştürülmez.
+    known() iş parçacıkları arasında paylaşılabilir.
+    """
+    def __init__(self, output_folder, log_callback=None):
+        self.output_folder = output_folder
+        self.path = os.path.join(output_folder, MANIFEST_NAME)
+        self.log_callback = log_callback
+        self.invoices = []
+        # Dönem -> birleşik PDF adı (çıktı klasörüne göre)
+        self.merged = {}
+        self._by_key = {}
+        self._existing = None
+        self._lock = threading.Lock()
+        self.load()
+
+    def log_message(self, message):
+        if self.log_callback:
+            self.log_callback(message)
+
+    @staticmethod
+    def _keys(entry):
+        keys = []
+        if entry.get("sha256"):
+            keys.append(("content", entry["sha256"]))
+        if entry.get("evrak_id"):
+            keys.append(("evrak_id", (entry["evrak_id"], entry.get("date"))))
+        return keys
+
+    def _index(self, entry):
+        for key in self._keys(entry):
+            self._by_key.setdefault(key, entry)
+
+    def load(self):
+        """Manifest varsa okur; bozuksa yedeğini alıp boş manifestle devam eder"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != MANIFEST_VERSION:
+                raise ValueError(f"desteklenmeyen sürüm: {data.get('version')}")
+            invoices = list(data.get("invoices", []))
+            merged = dict(data.get("merged", {}))
+        except Exception as e:
+            backup = self.path + ".bozuk"
+            self.log_message(f"⚠️ Manifest okunamadı, tüm faturalar yeniden üretilecek ({str(e)}). "
+                             f"Eski manifest: {os.path.basename(backup)}")
+            try:
+                os.replace(self.path, backup)
+            except OSError:
+                pass
+            return
+        self.invoices = invoices
+        self.merged = merged
+        for entry in self.invoices:
+            self._index(entry)
+
+    def find(self, evrak_id, invoice_date, digest):
+        """Faturanın kaydını (içerik özeti veya evrak no + tarih ile) bulur, yoksa None"""
+        entry = {"evrak_id": evrak_id, "date": invoice_date.date().isoformat() if invoice_date else None,
+                 "sha256": digest}
+        with self._lock:
+            for key in self._keys(entry):
+                found = self._by_key.get(key)
+                if found is not None:
+                    return found
+        return None
+
+    def known(self, evrak_id, invoice_date, digest, merged):
+        """Fatura, istenen çıktı türünde (birleşik veya ayrı) daha önce üretilmiş mi"""
+        entry = self.find(evrak_id, invoice_date, digest)
+        if entry is None:
+            return False
+        if merged:
+            name = self.merged.get(entry.get("period"))
+        else:
+            name = entry.get("file")
+        # Çıktı klasöründen silinen dosyalar yeniden üretilir
+        return bool(name) and os.path.normcase(name) in self._existing_files()
+
+    def _existing_files(self):
+        """Çıktı klasöründeki ve SYNC_SPLIT_FOLDER'daki dosyalar; klasörler yalnızca bir kez listelenir"""
+        with self._lock:
+            if self._existing is None:
+                existing = set()
+                for folder, prefix in ((self.output_folder, ""), (os.path.join(self.output_folder, SYNC_SPLIT_FOLDER),
+                                                                  f"{SYNC_SPLIT_FOLDER}/")):
+                    try:
+                        existing.update(os.path.normcase(prefix + name) for name in os.listdir(folder))
+                    except OSError:
+                        pass
+                self._existing = existing
+            return self._existing
+
+    def add(self, evrak_id, invoice_date, digest, **fields):
+        """
+        Yeni üretilen faturayı kaydeder ve kaydı döndürür. Fatura diğer çıktı
+        türünde zaten kayıtlıysa o kayıt güncellenir.
+        """
+        entry = self.find(evrak_id, invoice_date, digest)
+        with self._lock:
+            if entry is None:
+                entry = {"evrak_id": evrak_id, "date": invoice_date.date().isoformat() if invoice_date else None,
+                         "sha256": digest}
+                self.invoices.append(entry)
+            entry.update(fields)
+            self._index(entry)
+        return entry
+
+    def period_entries(self, period):
+        """Dönemin birleşik PDF'indeki kayıtlar, sayfa sırasıyla"""
+        return sorted((entry for entry in self.invoices if entry.get("period") == period),
+                      key=lambda entry: entry.get("page_start", 0))
+
+    @staticmethod
+    def drop_from_period(entry):
+        """Kaydı birleşik PDF'ten çıkarır; fatura sonraki çalıştırmada yeniden üretilir"""
+        for key in ("period", "page_start", "page_count"):
+            entry.pop(key, None)
+
+    def save(self):
+        """Manifesti geçici dosyaya yazıp atomik olarak yerine koyar"""
+        os.makedirs(self.output_folder, exist_ok=True)
+        data = {
+            "version": MANIFEST_VERSION,
+            "updated_at": datetime.now().isoformat(timespec="seconds"),
+            "invoices": self.invoices,
+            "merged": self.merged,
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+
+# ***** XML'den HTML üretme: gömülü XSLT *****
+# Bellekte tutulacak en fazla derlenmiş görüntü şablonu sayısı
+XSLT_CACHE_SIZE = 64
+# Gömülü ekin görüntü şablonu sayıldığı dosya uzantıları
+_XSLT_EXTENSIONS = ('.xslt', '.xsl')
+_XML_INVOICE_TAG = f"{{{UBL_NAMESPACES['ubl']}}}Invoice"
+_XML_EMBEDDED_OBJECT_TAG = f"{{{UBL_NAMESPACES['cbc']}}}EmbeddedDocumentBinaryObject"
+_XML_DOCUMENT_TYPE_TAG = f"{{{UBL_NAMESPACES['cbc']}}}DocumentType"
+
+
+def xslt_available():
+    """XML'den HTML üretmek için gereken lxml kurulu mu"""
+    return importlib.util.find_spec("lxml") is not None
+
+
+def _lxml_parser():
+    """Arşivden gelen XML/XSLT için dış varlık ve ağ erişimi kapalı ayrıştırıcı"""
+    return lxml_etree.XMLParser(resolve_entities=False, no_network=True, huge_tree=True)
+
+
+def is_ubl_invoice(xml_file):
+    """XML'in kök elemanı UBL faturası (Invoice) mı? Yalnızca dosyanın başı okunur."""
+    try:
+        with _open_binary(xml_file) as f:
+            for _, elem in ET.iterparse(f, events=("start",)):
+                return elem.tag == _XML_INVOICE_TAG
+    except Exception:
+        pass
+    return False
+
+
+def find_embedded_xslt(root):
+    """
+    UBL faturasının ekleri (cac:AdditionalDocumentReference) arasındaki
+    görüntü şablonunu bulur: dosya adı .xslt/.xsl ile biten veya belge türü
+    XSLT olan ilk gömülü ek.
+    :param root: lxml ile ayrıştırılmış faturanın kök elemanı
+    :return: Base64'ten çözülmüş XSLT baytları veya None
+    """
+    for obj in root.iter(_XML_EMBEDDED_OBJECT_TAG):
+        filename = (obj.get("filename") or "").lower()
+        # cac:AdditionalDocumentReference / cac:Attachment / cbc:EmbeddedDocumentBinaryObject
+        attachment = obj.getparent()
+        reference = attachment.getparent() if attachment is not None else None
+        doc_type = reference.findtext(_XML_DOCUMENT_TYPE_TAG) if reference is not None else None
+        if filename.endswith(_XSLT_EXTENSIONS) or (doc_type or "").strip().upper() == "XSLT":
+            try:
+                return base64.b64decode(obj.text or "")
+            except ValueError:
+                continue
+    return None
+
+
+def xml_only_html_path(xml_file):
+    """
+    Yalnızca XML'i olan fatura için üretilecek HTML'in yolu: ZIP üyelerinde
+    arşivin çıkarma klasöründe üyenin kendi yolu, disk dosyalarında XML'in yanı.
+    """
+    base = os.path.splitext(_source_name(xml_file))[0]
+    if isinstance(xml_file, ZipMember):
+        parts = [part for part in posixpath.dirname(xml_file.info.filename).split('/')
+                 if part not in ('', '.', '..')]
+        return os.path.join(xml_file.archive_root, *parts, base + ".html")
+    return os.path.join(os.path.dirname(xml_file), base + ".html")
+
+
+class XsltCache:
+    """
+    Derlenmiş görüntü şablonlarını (lxml XSLT) içerik özetine (SHA-256) göre
+    tutar. Aynı düzenleyicinin faturaları genellikle aynı şablonu taşır; şablon
+    bir kez derlenir ve derlenmiş dönüşüm tüm iş parçacıklarınca paylaşılır.
+    Derlenemeyen şablonlar da hatalarıyla saklanır, her faturada yeniden
+    denenmez. En fazla max_entries şablon tutulur, en eski kullanılan çıkarılır.
+    Derleme önbellek kilidi dışında, şablon başına ayrı bir kilitle yapılır: büyük
+    bir şablon derlenirken diğer şablonları isteyen iş parçacıkları beklemez,
+    aynı şablonu isteyenler ise derlemenin bitmesini bekleyip sonucu paylaşır.
+    Şablonlar arşivden geldiği için dönüşümde dosya ve ağ erişimi kapalıdır.
+    """
+    def __init__(self, max_entries=XSLT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.compiles = 0
+        self._entries = OrderedDict()
+        self._compiling = {}
+        self._lock = threading.Lock()
+
+    def _lookup(self, key):
+        """Önbellek kilidi tutulurken çağrılır; bulunursa girdiyi döndürür ve isabet sayar"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return entry
+
+    def get(self, xslt_bytes):
+        """
+        :return: (derlenmiş dönüşüm, önbellekten mi geldi)
+        :raises ValueError: Şablon derlenemezse
+        """
+        key = hashlib.sha256(xslt_bytes).digest()
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                compile_lock = self._compiling.setdefault(key, threading.Lock())
+        hit = entry is not None
+        if not hit:
+            with compile_lock:
+                with self._lock:
+                    # Aynı şablonu derleyen iş parçacığı beklenirken bitirmiş olabilir
+                    entry = self._lookup(key)
+                hit = entry is not None
+                if not hit:
+                    try:
+                        entry = (lxml_etree.XSLT(lxml_etree.fromstring(xslt_bytes, _lxml_parser()),
+                                                 access_control=lxml_etree.XSLTAccessControl.DENY_ALL), None)
+                    except Exception as e:
+                        entry = (None, str(e) or type(e).__name__)
+                    with self._lock:
+                        self.compiles += 1
+                        self._entries[key] = entry
+                        while len(self._entries) > self.max_entries:
+                            self._entries.popitem(last=False)
+                        self._compiling.pop(key, None)
+        transform, error = entry
+        if transform is None:
+            raise ValueError(f"Görüntü şablonu derlenemedi: {error}")
+        return transform, hit
+
+
+# Aynı süreçteki tüm işler (BatchEngine, GUI'deki art arda çalıştırmalar) paylaşır
+XSLT_CACHE = XsltCache()
+
+
+# ***** İş Mantığı Sınıfı: InvoiceProcessor *****
+class InvoiceProcessor:
+    def __init__(self, log_callback):
+        """
+        :param log_callback: Anlık durumu ekrana yazdırmak için kullanılan fonksiyon.
+        """
+        self.log_callback = log_callback
+        # Her aşamanın iş yüküne göre ayrı havuz boyutu kullanılır
+        self.max_workers = default_render_workers()
+        self.metadata_workers = default_metadata_workers()
+        # HTML metni BeautifulSoup ağacı kurulmadan çıkarılır (False: bs4 ile)
+        self.fast_html_text = True
+        # Verilirse yeniden deneme sayıları bu RunProfile'a yazılır
+        self.profile = None
+        # Verilirse (CancelToken) aşamalar iptalde JobCancelled fırlatarak durur
+        self.cancel_token = None
+        # HTML ikizi olmayan UBL faturaları gömülü XSLT ile HTML'e çevrilip dönüştürülür
+        self.xml_only = True
+        self.xslt_cache = XSLT_CACHE
+
+    def log_message(self, message):
+        """
+        Mesajı sadece arayüze (GUI) gönderir.
+        Diske kayıt yapmaz, konsola basmaz.
+        """
+        if self.log_callback:
+            self.log_callback(message)
+
+    def extract_xml_metadata(self, xml_file):
+        """
+        XML dosyasından fatura tarihini ve evrak ID'sini tek geçişte çıkarır.
+        Dosya iterparse ile akış halinde okunur, işlenen elemanlar bellekten
+        silinir; IssueDate ve ilk cbc:ID bulunduğu anda okuma durdurulur.
+        Böylece dosyanın sonundaki büyük base64 ekler hiç ayrıştırılmaz.
+        :return: XmlMetadata(issue_date, evrak_id)
+        """
+        issue_date = None
+        fallback_dates = {}
+        id_text = None
+        id_found = False
+        try:
+            with _open_binary(xml_file) as f:
+                depth = 0
+                root = None
+                for event, elem in ET.iterparse(f, events=("start", "end")):
+                    if event == "start":
+                        if root is None:
+                            root = elem
+                        depth += 1
+                        continue
+                    depth -= 1
+                    tag = elem.tag
+                    if tag == _XML_ID_TAG:
+                        if not id_found:
+                            id_found = True
+                            id_text = elem.text
+                    elif tag in _XML_ISSUE_DATE_TAGS:
+                        if issue_date is None and elem.text:
+                            issue_date = elem.text
+                    elif tag in _XML_FALLBACK_DATE_TAGS:
+                        if elem.text and tag not in fallback_dates:
+                            fallback_dates[tag] = elem.text
+                    if issue_date is not None and id_found:
+                        break
+                    # Kök dışındaki işlenmiş elemanları bellekten at
+                    elem.clear()
+                    if depth == 1:
+                        del root[:]
+        except Exception as e:
+            self.log_message(f"XML işleme hatası: {_source_name(xml_file)} - {str(e)}")
+
+        if issue_date is None:
+            for tag in _XML_FALLBACK_DATE_TAGS:
+                if tag in fallback_dates:
+                    issue_date = fallback_dates[tag]
+                    break
+
+        if issue_date is None:
+            self.log_message(f"XML'de tarih bulunamadı: {_source_name(xml_file)}")
+            date_obj = None
+        else:
+            date_obj = self._parse_xml_date(issue_date)
+
+        evrak_id = None
+        if id_text is not None:
+            evrak_id = id_text.strip()
+            if len(evrak_id) == 16:
+                self.log_message(f"Evrak ID bulundu: {evrak_id}")
+            else:
+                self.log_message(f"Evrak ID uygun formatta değil: {evrak_id}")
+                evrak_id = None
+        elif not id_found:
+            self.log_message("XML'de Evrak ID bulunamadı.")
+
+        return XmlMetadata(date_obj, evrak_id)
+
+    def _parse_xml_date(self, issue_date):
+        """XML'deki tarih metnini datetime nesnesine çevirir"""
+        try:
+            if "-" in issue_date:
+                date_obj = datetime.strptime(issue_date, "%Y-%m-%d")
+            elif "." in issue_date:
+                date_obj = datetime.strptime(issue_date, "%d.%m.%Y")
+            else:
+                self.log_message(f"Geçersiz tarih formatı: {issue_date}")
+                return None
+            # Başarılı işlem logu (ekrana bilgi için)
+            self.log_message(f"✓ XML'den fatura tarihi: {date_obj.strftime('%d.%m.%Y')}")
+            return date_obj
+        except ValueError as e:
+            self.log_message(f"Tarih ayrıştırma hatası: {str(e)}")
+            return None
+
+    def extract_invoice_dates(self, html_file):
+        """HTML dosyasından fatura tarihini çıkarır"""
+        try:
+            content = _read_text(html_file)
+            if self.fast_html_text:
+                text_content = html_to_text(content)
+            else:
+                try:
+                    soup = bs4.BeautifulSoup(content, 'html.parser')
+                    text_content = soup.get_text()
+                except Exception as e:
+                    self.log_message(f"HTML parse hatası: {str(e)}. Düz metin olarak devam ediliyor.")
+                    text_content = content
+
+            # Tek geçişte hem öncelikli (anahtar kelimeli) hem genel tarihler toplanır;
+            # öncelikli tarih varsa en yenisi, yoksa genel tarihlerin en yenisi döner.
+            primary_date = None
+            other_date = None
+            parsed = {}
+            reported = set()
+            for match in _DATE_SCAN_RE.finditer(text_content):
+                keyword = match.group('kw')
+                if keyword:
+                    parts = match.group('pd', 'pm', 'py')
+                else:
+                    if primary_date is not None:
+                        continue
+                    parts = match.group('gd', 'gm', 'gy')
+                if parts in parsed:
+                    date_obj = parsed[parts]
+                else:
+                    try:
+                        date_obj = datetime(int(parts[2]), int(parts[1]), int(parts[0]))
+                    except ValueError:
+                        date_obj = None
+                    parsed[parts] = date_obj
+                if date_obj is None:
+                    continue
+                if keyword:
+                    if date_obj not in reported:
+                        reported.add(date_obj)
+                        date_str = match.group('ps').join(parts)
+                        self.log_message(f"Öncelikli '{keyword}' bulundu: {date_str} ({_source_name(html_file)})")
+                    if primary_date is None or date_obj > primary_date:
+                        primary_date = date_obj
+                elif other_date is None or date_obj > other_date:
+                    other_date = date_obj
+
+            if primary_date:
+                return primary_date
+
+            if not other_date:
+                self.log_message(f"⚠️ Hiçbir tarih bulunamadı: {_source_name(html_file)}")
+                return None
+            return other_date
+        except Exception as e:
+            self.log_message(f"⚠️ Tarih çıkarma hatası: {_source_name(html_file)} - {str(e)}")
+            return None
+
+    def resolve_invoice_metadata(self, html_file, xml_file):
+        """
+        Tek bir faturanın tarihini ve evrak numarasını bulur. Eşleşen XML varsa
+        oradan okunur; XML yoksa veya XML'de tarih yoksa tarih HTML'den çıkarılır.
+        :return: (tarih, evrak_id)
+        """
+        base = os.path.splitext(_source_name(html_file))[0]
+        if xml_file is None:
+            self.log_message(f"⚠️ {base} için eşleşen XML bulunamadı. HTML'den tarih çıkarılıyor.")
+            return self.extract_invoice_dates(html_file), None
+        date, evrak_id = self.extract_xml_metadata(xml_file)
+        if not date:
+            self.log_message(f"⚠️ {base} için XML'de tarih bulunamadı. HTML'den çıkarılıyor.")
+            date = self.extract_invoice_dates(html_file)
+        else:
+            self.log_message(f"✓ HTML-XML eşleşmesi: {base} - Tarih: {date.strftime('%d.%m.%Y') if date else 'Bilinmiyor'}")
+        return date, evrak_id
+
+    def render_xml_to_html(self, xml_file, html_path):
+        """
+        Faturayı XML'ine gömülü görüntü şablonuyla (XSLT) HTML'e çevirip html_path'e yazar.
+        :return: Hata mesajı veya başarılıysa None
+        """
+        try:
+            root = lxml_etree.fromstring(_read_bytes(xml_file), _lxml_parser())
+            xslt_bytes = find_embedded_xslt(root)
+            if xslt_bytes is None:
+                return "XML'de gömülü görüntü şablonu (XSLT) yok"
+            transform, hit = self.xslt_cache.get(xslt_bytes)
+            if self.profile:
+                self.profile.count("xslt_cache_hits" if hit else "xslt_compiles")
+            content = bytes(transform(root))
+        except ValueError as e:
+            return str(e)
+        except Exception as e:
+            return f"{type(e).__name__}: {str(e)}"
+        if not content.strip():
+            return "Görüntü şablonu boş çıktı üretti"
+        os.makedirs(os.path.dirname(html_path), exist_ok=True)
+        with open(html_path, 'wb') as f:
+            f.write(content)
+        return None
+
+    def resolve_xml_only_invoice(self, xml_file):
+        """
+        HTML ikizi olmayan faturanın tarihini ve evrak numarasını XML'den okur,
+        görüntüsünü gömülü XSLT ile HTML olarak üretir (bkz. xml_only_html_path).
+        XML'de tarih yoksa üretilen HTML'den çıkarılır.
+        :return: (HTML yolu, tarih, evrak_id, hata); HTML üretilemezse HTML yolu
+                 yerine xml_file ve (evrak_id, hata mesajı) döner
+        """
+        check_cancelled(self.cancel_token)
+        date, evrak_id = self.extract_xml_metadata(xml_file)
+        html_path = xml_only_html_path(xml_file)
+        error = self.render_xml_to_html(xml_file, html_path)
+        if error:
+            self.log_message(f"✗ XML'den HTML üretilemedi: {_source_name(xml_file)} - {error}")
+            return xml_file, date, evrak_id, (evrak_id or "Bilinmiyor", f"XSLT dönüştürme hatası: {error}")
+        if not date:
+            date = self.extract_invoice_dates(html_path)
+        self.log_message(f"✓ XML'den HTML üretildi: {_source_name(xml_file)} - Tarih: "
+                         f"{date.strftime('%d.%m.%Y') if date else 'Bilinmiyor'}")
+        return html_path, date, evrak_id, None
+
+    def select_xml_only(self, xml_files, html_bases):
+        """
+        Aynı adlı HTML'i olmayan UBL fatura XML'lerini seçer. lxml kurulu
+        değilse veya xml_only kapalıysa boş liste döner.
+        :param html_bases: Arşivdeki HTML'lerin uzantısız adları
+        """
+        if not self.xml_only:
+            return []
+        candidates = [xml_file for xml_file in xml_files
+                      if os.path.splitext(_source_name(xml_file))[0] not in html_bases]
+        if not candidates:
+            return []
+        selected = [xml_file for xml_file in candidates if is_ubl_invoice(xml_file)]
+        if selected and not xslt_available():
+            self.log_message(f"⚠️ HTML'i olmayan {len(selected)} XML fatura dönüştürülmedi: "
+                             "lxml kurulu değil (pip install lxml)")
+            return []
+        return selected
+
+    def _pdf_path_for(self, temp_dir, idx, invoice_date):
+        """Dönüştürülen faturanın geçici klasördeki PDF yolu"""
+        if invoice_date:
+            dstr = invoice_date.strftime("%Y%m%d")
+            pdf_name = f"fatura_{dstr}_{idx+1}.pdf"
+        else:
+            pdf_name = f"fatura_tarihsiz_{idx+1}.pdf"
+        return os.path.join(temp_dir, pdf_name)
+
+    def _prepare_html(self, html_file, evrak_id):
+        """ZipMember ise diske yazar; (yol, hata) döndürür"""
+        if not isinstance(html_file, ZipMember):
+            return html_file, None
+        try:
+            return html_file.materialize(), None
+        except Exception as e:
+            self.log_message(f"✗ Dosya çıkarılamadı: {html_file.name} - {str(e)}")
+            return None, (evrak_id if evrak_id else "Bilinmiyor", f"Dosya çıkarma hatası: {str(e)}")
+
+    def _convert_one_file(self, pdf_path, html_path, invoice_date, evrak_id, renderer, cache=None, cache_key=None):
+        success, error = renderer.render(html_path, pdf_path)
+        if success:
+            if cache_key:
+                cache.put(cache_key, pdf_path)
+            return (pdf_path, invoice_date, evrak_id, None)
+        else:
+            return (None, invoice_date, evrak_id, (evrak_id if evrak_id else "Bilinmiyor", f"Dönüştürme hatası: {error}"))
+
+    def convert_batch(self, batch, temp_dir, renderer, cache=None, target_for=None):
+        """
+        Bir grup faturayı renderer (Renderer) ile dönüştürür. batch öğeleri
+        (idx, html, tarih, evrak_id) biçimindedir; önbellekte bulunanlar atlanır,
+        birden fazla fatura kalırsa ve dönüştürücü destekliyorsa tek çağrıda toplu
+        dönüştürme denenir, başarısız olursa tek tek dönüştürülür.
+        :param target_for: (idx, tarih, evrak_id) -> PDF yolu; verilirse PDF'ler geçici
+                           klasör yerine doğrudan bu yollara yazılır (ör. çıktı klasörü)
+        :return: Her öğe için (pdf_yolu, tarih, evrak_id, hata) listesi (batch sırasıyla)
+        :raises JobCancelled: İş iptal edildiyse
+        """
+        check_cancelled(self.cancel_token)
+        results = {}
+        prepared = []
+        targets = {}
+        for idx, _, invoice_date, evrak_id in batch:
+            targets[idx] = (target_for(idx, invoice_date, evrak_id) if target_for
+                            else self._pdf_path_for(temp_dir, idx, invoice_date))
+        renderer_version = renderer.version() if cache is not None else None
+        for idx, html_file, invoice_date, evrak_id in batch:
+            pdf_path = targets[idx]
+            cache_key = None
+            if cache is not None:
+                try:
+                    html_bytes = _read_bytes(html_file)
+                    cache_key = cache.make_key(html_bytes, renderer.options, renderer_version,
+                                               resource_digests(html_file, html_bytes))
+                except Exception:
+                    cache_key = None
+                if cache_key and cache.get(cache_key, pdf_path):
+                    results[idx] = (pdf_path, invoice_date, evrak_id, None)
+                    continue
+            html_path, error = self._prepare_html(html_file, evrak_id)
+            if error:
+                results[idx] = (None, invoice_date, evrak_id, error)
+            else:
+                prepared.append((idx, html_path, invoice_date, evrak_id, cache_key))
+        if len(prepared) > 1 and renderer.supports_batch:
+            success, error = renderer.render_batch(
+                [item[1] for item in prepared],
+                [targets[item[0]] for item in prepared]
+            )
+            if success:
+                for idx, _, invoice_date, evrak_id, cache_key in prepared:
+                    pdf_path = targets[idx]
+                    results[idx] = (pdf_path, invoice_date, evrak_id, None)
+                    if cache_key:
+                        cache.put(cache_key, pdf_path)
+                prepared = []
+            else:
+                self.log_message(f"⚠️ Toplu dönüştürme başarısız ({len(prepared)} fatura), tek tek deneniyor: {error}")
+                if self.profile:
+                    self.profile.count("batch_fallbacks")
+        # Toplu dönüştürülemeyenler hata kaynağı belli olsun diye tek tek dönüştürülür
+        for idx, html_path, invoice_date, evrak_id, cache_key in prepared:
+            results[idx] = self._convert_one_file(targets[idx], html_path, invoice_date, evrak_id,
+                                                  renderer, cache, cache_key)
+        if target_for:
+            # Çıktı klasöründe dönüştürülemeyen faturaların yarım dosyası kalmasın
+            for idx, (pdf_path, _, _, _) in results.items():
+                if pdf_path is None:
+                    try:
+                        os.remove(targets[idx])
+                    except OSError:
+                        pass
+        return [results[idx] for idx, _, _, _ in batch]
+
+# ***** Başsız İşlem Motoru: InvoiceJob ve BatchEngine *****
+WKHTMLTOPDF_DEFAULT_PATH = r'C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe'
+
+DEFAULT_PDF_OPTIONS = {
+    "enable-local-file-access": "",
+    "encoding": "UTF-8",
+    "page-size": "A4",
+    "margin-top": "10mm",
+    "margin-right": "10mm",
+    "margin-bottom": "10mm",
+    "margin-left": "10mm"
+}
+
+
+class RunOptions:
+    """Bir çalıştırmanın ayarları. GUI değişkenlerinden veya komut satırından doldurulur."""
+    def __init__(self, merge=True, sort_by_date=True, sort_order="asc", batch_size=1,
+                 cache_max_bytes=DEFAULT_PDF_CACHE_BYTES, cache_dir=None, wkhtmltopdf_path=None,
+                 max_workers=None, write_summary=False, report=False, cprofile=False, tracemalloc=False,
+                 metadata_workers=None, autotune_render=True, renderer="wkhtmltopdf",
+                 render_timeout=RENDER_TIMEOUT_SEC, dedup=True, archive_limits=None, sync=False, optimize_pdf=True,
+                 volume_by=None, volume_limit=None, xml_only=True, temp_budget_mb=None):
+        self.merge = merge
+        self.sort_by_date = sort_by_date
+        self.sort_order = sort_order
+        self.batch_size = batch_size
+        self.cache_max_bytes = cache_max_bytes
+        self.cache_dir = cache_dir
+        self.wkhtmltopdf_path = wkhtmltopdf_path
+        # HTML -> PDF arka ucu: RENDERERS anahtarlarından biri
+        self.renderer = renderer
+        # Tek dönüştürmenin süre sınırı (sn, 0: sınırsız); aşan dönüştürme sonlandırılır
+        self.render_timeout = render_timeout
+        # Aynı evrak no + tarihli veya aynı içerikli kopyalar dönüştürülmeden ayıklanır
+        self.dedup = dedup
+        # HTML'i olmayan UBL faturaları XML'e gömülü XSLT ile HTML'e çevrilip dönüştürülür (lxml gerekir)
+        self.xml_only = xml_only
+        # İç içe ZIP'ler dahil açılabilecek toplam boyut, dosya sayısı ve sıkıştırma oranı
+        self.archive_limits = archive_limits or ArchiveLimits()
+        # Eşitleme kipi: çıktı klasöründeki manifeste göre yalnızca yeni faturalar üretilir
+        self.sync = sync
+        # Birleşik PDF'te faturalar arası ortak yazı tipi/resim nesneleri bir kez yazılır,
+        # nesne akışlarıyla sıkıştırılır (PDF 1.5)
+        self.optimize_pdf = optimize_pdf
+        # Birleşik PDF'i ciltlere böl: VOLUME_MODES'tan biri (None: tek dosya);
+        # volume_limit size için MB, pages için sayfa sayısıdır
+        self.volume_by = volume_by
+        self.volume_limit = volume_limit
+        # Disk bütçesi kipi: geçici klasör kullanımı üst sınırı (MB, None: sınırsız). Diske
+        # yazılan HTML'ler dönüştürülünce, ara PDF'ler birleştirilince/taşınınca silinir
+        self.temp_budget_mb = temp_budget_mb
+        # max_workers dönüştürme havuzunun boyutu, autotune_render açıksa
+        # aynı anda çalışan dönüştürme sayısının üst sınırıdır
+        self.max_workers = max_workers or default_render_workers()
+        self.metadata_workers = metadata_workers or default_metadata_workers()
+        self.autotune_render = autotune_render
+        self.write_summary = write_summary
+        # Çalıştırma raporu (JSON) ve isteğe bağlı cProfile / tracemalloc ölçümü
+        self.report = report
+        self.cprofile = cprofile
+        self.tracemalloc = tracemalloc
+
+
+def find_wkhtmltopdf(path=None, log_callback=None):
+    """
+    wkhtmltopdf için pdfkit yapılandırmasını döndürür. Sırasıyla verilen yol,
+    varsayılan kurulum klasörü ve sistem yolu denenir.
+    :raises IOError: wkhtmltopdf bulunamazsa
+    """
+    for candidate in (path, WKHTMLTOPDF_DEFAULT_PATH):
+        if candidate and os.path.exists(candidate):
+            if log_callback:
+                log_callback(f"wkhtmltopdf bulundu: {candidate}")
+            return pdfkit.configuration(wkhtmltopdf=candidate)
+    if log_callback:
+        log_callback("wkhtmltopdf bulunamadı. Sistem yolunu kontrol etme...")
+    config = pdfkit.configuration()
+    if log_callback:
+        log_callback("wkhtmltopdf sistem yolunda bulundu.")
+    return config
+
+
+# Seçilebilen dönüştürücüler (RunOptions.renderer, --renderer)
+RENDERERS = ("wkhtmltopdf", "xhtml2pdf")
+
+
+def create_renderer(options, config=None, log_callback=None, profile=None):
+    """
+    RunOptions.renderer'a göre dönüştürücüyü oluşturur. wkhtmltopdf için config
+    verilmezse find_wkhtmltopdf ile aranır.
+    :raises IOError: wkhtmltopdf bulunamazsa
+    :raises ImportError: xhtml2pdf kurulu değilse
+    :raises ValueError: Bilinmeyen dönüştürücü adında
+    """
+    if options.renderer == "wkhtmltopdf":
+        if config is None:
+            config = find_wkhtmltopdf(options.wkhtmltopdf_path, log_callback)
+        return WkhtmltopdfRenderer(config, DEFAULT_PDF_OPTIONS, log_callback, profile, timeout=options.render_timeout)
+    if options.renderer == "xhtml2pdf":
+        return XhtmlToPdfRenderer(DEFAULT_PDF_OPTIONS, log_callback, profile, workers=options.max_workers,
+                                  timeout=options.render_timeout)
+    raise ValueError(f"Bilinmeyen dönüştürücü: {options.renderer}")
+
+
+class RenderAutotuner:
+    """
+    Aynı anda çalışan dönüştürme sayısını sınırlar ve autotune=True ise bu sınırı
+    çalışma sırasında ayarlar. Her RENDER_TUNE_WINDOW_SEC saniyelik pencerede
+    tamamlanan fatura sayısından verim hesaplanır: verim arttıkça sınır birer
+    birer yükseltilir, verim düşünce veya boş bellek bir wkhtmltopdf sürecine
+    yetmeyecek kadar azalınca düşürülür. Dönüştürmeler işin kendisi yüzünden
+    değil de girdi beklediği için yavaşsa (yuvalar dolmuyorsa) sınır değişmez.
+    Birden çok iş aynı havuzu paylaşıyorsa aynı ayarlayıcıyı da paylaşır.
+    """
+    def __init__(self, max_workers, min_workers=1, autotune=True, log_callback=None,
+                 window_sec=RENDER_TUNE_WINDOW_SEC, memory_per_render=RENDER_PROCESS_MEMORY_BYTES):
+        self.max_workers = max(1, max_workers)
+        self.min_workers = max(1, min(min_workers, self.max_workers))
+        self.autotune = autotune
+        self.log_callback = log_callback
+        self.window_sec = window_sec
+        self.memory_per_render = memory_per_render
+        if autotune:
+            # Yavaş başlanır; bellek daha azına yetiyorsa oradan başlanır
+            initial = min(self.max_workers, 2)
+            available = available_memory_bytes()
+            if available is not None:
+                initial = min(initial, max(1, available // memory_per_render))
+            self.limit = max(self.min_workers, initial)
+        else:
+            self.limit = self.max_workers
+        self.initial = self.limit
+        self.peak = self.limit
+        self.changes = []
+        self._active = 0
+        self._best = {}
+        self._last_throughput = None
+        self._condition = threading.Condition()
+        self._window_start = time.perf_counter()
+        self._window_done = 0
+        self._saturated_since = None
+        self._saturated_time = 0.0
+
+    def log_message(self, message):
+        if self.log_callback:
+            self.log_callback(message)
+
+    def acquire(self, stop_event=None):
+        """Bir dönüştürme yuvası bekler; stop_event kurulursa False döner"""
+        with self._condition:
+            while self._active >= self.limit:
+                if stop_event is not None and stop_event.is_set():
+                    return False
+                self._condition.wait(0.1)
+            self._active += 1
+            if self._active >= self.limit and self._saturated_since is None:
+                self._saturated_since = time.perf_counter()
+            return True
+
+    def release(self, completed=1):
+        """Bir dönüştürme yuvasını bırakır; completed, tamamlanan fatura sayısıdır"""
+        with self._condition:
+            now = time.perf_counter()
+            if self._saturated_since is not None:
+                self._saturated_time += now - self._saturated_since
+                self._saturated_since = None
+            self._active -= 1
+            self._window_done += completed
+            if self.autotune and now - self._window_start >= self.window_sec:
+                self._tune(now)
+            self._condition.notify_all()
+
+    def _tune(self, now):
+        elapsed = now - self._window_start
+        throughput = self._window_done / elapsed
+        saturated = self._saturated_time / elapsed
+        self._window_start = now
+        self._window_done = 0
+        self._saturated_time = 0.0
+        if self._active >= self.limit:
+            self._saturated_since = now
+
+        available = available_memory_bytes()
+        old_limit = self.limit
+        reason = None
+        if available is not None and available < self.memory_per_render and self.limit > self.min_workers:
+            self.limit -= 1
+            reason = f"boş bellek az ({available // (1024 * 1024)} MB)"
+        elif saturated < 0.5:
+            # Yuvalar çoğunlukla boştaydı; verim eşzamanlılıkla değil girdiyle sınırlı
+            return
+        else:
+            self._best[self.limit] = max(self._best.get(self.limit, 0.0), throughput)
+            last = self._last_throughput
+            next_best = self._best.get(self.limit + 1)
+            room = available is None or available >= 2 * self.memory_per_render
+            if (last is None or throughput > last * 1.05) and self.limit < self.max_workers and room \
+                    and (next_best is None or next_best > throughput * 1.05):
+                self.limit += 1
+                reason = f"verim {throughput:.1f} fatura/sn"
+            elif last is not None and throughput < last * 0.9 and self.limit > self.min_workers:
+                self.limit -= 1
+                reason = f"verim düştü ({last:.1f} → {throughput:.1f} fatura/sn)"
+            self._last_throughput = throughput
+        if self.limit != old_limit:
+            self.peak = max(self.peak, self.limit)
+            if len(self.changes) < 100:
+                self.changes.append({"limit": self.limit, "reason": reason})
+            self.log_message(f"Dönüştürme eşzamanlılığı {old_limit} → {self.limit}: {reason}")
+
+    def summary(self):
+        with self._condition:
+            return {
+                "autotune": self.autotune,
+                "min": self.min_workers,
+                "max": self.max_workers,
+                "initial": self.initial,
+                "final": self.limit,
+                "peak": self.peak,
+                "changes": list(self.changes),
+            }
+
+
+# ***** İlerleme Bildirimi: tamamlanan faturalara göre hız ve kalan süre *****
+# Hız (fatura/sn) üstel hareketli ortalamasının yarılanma süresi (sn)
+PROGRESS_HALF_LIFE_SEC = 10.0
+# Başsız modda aynı işin ilerleme satırları arasındaki en kısa süre (sn)
+PROGRESS_LOG_INTERVAL_SEC = 5.0
+
+
+class ProgressTracker:
+    """
+    Bir çalıştırmanın dönüştürme ilerlemesi. Çubuk, fatura dönüştürmeye
+    başladığında değil bittiğinde ilerler: hat dönüştürmeye giren faturaları
+    started(), bitenleri finished() ile bildirir. Hız (fatura/sn) tamamlanmalardan
+    zaman ağırlıklı üstel hareketli ortalamayla hesaplanır; yinelenen veya önceden
+    üretilmiş faturalar (skipped) hıza katılmaz ama kalan işten düşülür.
+
+    Gözlemciler add_observer ile kaydolur ve her değişiklikte snapshot() sözlüğüyle
+    çağrılır; çağrılar sıralıdır ama dönüştürme iş parçacıklarından gelir, bu
+    yüzden gözlemci hızlı dönmeli (arayüz yalnızca son durumu saklar).
+    """
+    def __init__(self, half_life_sec=PROGRESS_HALF_LIFE_SEC):
+        self.half_life_sec = half_life_sec
+        self.total = None
+        self.done = 0
+        self.failed = 0
+        self.skipped = 0
+        self.in_flight = 0
+        self.rate = None
+        self._started_at = None
+        self._last_at = None
+        self._rendered = 0
+        self._pending = 0
+        self._observers = []
+        self._lock = threading.Lock()
+        self._notify_lock = threading.Lock()
+
+    def add_observer(self, observer):
+        """observer(snapshot) her ilerlemede çağrılır"""
+        with self._lock:
+            self._observers.append(observer)
+
+    def remove_observer(self, observer):
+        with self._lock:
+            if observer in self._observers:
+                self._observers.remove(observer)
+
+    def set_total(self, total):
+        """Toplam fatura sayısı (tarama bitince belli olur; o zamana kadar kalan süre yoktur)"""
+        with self._lock:
+            self.total = total
+        self._notify()
+
+    def started(self, count=1):
+        with self._lock:
+            now = time.monotonic()
+            if self._started_at is None:
+                self._started_at = self._last_at = now
+            self.in_flight += count
+        self._notify()
+
+    def finished(self, done=0, failed=0, skipped=0, started=True):
+        """
+        Tamamlanan faturaları bildirir.
+        :param started: Faturalar started() ile bildirilmiş mi (dönüştürülmeden sonuçlanan
+                        faturalar için False; yürüyenlerden düşülmez, hıza katılmaz)
+        """
+        with self._lock:
+            self.done += done
+            self.failed += failed
+            self.skipped += skipped
+            if started:
+                count = done + failed
+                self.in_flight -= count
+                self._update_rate(count, time.monotonic())
+        self._notify()
+
+    def _update_rate(self, count, now):
+        self._rendered += count
+        since_start = now - self._started_at
+        if since_start <= 0:
+            return
+        if self.rate is None or since_start < self.half_life_sec:
+            # İlk yarılanma süresinde ortalama, ilk dönüştürmenin başından beri ölçülür;
+            # aynı anda başlayan işçilerin ilk tamamlanmaları hızı yanıltmaz
+            self.rate = self._rendered / since_start
+            self._last_at = now
+            return
+        count += self._pending
+        elapsed = now - self._last_at
+        if elapsed <= 0:
+            # Aynı anda biten faturalar bir sonraki tamamlanmayla birlikte sayılır
+            self._pending = count
+            return
+        self._pending = 0
+        # Zaman ağırlıklı ortalama: uzun aralıklar eski hızı daha çok unutturur
+        weight = 1 - 0.5 ** (elapsed / self.half_life_sec)
+        self.rate = weight * (count / elapsed) + (1 - weight) * self.rate
+        self._last_at = now
+
+    def snapshot(self):
+        """
+        :return: {"total", "done", "failed", "skipped", "in_flight", "completed",
+                  "fraction", "rate", "eta_sec", "elapsed_sec"} sözlüğü; toplam veya hız
+                  henüz belli değilse fraction, rate ve eta_sec None olur
+        """
+        with self._lock:
+            now = time.monotonic()
+            completed = self.done + self.failed + self.skipped
+            rate = self.rate
+            if rate and self._last_at is not None:
+                # Beklenenden uzun süredir tamamlanan yoksa (takılan dönüştürme) hız düşer
+                idle = now - self._last_at - 1 / rate
+                if idle > 0 and self.in_flight:
+                    rate *= 0.5 ** (idle / self.half_life_sec)
+            fraction = None
+            eta = None
+            if self.total is not None:
+                fraction = min(1.0, completed / self.total) if self.total else 1.0
+                remaining = max(0, self.total - completed)
+                if not remaining:
+                    eta = 0.0
+                elif rate:
+                    eta = remaining / rate
+            return {
+                "total": self.total,
+                "done": self.done,
+                "failed": self.failed,
+                "skipped": self.skipped,
+                "in_flight": self.in_flight,
+                "completed": completed,
+                "fraction": fraction,
+                "rate": rate,
+                "eta_sec": eta,
+                "elapsed_sec": now - self._started_at if self._started_at is not None else 0.0,
+            }
+
+    def _notify(self):
+        with self._notify_lock:
+            with self._lock:
+                observers = list(self._observers)
+            if not observers:
+                return
+            snapshot = self.snapshot()
+            for observer in observers:
+                try:
+                    observer(snapshot)
+                except Exception:
+                    pass
+
+
+def _format_duration(seconds):
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+def format_progress(snapshot):
+    """ProgressTracker.snapshot() sözlüğünü tek satırlık ilerleme metnine çevirir"""
+    completed = snapshot["completed"]
+    parts = [f"{completed}/{snapshot['total']} fatura" if snapshot["total"] is not None
+             else f"{completed} fatura"]
+    if snapshot["rate"]:
+        parts.append(f"{snapshot['rate']:.1f} fatura/sn")
+    if snapshot["eta_sec"] is not None and completed < (snapshot["total"] or 0):
+        parts.append(f"kalan ~{_format_duration(snapshot['eta_sec'])}")
+    if snapshot["in_flight"]:
+        parts.append(f"{snapshot['in_flight']} dönüştürülüyor")
+    if snapshot["failed"]:
+        parts.append(f"{snapshot['failed']} hatalı")
+    if snapshot["skipped"]:
+        parts.append(f"{snapshot['skipped']} atlandı")
+    return "  |  ".join(parts)
+
+
+# Hat aşamaları arasındaki kuyrukların kapasitesi (geri basınç sınırı)
+PIPELINE_QUEUE_SIZE = 64
+
+# Kuyruklarda aşamanın bittiğini ve tüm tarihlerin belli olduğunu bildiren işaretler
+_PIPELINE_END = object()
+_PIPELINE_DATES_READY = object()
+
+
+class _PipelineStopped(Exception):
+    """Hattın başka bir aşamasında hata oluştuğunda bekleyen aşamaları durdurur"""
+
+
+class InvoicePipeline:
+    """
+    Bir arşivin faturalarını sınırlı kuyruklarla birbirine bağlanmış üretici/tüketici
+    aşamalarında işler:
+
+        tarama -> tarih ve evrak no -> dönüştürme -> çıktı
+
+    Aşamalar birbirinin bitmesini beklemez; arşiv taranırken ilk faturalar
+    dönüştürülmeye başlar. Bir kuyruk dolduğunda önceki aşama bekler (geri basınç),
+    böylece bellekte ve havuzda sınırlı sayıda fatura bulunur.
+    HTML, aynı adlı XML'i görüldüğü anda tarih aşamasına geçer; XML'i taramanın
+    sonuna kadar görülmeyen HTML'ler XML'siz işlenir. Fatura sırası (idx) arşivdeki
+    HTML sırasıdır, yani sonuçlar aşamalı işlemle aynıdır. HTML'i olmayan UBL
+    faturaları taramanın sonunda HTML'lerin ardından sıralanır; tarih aşamasında
+    gömülü XSLT ile HTML'e çevrilip aynı yoldan dönüştürülür.
+    Disk bütçesi kipinde (TempBudget) diske yazılan HTML'ler dönüştürülür
+    dönüştürülmez silinir ve geçici klasör dolduğunda yeni dönüştürmeler bekletilir.
+    """
+    def __init__(self, processor, source, temp_dir, renderer, batch_size=1,
+                 cache=None, executor=None, status_callback=None, queue_size=PIPELINE_QUEUE_SIZE,
+                 profile=None, tuner=None, dedup=True, manifest=None, merged=False, target_for=None,
+                 cancel_token=None, temp_budget=None, render_order=None, progress=None):
+        """
+        :param processor: Tarih çıkarma ve dönüştürme için kullanılan InvoiceProcessor
+        :param source: Taranacak ZipSource
+        :param renderer: Faturaları PDF'e çeviren Renderer
+        :param executor: Dönüştürmelerin çalıştığı havuz (None ise hatta özel havuz açılır)
+        :param profile: Aşama sürelerinin yazılacağı RunProfile (None ise hatta özel)
+        :param tuner: Aynı anda çalışan dönüştürme sayısını belirleyen RenderAutotuner
+                      (None ise processor.max_workers sabit sınırı kullanılır)
+        :param dedup: Yinelenen faturalar dönüştürülmeden ayıklansın mı (DuplicateFilter)
+        :param manifest: Eşitleme kipinde önceki çalıştırmaların RunManifest'i; istenen
+                         çıktı türünde (merged) zaten üretilmiş faturalar dönüştürülmez
+        :param target_for: (idx, tarih, evrak_id) -> PDF yolu; verilirse PDF'ler doğrudan
+                           bu yollara dönüştürülür (bkz. InvoiceProcessor.convert_batch)
+        :param cancel_token: Verilirse (CancelToken) iptalde tüm aşamalar durur, henüz
+                             başlamamış dönüştürmeler atlanır ve run JobCancelled fırlatır
+        :param temp_budget: Geçici klasör kullanımının izlendiği TempBudget (None ise hatta özel, sınırsız)
+        :param render_order: [(html, tarih, evrak_id), ...] -> idx listesi; verilirse dönüştürmeler
+                             tüm tarihler belli olana kadar bekletilir ve bu sırayla yapılır.
+                             Birleştirme sırasıyla dönüştürülen PDF'ler yeniden sıralama
+                             tamponunda birikmeden birleştirilir (disk bütçesi kipi).
+        :param progress: Dönüştürmeye giren ve tamamlanan faturaların bildirildiği
+                         ProgressTracker (None ise hatta özel)
+        """
+        self.processor = processor
+        self.source = source
+        self.temp_dir = temp_dir
+        self.renderer = renderer
+        self.batch_size = max(1, batch_size)
+        self.cache = cache
+        self.executor = executor
+        self.status_callback = status_callback
+        self.profile = profile if profile is not None else RunProfile()
+        self.html_count = 0
+        self.xml_count = 0
+        self.matched_count = 0
+        # HTML'i olmayan, gömülü XSLT ile HTML'e çevrilecek XML fatura sayısı
+        self.xml_only_count = 0
+        # run() sonunda yinelenen faturaların raporu (DuplicateFilter.report)
+        self.duplicates = []
+        self.tuner = tuner if tuner is not None else RenderAutotuner(processor.max_workers, autotune=False)
+        self.duplicate_filter = DuplicateFilter() if dedup else None
+        self.manifest = manifest
+        self.merged = merged
+        self.target_for = target_for
+        self.cancel_token = cancel_token
+        self.temp_budget = temp_budget if temp_budget is not None else TempBudget()
+        self.render_order = render_order
+        self.progress = progress if progress is not None else ProgressTracker()
+        # render_order verilmişse sırası gelene kadar bekleyen dönüştürmeler (idx -> öğe)
+        self._deferred = {}
+        # Bütçe kipinde XML'den üretilen HTML'ler dönüştürmeye kadar silinir: idx -> XML
+        self._xslt_sources = {}
+        # Yinelenen ayıklama veya eşitleme açıksa idx -> HTML içerik özeti
+        self.digests = {}
+        self.known_count = 0
+        self._metadata_workers = processor.metadata_workers
+        self._metadata_queue = queue.Queue(queue_size)
+        self._render_queue = queue.Queue(queue_size)
+        self._output_queue = queue.Queue(queue_size)
+        self._inflight = 0
+        self._inflight_condition = threading.Condition()
+        self._stop = threading.Event()
+        self._error = None
+        self._lock = threading.Lock()
+        self._metadata_left = self._metadata_workers
+        self._dates = {}
+
+    @property
+    def invoice_count(self):
+        """HTML'li faturalar ve XML'den üretilecekler (idx aralığı)"""
+        return self.html_count + self.xml_only_count
+
+    def update_status(self, message, progress=None):
+        if self.status_callback:
+            self.status_callback(message, progress)
+
+    def run(self, on_dates=None, on_result=None):
+        """
+        Hattı çalıştırır ve tüm aşamalar bitene kadar bekler.
+        :param on_dates: Tüm faturaların tarihi belli olunca [(html, tarih, evrak_id), ...] ile çağrılır
+        :param on_result: Her fatura tamamlandığında (idx, pdf_path) ile çağrılır (başarısızsa pdf_path None)
+        on_dates ve on_result aynı çıktı iş parçacığından çağrılır ve on_dates her
+        zaman on_result çağrılarının bitmesinden önce gelir.
+        :return: (files_with_dates, pdf_files_with_info, error_list), hepsi fatura (idx) sırasıyla
+        """
+        self._on_dates = on_dates
+        self._on_result = on_result
+        self._results = {}
+        own_executor = self.executor is None
+        if own_executor:
+            self.executor = ThreadPoolExecutor(max_workers=self.processor.max_workers)
+        threads = [threading.Thread(target=self._guard, args=(self._scan,), daemon=True)]
+        threads += [threading.Thread(target=self._guard, args=(self._resolve_metadata,), daemon=True)
+                    for _ in range(self._metadata_workers)]
+        threads.append(threading.Thread(target=self._guard, args=(self._dispatch_renders,), daemon=True))
+        threads.append(threading.Thread(target=self._guard, args=(self._collect_outputs,), daemon=True))
+        if self.cancel_token is not None:
+            self.cancel_token.add_callback(self._cancel)
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            if self.cancel_token is not None:
+                self.cancel_token.remove_callback(self._cancel)
+            if own_executor:
+                self.executor.shutdown(wait=True)
+                self.executor = None
+        if self._error is not None:
+            raise self._error
+
+        files_with_dates = [self._dates[idx] for idx in range(self.invoice_count)]
+        if self.duplicate_filter is not None:
+            self.duplicates = self.duplicate_filter.report(files_with_dates)
+        pdf_files_with_info = []
+        error_list = []
+        for idx in range(self.invoice_count):
+            pdf_path, invoice_date, evrak_id, error = self._results[idx]
+            if pdf_path:
+                pdf_files_with_info.append((pdf_path, invoice_date, evrak_id))
+            if error:
+                error_list.append(error)
+        return files_with_dates, pdf_files_with_info, error_list
+
+    # --- Aşamalar arası yardımcılar ---
+    def _cancel(self):
+        """İptalde tüm aşamaları durdurur; run() JobCancelled fırlatır"""
+        with self._lock:
+            if self._error is None:
+                self._error = JobCancelled("İşlem iptal edildi")
+        self._stop.set()
+
+    def _guard(self, stage):
+        try:
+            stage()
+        except _PipelineStopped:
+            pass
+        except BaseException as e:
+            with self._lock:
+                if self._error is None:
+                    self._error = e
+            self._stop.set()
+
+    def _put(self, q, item):
+        """Öğeyi kuyruğa koyar; kuyruk doluysa bekler ve beklenen süreyi döndürür"""
+        try:
+            q.put_nowait(item)
+            return 0.0
+        except queue.Full:
+            pass
+        started = time.perf_counter()
+        while True:
+            if self._stop.is_set():
+                raise _PipelineStopped()
+            try:
+                q.put(item, timeout=0.1)
+                return time.perf_counter() - started
+            except queue.Full:
+                continue
+
+    def _get(self, q):
+        while True:
+            if self._stop.is_set():
+                raise _PipelineStopped()
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+    def _finish_render(self):
+        with self._inflight_condition:
+            self._inflight -= 1
+            self._inflight_condition.notify_all()
+
+    def _wait_renders(self):
+        """Bu hattın havuza gönderdiği dönüştürmelerin hepsi bitene kadar bekler"""
+        with self._inflight_condition:
+            while self._inflight:
+                if self._stop.is_set():
+                    raise _PipelineStopped()
+                self._inflight_condition.wait(0.1)
+
+    def _html_size(self, html_file):
+        if isinstance(html_file, ZipMember):
+            return html_file.info.file_size
+        try:
+            return os.path.getsize(html_file)
+        except OSError:
+            return 0
+
+    def _release_html(self, idx, html_file):
+        """Disk bütçesi kipinde faturanın diske yazılmış HTML'ini siler"""
+        if not self.temp_budget.enabled:
+            return
+        if isinstance(html_file, ZipMember):
+            self.source.release(html_file)
+        elif idx >= self.html_count:
+            # XML'den üretilmiş HTML
+            self.temp_budget.release(html_file)
+
+    # --- Aşamalar ---
+    def _scan(self):
+        """Arşivi dolaşır, HTML'leri ikiz XML'leriyle birlikte tarih aşamasına iletir"""
+        started = time.perf_counter()
+        cpu = time.thread_time()
+        blocked = 0.0
+        member_bytes = 0
+        xml_members = {}
+        html_bases = set()
+        waiting = {}
+        for member in self.source.iter_members():
+            base, ext = os.path.splitext(member.name)
+            ext = ext.lower()
+            if ext in ('.html', '.htm'):
+                member_bytes += member.info.file_size
+                html_bases.add(base)
+                idx = self.html_count
+                self.html_count += 1
+                xml_file = xml_members.get(base)
+                if xml_file is not None:
+                    blocked += self._put(self._metadata_queue, (idx, member, xml_file))
+                else:
+                    waiting.setdefault(base, []).append((idx, member))
+            elif ext == '.xml':
+                member_bytes += member.info.file_size
+                self.xml_count += 1
+                xml_members[base] = member
+                for idx, html_file in waiting.pop(base, ()):
+                    blocked += self._put(self._metadata_queue, (idx, html_file, member))
+        for items in waiting.values():
+            for idx, html_file in items:
+                blocked += self._put(self._metadata_queue, (idx, html_file, None))
+        # HTML'i olmayan faturalar HTML'lerin ardından sıralanır; HTML'leri tarih aşamasında üretilir
+        for xml_file in self.processor.select_xml_only(xml_members.values(), html_bases):
+            with self._lock:
+                idx = self.invoice_count
+                self.xml_only_count += 1
+            blocked += self._put(self._metadata_queue, (idx, None, xml_file))
+        self.progress.set_total(self.invoice_count)
+        # Dolu kuyrukta beklenen süre taramaya değil geri basınca aittir
+        finished = time.perf_counter()
+        self.profile.add_stage("scan", finished - started - blocked, time.thread_time() - cpu, started, finished)
+        self.profile.count("member_bytes", member_bytes)
+        self.profile.count("queue_wait_ms", int(blocked * 1000))
+        self.processor.log_message(f"Bulunan HTML: {self.html_count}  |  XML: {self.xml_count}"
+                                   + (f"  |  HTML'i olmayan XML fatura: {self.xml_only_count}" if self.xml_only_count else ""))
+        for _ in range(self._metadata_workers):
+            self._put(self._metadata_queue, _PIPELINE_END)
+
+    def _resolve_metadata(self):
+        """Faturaların tarih ve evrak numaralarını bulup dönüştürme aşamasına iletir"""
+        while True:
+            item = self._get(self._metadata_queue)
+            if item is _PIPELINE_END:
+                break
+            idx, html_file, xml_file = item
+            error = None
+            if html_file is None:
+                with self.profile.stage("xslt"):
+                    html_file, invoice_date, evrak_id, error = self.processor.resolve_xml_only_invoice(xml_file)
+            else:
+                with self.profile.stage("metadata"):
+                    invoice_date, evrak_id = self.processor.resolve_invoice_metadata(html_file, xml_file)
+            with self._lock:
+                self._dates[idx] = (html_file, invoice_date, evrak_id)
+                if xml_file is not None and idx < self.html_count:
+                    self.matched_count += 1
+            if error:
+                self.profile.count("xslt_errors")
+                self.progress.finished(failed=1, started=False)
+                self._put(self._output_queue, (idx, (None, invoice_date, evrak_id, error)))
+                continue
+            if xml_file is not None and idx >= self.html_count:
+                self.temp_budget.add(html_file)
+            digest = None
+            if self.duplicate_filter is not None or self.manifest is not None:
+                with self.profile.stage("dedup"):
+                    digest = content_digest(html_file)
+                with self._lock:
+                    self.digests[idx] = digest
+            if self.manifest is not None and self.manifest.known(evrak_id, invoice_date, digest, self.merged):
+                # Önceki çalıştırmada üretilmiş fatura; çıktıda PDF'siz ve hatasız yer alır
+                self.profile.count("already_synced")
+                with self._lock:
+                    self.known_count += 1
+                self.progress.finished(skipped=1, started=False)
+                self._put(self._output_queue, (idx, (None, invoice_date, evrak_id, None)))
+                self._release_html(idx, html_file)
+                continue
+            if self.duplicate_filter is not None:
+                with self.profile.stage("dedup"):
+                    original = self.duplicate_filter.check(idx, html_file, invoice_date, evrak_id, digest)
+                if original is not None:
+                    # Yinelenen fatura dönüştürülmez; çıktıda PDF'siz ve hatasız yer alır
+                    self.profile.count("duplicates")
+                    self.progress.finished(skipped=1, started=False)
+                    self._put(self._output_queue, (idx, (None, invoice_date, evrak_id, None)))
+                    self._release_html(idx, html_file)
+                    continue
+            if idx >= self.html_count and self.temp_budget.enabled:
+                # XML'den üretilen HTML dönüştürme kuyruğunda diskte beklemesin;
+                # dönüştürmeden hemen önce yeniden üretilir (derlenmiş şablon önbellekte)
+                self.temp_budget.release(html_file)
+                with self._lock:
+                    self._xslt_sources[idx] = xml_file
+            if self.render_order is not None:
+                with self._lock:
+                    self._deferred[idx] = (idx, html_file, invoice_date, evrak_id)
+                continue
+            self._put(self._render_queue, (idx, html_file, invoice_date, evrak_id))
+        with self._lock:
+            self._metadata_left -= 1
+            last = self._metadata_left == 0
+        if last:
+            # Son çıkan iş parçacığı tüm tarihlerin belli olduğunu bildirir
+            self.processor.log_message(f"Toplam {self.html_count} HTML dosyasından:")
+            self.processor.log_message(f"- {self.matched_count} dosya XML ile eşleştirildi")
+            self.processor.log_message(f"- {self.html_count - self.matched_count} dosya için XML bulunamadı")
+            if self.xml_only_count:
+                self.processor.log_message(f"- {self.xml_only_count} fatura HTML'i olmadığı için XML'den (gömülü XSLT) üretildi")
+            if self.duplicate_filter is not None and self.duplicate_filter.duplicates:
+                self.processor.log_message(f"- {len(self.duplicate_filter.duplicates)} yinelenen fatura dönüştürülmeden atlandı")
+            if self.known_count:
+                self.processor.log_message(f"- {self.known_count} fatura önceki çalıştırmalarda üretilmiş, atlandı")
+            self._put(self._output_queue, _PIPELINE_DATES_READY)
+            if self.render_order is not None:
+                for idx in self.render_order([self._dates[idx] for idx in range(self.invoice_count)]):
+                    item = self._deferred.pop(idx, None)
+                    if item is not None:
+                        self._put(self._render_queue, item)
+            self._put(self._render_queue, _PIPELINE_END)
+
+    def _dispatch_renders(self):
+        """Faturaları gruplayıp havuza gönderir; aynı anda çalışan grup sayısını ayarlayıcı belirler"""
+        batch = []
+        while True:
+            item = self._get(self._render_queue)
+            if item is _PIPELINE_END:
+                break
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                self._submit_render(batch)
+                batch = []
+        if batch:
+            self._submit_render(batch)
+        self._wait_renders()
+        self._put(self._output_queue, _PIPELINE_END)
+
+    def _submit_render(self, batch):
+        # Geçici klasör bütçesi doluysa yer açılana kadar (çalışan dönüştürme varken) beklenir
+        self.temp_budget.wait_for_space(self.temp_budget.estimate(len(batch)), lambda: self._inflight > 0, self._stop)
+        if self._stop.is_set():
+            raise _PipelineStopped()
+        if not self.tuner.acquire(self._stop):
+            raise _PipelineStopped()
+        with self._inflight_condition:
+            self._inflight += 1
+        try:
+            self.executor.submit(self._render, batch)
+        except BaseException:
+            self.tuner.release(0)
+            self._finish_render()
+            raise
+
+    def _render(self, batch):
+        released = False
+        try:
+            if self._stop.is_set():
+                return
+            for idx, html_file, _, _ in batch:
+                xml_file = self._xslt_sources.get(idx)
+                if xml_file is not None and not os.path.exists(html_file):
+                    with self.profile.stage("xslt"):
+                        self.processor.render_xml_to_html(xml_file, html_file)
+                    self.temp_budget.add(html_file)
+            started = time.perf_counter()
+            self.progress.started(len(batch))
+            with self.profile.stage("render"):
+                results = self.processor.convert_batch(batch, self.temp_dir, self.renderer, self.cache, self.target_for)
+            failed = sum(1 for pdf_path, _, _, _ in results if pdf_path is None)
+            self.progress.finished(done=len(batch) - failed, failed=failed)
+            # Toplu dönüştürmede gruptaki her faturaya eşit pay düşer
+            latency_ms = (time.perf_counter() - started) * 1000 / len(batch)
+            # Yuva, sonuçlar çıktı kuyruğuna konmadan bırakılır; dolu çıktı kuyruğu
+            # dönüştürme verimini düşük göstermesin
+            self.tuner.release(len(batch))
+            released = True
+            pdf_bytes = 0
+            for (idx, html_file, _, evrak_id), (pdf_path, _, _, _) in zip(batch, results):
+                self.profile.record_render(evrak_id or _source_name(html_file), latency_ms)
+                size = 0
+                if pdf_path:
+                    try:
+                        size = os.path.getsize(pdf_path)
+                    except OSError:
+                        pass
+                    pdf_bytes += size
+                    if self.target_for is None:
+                        self.temp_budget.add(pdf_path, size)
+                self.temp_budget.note_invoice(self._html_size(html_file) + (size if self.target_for is None else 0))
+                self._release_html(idx, html_file)
+            self.profile.count("pdf_bytes", pdf_bytes)
+            for (idx, _, _, _), result in zip(batch, results):
+                self._put(self._output_queue, (idx, result))
+        except _PipelineStopped:
+            pass
+        except BaseException as e:
+            with self._lock:
+                if self._error is None:
+                    self._error = e
+            self._stop.set()
+        finally:
+            if not released:
+                self.tuner.release(0)
+            self._finish_render()
+
+    def _collect_outputs(self):
+        """Tamamlanan faturaları kaydeder ve çıktı geri çağırmalarını çalıştırır"""
+        while True:
+            item = self._get(self._output_queue)
+            if item is _PIPELINE_END:
+                break
+            if item is _PIPELINE_DATES_READY:
+                if self._on_dates:
+                    with self.profile.stage("output"):
+                        self._on_dates([self._dates[idx] for idx in range(self.invoice_count)])
+                continue
+            idx, result = item
+            self._results[idx] = result
+            if self._on_result:
+                with self.profile.stage("output"):
+                    self._on_result(idx, result[0])
+
+
+class OutputNamePlanner:
+    """
+    Bir çıktı klasörüne yazılacak dosya adlarını bellekte planlar. Klasör bir
+    kez listelenir; çakışmalar her aday ad için diske sorulmadan bir kümede
+    çözülür (ad_1.pdf, ad_2.pdf, ...). İş parçacıkları arasında paylaşılabilir.
+    """
+    def __init__(self, folder):
+        self.folder = folder
+        try:
+            names = os.listdir(folder)
+        except OSError:
+            names = []
+        self._taken = {os.path.normcase(name) for name in names}
+        self._next_suffix = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, name):
+        """Kullanılmayan bir ad ayırır ve klasördeki tam yolunu döndürür"""
+        base, ext = os.path.splitext(name)
+        with self._lock:
+            candidate = name
+            cdup = self._next_suffix.get(name, 1)
+            while os.path.normcase(candidate) in self._taken:
+                candidate = f"{base}_{cdup}{ext}"
+                cdup += 1
+            if candidate != name:
+                self._next_suffix[name] = cdup
+            self._taken.add(os.path.normcase(candidate))
+        return os.path.join(self.folder, candidate)
+
+    def claim(self, name, directory=False):
+        """
+        reserve gibi ad ayırır ve adı diskte hemen boş bir dosya (directory ise
+        klasör) olarak oluşturur. Oluşturma atomiktir (O_EXCL / mkdir); aynı
+        klasöre yazan başka bir süreç adı arada aldıysa sıradaki ad denenir.
+        :return: Oluşturulan dosyanın veya klasörün yolu
+        """
+        while True:
+            path = self.reserve(name)
+            try:
+                if directory:
+                    os.mkdir(path)
+                else:
+                    os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return path
+            except FileExistsError:
+                continue
+
+
+def _remove_empty_dir(path):
+    """Klasör varsa ve boşsa siler"""
+    if path:
+        try:
+            os.rmdir(path)
+        except OSError:
+            pass
+
+
+def split_pdf_name(i, invoice_date, evrak_id):
+    """Ayrı kaydedilen PDF'in adı: evrak no, yoksa tarih ve sıra numarası"""
+    if evrak_id:
+        return f"{evrak_id}.pdf"
+    if invoice_date:
+        return f"fatura_{invoice_date.strftime('%Y%m%d')}_{i+1}.pdf"
+    return f"fatura_{i+1}.pdf"
+
+
+class InvoiceJob:
+    """
+    Tek bir ZIP arşivini PDF'e dönüştürür (birleştirilmiş dosya veya klasör).
+    Tk'ye bağımlı değildir; durum ve loglar geri çağırma fonksiyonlarıyla bildirilir,
+    sonuç makine tarafından okunabilir bir özet sözlüğü olarak döner.
+    """
+    def __init__(self, zip_path, output_folder, options, temp_dir, log_callback=None,
+                 status_callback=None, config=None, executor=None, tuner=None, cancel_token=None):
         """
-        :param log_callback: Anlık durumu ekrana yazdırmak için kullanılan fonksiyon.
+        :param config: Paylaşılan pdfkit yapılandırması (None ise iş kendisi arar)
+        :param executor: Birden çok işin paylaştığı dönüştürme havuzu (None ise işe özel)
+        :param tuner: Havuzla birlikte paylaşılan RenderAutotuner (None ise işe özel)
+        :param cancel_token: İşi durdurmak için CancelToken; iptalde çalışan dönüştürmeler
+                             sonlandırılır, yarım çıktılar ve geçici klasör temizlenir
+        Dönüştürme ilerlemesini izlemek için job.progress.add_observer kullanılır.
         """
+        self.zip_path = zip_path
+        self.output_folder = output_folder
+        self.options = options
+        self.temp_dir = temp_dir
         self.log_callback = log_callback
-        # CPU sayısına göre iş parçacığı sayısı belirlenir
-        self.max_workers = max(2, multiprocessing.cpu_count() - 1)
+        self.status_callback = status_callback
+        self.config = config
+        self.executor = executor
+        self.tuner = tuner
+        self.cancel_token = cancel_token
+        self.profile = RunProfile(cprofile=options.cprofile, tracemalloc=options.tracemalloc)
+        self.temp_budget = TempBudget(int(options.temp_budget_mb * 1024 * 1024) if options.temp_budget_mb else None)
+        # Tamamlanan faturalara göre ilerleme, hız ve kalan süre (arayüz ve başsız mod gözlemler)
+        self.progress = ProgressTracker()
+        # Adı ayrılmış (boş dosya olarak oluşturulmuş) çıktı dosyaları
+        self._reserved_outputs = []
 
     def log_message(self, message):
-        """
-        Mesajı sadece arayüze (GUI) gönderir.
-        Diske kayıt yapmaz, konsola basmaz.
-        """
         if self.log_callback:
             self.log_callback(message)
 
-    def extract_zip_recursively(self, zip_path, extract_path, depth=0, max_depth=5):
-        """ZIP dosyalarını özyinelemeli olarak çıkarır"""
-        if depth > max_depth:
-            self.log_message(f"Maksimum derinliğe ulaşıldı, daha fazla açılmıyor: {zip_path}")
+    def update_status(self, message, progress=None):
+        if self.status_callback:
+            self.status_callback(message, progress)
+        else:
+            self.log_message(message)
+
+    def run(self):
+        """İşi çalıştırır ve özet sözlüğünü döndürür"""
+        started = datetime.now()
+        self.profile.start()
+        summary = {
+            "zip_path": os.path.abspath(self.zip_path),
+            "status": "error",
+            "message": "",
+            "started_at": started.isoformat(timespec="seconds"),
+            "html_count": 0,
+            "xml_count": 0,
+            "xml_only_count": 0,
+            "pdf_count": 0,
+            "output": None,
+            "errors": [],
+            "error_count": 0,
+            "cache": None,
+            "renderer": None,
+            "quarantine": [],
+            "duplicates": [],
+        }
+        try:
+            self._run(summary)
+        except JobCancelled:
+            summary["status"] = "cancelled"
+            summary["message"] = "İşlem iptal edildi."
+            self.update_status("İşlem iptal edildi.", 0)
+            self._clear_temp()
+            self.log_message("İşlem iptal edildi, geçici dosyalar silindi.")
+        except ArchiveLimitError as e:
+            summary["status"] = "error"
+            summary["message"] = f"Arşiv güvenlik sınırı aşıldı:\n{str(e)}"
+            self.update_status("Hata oluştu!", 0)
+            self.log_message(f"HATA: {str(e)}")
+        except Exception as e:
+            summary["status"] = "error"
+            summary["message"] = f"İşlem sırasında hata:\n{str(e)}"
+            self.update_status("Hata oluştu!", 0)
+            self.log_message(f"HATA: {str(e)}")
+            self.log_message(traceback.format_exc())
+        self._remove_unused_outputs()
+        finished = datetime.now()
+        peak_rss = peak_rss_bytes()
+        if peak_rss:
+            summary["peak_rss_mb"] = round(peak_rss / (1024 * 1024), 1)
+            self.log_message(f"Tepe bellek kullanımı (RSS): {summary['peak_rss_mb']} MB")
+        self._record_temp_usage(summary)
+        summary["finished_at"] = finished.isoformat(timespec="seconds")
+        summary["duration_sec"] = round((finished - started).total_seconds(), 3)
+        summary["error_count"] = max(summary["error_count"], len(summary["errors"]))
+        summary["stages"] = self.profile.stage_summary()
+        if self.options.report:
+            self.write_report(summary)
+        if self.options.write_summary:
+            self.write_summary(summary)
+        return summary
+
+    def _record_temp_usage(self, summary):
+        """Geçici klasörün tepe kullanımını özete ve sayaçlara yazar; bütçe kipinde klasörü boşaltır"""
+        budget = self.temp_budget
+        if budget.enabled:
+            self._clear_temp()
+        budget.record(self.profile)
+        summary["temp_peak_mb"] = round(budget.peak_bytes / (1024 * 1024), 1)
+        if not budget.enabled:
+            self.log_message(f"Geçici klasör tepe kullanımı: {summary['temp_peak_mb']} MB")
             return
+        summary["temp_budget_mb"] = round(budget.max_bytes / (1024 * 1024), 1)
+        self.log_message(f"Geçici klasör tepe kullanımı: {summary['temp_peak_mb']} MB "
+                         f"(bütçe {summary['temp_budget_mb']} MB, {budget.deleted_files} ara dosya silindi)")
+        if budget.peak_bytes > budget.max_bytes:
+            self.log_message("⚠️ Geçici klasör bütçesi aşıldı")
+
+    def write_summary(self, summary):
+        """Özeti çıktı klasörüne JSON olarak yazar"""
+        try:
+            summary["summary_path"] = self._write_json("skub_ozet", summary)
+        except Exception as e:
+            self.log_message(f"⚠️ Özet dosyası yazılamadı: {str(e)}")
+
+    def write_report(self, summary):
+        """
+        Çalıştırma raporunu (aşama süreleri, dönüştürme gecikmesi dağılımı,
+        en yavaş faturalar, yeniden denemeler, G/Ç baytları) çıktı klasörüne
+        JSON olarak yazar. cProfile açıksa istatistikler .prof dosyasına da yazılır.
+        """
         try:
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                zip_ref.extractall(extract_path)
-            self.log_message(f"Zip dosyası açıldı: {os.path.basename(zip_path)}")
+            os.makedirs(self.output_folder, exist_ok=True)
+            cprofile_path = None
+            if self.options.cprofile:
+                ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+                cprofile_path = os.path.join(self.output_folder, f"skub_profil_{ts}.prof")
+            profile = self.profile.report(cprofile_path)
+            counters = profile.pop("counters")
+            report = {key: summary.get(key) for key in (
+                "zip_path", "status", "started_at", "finished_at", "duration_sec",
+                "html_count", "xml_count", "xml_only_count", "pdf_count", "error_count", "cache", "peak_rss_mb",
+                "temp_peak_mb", "temp_budget_mb", "quarantine", "duplicates")}
+            report.update(profile)
+            report["io"] = {key: value for key, value in counters.items() if key.endswith("_bytes")}
+            report["counters"] = {key: value for key, value in counters.items() if not key.endswith("_bytes")}
+            summary["report_path"] = self._write_json("skub_rapor", report)
+            self.log_message(f"Çalıştırma raporu: {summary['report_path']}")
         except Exception as e:
-            self.log_message(f"Hata: {os.path.basename(zip_path)} açılamadı: {str(e)}")
+            self.log_message(f"⚠️ Çalıştırma raporu yazılamadı: {str(e)}")
+
+    def _write_json(self, prefix, data):
+        os.makedirs(self.output_folder, exist_ok=True)
+        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # Aynı saniyede aynı klasöre yazan işler birbirinin dosyasını ezmesin
+        path = OutputNamePlanner(self.output_folder).claim(f"{prefix}_{ts}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        return path
+
+    def _record_merge_dedup(self, writer):
+        """Birleşik PDF'te paylaşılan ortak nesneleri sayaçlara ve loga yazar"""
+        self._record_shared_objects(writer.dedup_objects, writer.dedup_bytes)
+
+    def _record_shared_objects(self, objects, saved_bytes):
+        if not objects:
             return
+        self.profile.count("merge_shared_objects", objects)
+        self.profile.count("merge_saved_bytes", saved_bytes)
+        self.log_message(f"Birleşik PDF: {objects} ortak nesne (yazı tipi, resim vb.) paylaşıldı, "
+                         f"{saved_bytes / (1024 * 1024):.1f} MB tasarruf")
 
-        # İç içe zip dosyalarını bul ve paralel olarak çıkar
-        inner_zips = []
-        for root_dir, _, files in os.walk(extract_path):
-            for file in files:
-                if file.lower().endswith('.zip'):
-                    inner_zip_path = os.path.join(root_dir, file)
-                    inner_zips.append(inner_zip_path)
-
-        if inner_zips:
-            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                for inner_zip in inner_zips:
-                    inner_extract_path = os.path.join(
-                        extract_path,
-                        f"extracted_{os.path.splitext(os.path.basename(inner_zip))[0]}"
-                    )
-                    os.makedirs(inner_extract_path, exist_ok=True)
-                    executor.submit(self.extract_zip_recursively, inner_zip, inner_extract_path, depth + 1, max_depth)
-
-    def extract_date_from_xml(self, xml_file):
-        """XML dosyasından fatura tarihini çıkarır"""
-        try:
-            tree = ET.parse(xml_file)
-            root = tree.getroot()
-            namespaces = {
-                'cbc': 'urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2',
-                'cac': 'urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2',
-                'ubl': 'urn:oasis:names:specification:ubl:schema:xsd:Invoice-2'
-            }
-            issue_date = None
-
-            for ns_prefix in [None, 'cbc', 'ubl']:
-                tag = f"{{{namespaces[ns_prefix]}}}IssueDate" if ns_prefix else "IssueDate"
-                elements = root.findall(f".//{tag}")
-                if elements:
-                    issue_date = elements[0].text
-                    # Loglama kaldırıldı, sadece işlem yapılıyor
-                    break
+    def _merge_order(self, files_with_dates):
+        """Birleştirme sırası: tarih sıralaması istenmişse asc/desc tarih, değilse arşiv sırası (idx listesi)"""
+        if self.options.sort_by_date:
+            return sorted(
+                range(len(files_with_dates)),
+                key=lambda i: files_with_dates[i][1] if files_with_dates[i][1] else datetime.min,
+                reverse=(self.options.sort_order == "desc")
+            )
+        return list(range(len(files_with_dates)))
 
-            if not issue_date:
-                potential_date_tags = ["IssueDate", "DüzenlemeTarihi", "düzenlemetarihi", "BelgeTarihi", "belgetarihi"]
-                for tag in potential_date_tags:
-                    elements = root.findall(f".//{tag}")
-                    if elements:
-                        issue_date = elements[0].text
-                        break
+    def _finish_volumes(self, summary, files_with_dates, results, errors, extra_msg):
+        """
+        Birleşik çıktıyı plan_volumes ile ciltlere böler ve ciltleri işçi
+        süreçlerde eş zamanlı yazar. Tarih sırası ciltler boyunca korunur.
+        :param results: {idx: pdf yolu veya None}
+        """
+        options = self.options
+        items = [(results[idx], files_with_dates[idx][1]) for idx in self._merge_order(files_with_dates)
+                 if results.get(idx)]
+        self.update_status("Ciltler planlanıyor...", 80)
+        with self.profile.stage("volume_plan"):
+            volumes = plan_volumes(items, options.volume_by, options.volume_limit)
+        merged_path = self._plan_merged_path()
+        if len(volumes) == 1:
+            paths = [merged_path]
+        else:
+            planner = OutputNamePlanner(self.output_folder)
+            base = os.path.splitext(os.path.basename(merged_path))[0]
+            paths = [self._claim_output(planner, f"{base}_{label}.pdf") for label, _ in volumes]
+        os.makedirs(self.output_folder, exist_ok=True)
+        workers = min(len(volumes), multiprocessing.cpu_count())
+        self.update_status(f"PDF dosyaları {len(volumes)} cilt halinde birleştiriliyor...", 85)
+        self.log_message(f"Birleşik çıktı {len(volumes)} cilde bölünüyor ({workers} işçi süreç)")
+        with self.profile.stage("merge_volumes"):
+            try:
+                outcomes = self._write_volumes(paths, [volume[1] for volume in volumes], workers)
+                for pdf_path, _ in items:
+                    self.temp_budget.release(pdf_path)
+            except JobCancelled:
+                # Yarım kalan ve tamamlanmış ciltler silinir; iptal edilen çıktı eksik kalmasın
+                for path in paths:
+                    for candidate in (path, path + ".tmp"):
+                        try:
+                            os.remove(candidate)
+                        except OSError:
+                            pass
+                raise
 
-            if not issue_date:
-                self.log_message(f"XML'de tarih bulunamadı: {os.path.basename(xml_file)}")
-                return None
+        written = []
+        merged_count = 0
+        merge_errors = 0
+        shared_objects = 0
+        saved_bytes = 0
+        for path, (label, _), (page_count, merged, volume_errors, objects, saved) in zip(paths, volumes, outcomes):
+            for name, error in volume_errors:
+                self.log_message(f"⚠️ Birleştirme hatası: {name} - {error}")
+            merge_errors += len(volume_errors)
+            merged_count += merged
+            shared_objects += objects
+            saved_bytes += saved
+            if merged:
+                size = os.path.getsize(path)
+                self.profile.count("output_bytes", size)
+                written.append({"file": path, "label": label, "invoices": merged, "pages": page_count,
+                                "size_mb": round(size / (1024 * 1024), 2)})
+                self.log_message(f"✓ {os.path.basename(path)}: {merged} fatura, {page_count} sayfa, "
+                                 f"{size / (1024 * 1024):.1f} MB")
+        self._record_shared_objects(shared_objects, saved_bytes)
+        if not written:
+            summary["message"] = "Hiçbir PDF birleştirilemedi."
+            return
+        self.update_status(f"{len(written)} cilt kaydedildi.", 100)
+        self.log_message(f"Kayıt konumu: {self.output_folder}")
+        result_msg = f"{merged_count} fatura {len(written)} cilt halinde birleştirildi ve kaydedildi."
+        if merge_errors:
+            result_msg += f" ({merge_errors} fatura birleştirilemedi)"
+        if errors:
+            result_msg += f" ({len(errors)} fatura dönüştürülemedi)"
+        summary.update({
+            "status": "ok",
+            "message": result_msg + extra_msg,
+            "output": written[0]["file"] if len(written) == 1 else self.output_folder,
+            "outputs": [volume["file"] for volume in written],
+            "volumes": written,
+            "merged": True,
+            "pdf_count": merged_count,
+            "merge_error_count": merge_errors,
+            "error_count": len(errors) + merge_errors,
+        })
+
+    def _write_volumes(self, paths, pdf_lists, workers):
+        """
+        Ciltleri write_pdf_volume ile yazar; workers > 1 ise ayrı süreçlerde.
+        İptalde işçi süreçler sonlandırılır ve JobCancelled fırlatılır.
+        :return: Her cilt için write_pdf_volume sonucu
+        """
+        optimize = self.options.optimize_pdf
+        if workers <= 1:
+            return [write_pdf_volume(path, pdf_paths, optimize, self.cancel_token)
+                    for path, pdf_paths in zip(paths, pdf_lists)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            def kill_workers():
+                _kill_pool_processes(pool)
 
+            if self.cancel_token is not None:
+                self.cancel_token.add_callback(kill_workers)
             try:
-                if "-" in issue_date:
-                    date_obj = datetime.strptime(issue_date, "%Y-%m-%d")
-                elif "." in issue_date:
-                    date_obj = datetime.strptime(issue_date, "%d.%m.%Y")
-                else:
-                    self.log_message(f"Geçersiz tarih formatı: {issue_date}")
-                    return None
-                # Başarılı işlem logu (ekrana bilgi için)
-                self.log_message(f"✓ XML'den fatura tarihi: {date_obj.strftime('%d.%m.%Y')}")
-                return date_obj
-            except ValueError as e:
-                self.log_message(f"Tarih ayrıştırma hatası: {str(e)}")
-                return None
-        except Exception as e:
-            self.log_message(f"XML işleme hatası: {os.path.basename(xml_file)} - {str(e)}")
-            return None
+                return list(pool.map(write_pdf_volume, paths, pdf_lists, [optimize] * len(paths)))
+            except BrokenProcessPool:
+                check_cancelled(self.cancel_token)
+                raise
+            finally:
+                if self.cancel_token is not None:
+                    self.cancel_token.remove_callback(kill_workers)
 
-    def extract_evrak_id(self, xml_file):
-        """XML dosyasından evrak ID'sini çıkarır"""
-        try:
-            tree = ET.parse(xml_file)
-            root = tree.getroot()
-            namespaces = {'cbc': 'urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2'}
-            id_elem = root.find('.//cbc:ID', namespaces)
-            if id_elem is not None:
-                evrak_id = id_elem.text.strip()
-                if len(evrak_id) == 16:
-                    # Ekrana bilgi basma (log dosyasına değil)
-                    self.log_message(f"Evrak ID bulundu: {evrak_id}")
-                    return evrak_id
-                else:
-                    self.log_message(f"Evrak ID uygun formatta değil: {evrak_id}")
-                    return None
+    def _clear_temp(self):
+        """Geçici klasörün içeriğini siler (klasörün kendisi kalır)"""
+        try:
+            names = os.listdir(self.temp_dir)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(self.temp_dir, name)
+            if os.path.isdir(path) and not os.path.islink(path):
+                shutil.rmtree(path, ignore_errors=True)
             else:
-                self.log_message("XML'de Evrak ID bulunamadı.")
-                return None
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+    def _plan_split_folder(self):
+        """
+        Ayrı PDF'ler için çıktı klasöründe kullanılmayan bir faturalar_<zaman> klasörü
+        açar. Klasör ayrılırken oluşturulur; aynı çıktı klasörüne yazan başka bir iş
+        aynı adı alamaz.
+        """
+        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        os.makedirs(self.output_folder, exist_ok=True)
+        return OutputNamePlanner(self.output_folder).claim(f"faturalar_{ts}", directory=True)
+
+    def _plan_merged_path(self):
+        """Birleştirilmiş PDF için çıktı klasöründe kullanılmayan bir ad ayırır (bkz. _claim_output)"""
+        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if self.options.sort_by_date:
+            order_str = "eskiden_yeniye" if self.options.sort_order == "asc" else "yeniden_eskiye"
+            merged_name = f"birlesik_faturalar_{order_str}_{ts}.pdf"
+        else:
+            merged_name = f"birlesik_faturalar_{ts}.pdf"
+        os.makedirs(self.output_folder, exist_ok=True)
+        return self._claim_output(OutputNamePlanner(self.output_folder), merged_name)
+
+    def _claim_output(self, planner, name):
+        """
+        Çıktı dosyasının adını planner.claim ile boş bir dosya oluşturarak ayırır;
+        çıktı yazılınca bu dosyanın yerine konur. Yazılmadan kalan boş dosyalar iş
+        sonunda _remove_unused_outputs ile silinir.
+        """
+        path = planner.claim(name)
+        self._reserved_outputs.append(path)
+        return path
+
+    def _remove_unused_outputs(self):
+        """Ayrılıp hiç yazılmamış (boş kalmış) çıktı dosyalarını siler"""
+        for path in self._reserved_outputs:
+            try:
+                if os.path.getsize(path) == 0:
+                    os.remove(path)
+            except OSError:
+                pass
+        self._reserved_outputs = []
+
+    def _save_pdf(self, pdf, planner, target_name, evrak_id, errors):
+        """
+        Geçici PDF'i klasöre kullanılmayan bir adla taşır (aynı diskte os.replace,
+        değilse kopyalama); yazılan yolu, hata olursa None döndürür.
+        """
+        target_path = planner.reserve(target_name)
+        try:
+            try:
+                os.replace(pdf, target_path)
+                self.temp_budget.forget(pdf)
+            except OSError:
+                shutil.copyfile(pdf, target_path)
+                self.profile.count("output_bytes", os.path.getsize(target_path))
+                self.temp_budget.release(pdf)
+            self.log_message(f"✓ Kaydedildi: {os.path.basename(target_path)}")
+            return target_path
         except Exception as e:
-            self.log_message(f"XML evrak ID işleme hatası: {str(e)}")
+            self.log_message(f"✗ Kaydetme hatası: {os.path.basename(target_path)} - {str(e)}")
+            errors.append((evrak_id if evrak_id else "Bilinmiyor", f"Dosya kopyalama hatası: {str(e)}"))
             return None
 
-    def extract_invoice_dates(self, html_file):
-        """HTML dosyasından fatura tarihini çıkarır"""
+    def _finish_sync(self, summary, manifest, files_with_dates, new_pdfs, pipeline, errors, extra_msg):
+        """
+        Eşitleme kipinde yalnızca yeni faturaları çıktı klasörüne ekler: ayrı PDF'ler
+        SYNC_SPLIT_FOLDER klasörüne kopyalanır, birleşik çıktıda yalnızca yeni fatura
+        gelen dönemlerin PDF'leri yeniden yazılır. Sonunda manifest güncellenir.
+        :param new_pdfs: Bu çalıştırmada dönüştürülen faturalar {idx: pdf yolu}
+        """
+        options = self.options
+        new_items = [(idx, new_pdfs[idx]) for idx in sorted(new_pdfs)]
+        summary["sync"] = {"manifest": manifest.path, "known": pipeline.known_count,
+                           "new": len(new_items), "periods": []}
+        known_msg = f" {pipeline.known_count} fatura önceki çalıştırmalarda üretilmişti." if pipeline.known_count else ""
+        error_msg = f" ({len(errors)} fatura dönüştürülemedi)" if errors else ""
+        if not new_items:
+            self.update_status("Yeni fatura yok.", 100)
+            summary.update({
+                "status": "ok",
+                "message": "Eklenecek yeni fatura yok." + known_msg + error_msg + extra_msg,
+                "output": self.output_folder,
+                "merged": False,
+                "pdf_count": 0,
+            })
+            return
+
+        os.makedirs(self.output_folder, exist_ok=True)
+        if options.merge:
+            self.update_status("Değişen dönemlerin PDF'leri yeniden yazılıyor...", 80)
+            by_period = {}
+            for idx, pdf in new_items:
+                by_period.setdefault(invoice_period(files_with_dates[idx][1]), []).append((idx, pdf))
+            written = 0
+            merge_errors = 0
+            outputs = []
+            try:
+                for period in sorted(by_period):
+                    path, added, failed = self._rebuild_period(manifest, period, by_period[period],
+                                                               files_with_dates, pipeline.digests)
+                    for _, pdf in by_period[period]:
+                        self.temp_budget.release(pdf)
+                    written += added
+                    merge_errors += failed
+                    if path:
+                        outputs.append(path)
+                        summary["sync"]["periods"].append(period)
+            except JobCancelled:
+                # Yeniden yazılmış dönemlerin sayfa aralıkları manifeste işlenir
+                manifest.save()
+                raise
+            manifest.save()
+            self.log_message(f"Yeniden yazılan dönemler: {', '.join(summary['sync']['periods']) or '-'}")
+            result_msg = f"{written} yeni fatura {len(outputs)} dönemin birleşik PDF'ine eklendi."
+            if merge_errors:
+                result_msg += f" ({merge_errors} fatura birleştirilemedi)"
+            summary.update({
+                "status": "ok" if written else "error",
+                "output": outputs[0] if len(outputs) == 1 else self.output_folder,
+                "outputs": outputs,
+                "merged": True,
+                "pdf_count": written,
+                "merge_error_count": merge_errors,
+                "error_count": len(errors) + merge_errors,
+            })
+        else:
+            # Yeni PDF'ler dönüştürülürken SYNC_SPLIT_FOLDER'a yazıldı; yalnızca manifeste eklenir
+            output_sub = os.path.join(self.output_folder, SYNC_SPLIT_FOLDER)
+            written = 0
+            for idx, pdf in new_items:
+                _, invoice_date, evrak_id = files_with_dates[idx]
+                manifest.add(evrak_id, invoice_date, pipeline.digests.get(idx),
+                             file=f"{SYNC_SPLIT_FOLDER}/{os.path.basename(pdf)}")
+                self.log_message(f"✓ Kaydedildi: {os.path.basename(pdf)}")
+                written += 1
+            self.profile.count("output_bytes", self.profile.counters.get("pdf_bytes", 0))
+            manifest.save()
+            self.log_message(f"Kayıt konumu: {output_sub}")
+            result_msg = f"{written} yeni fatura {SYNC_SPLIT_FOLDER} klasörüne eklendi."
+            summary.update({
+                "status": "ok" if written else "error",
+                "output": output_sub,
+                "merged": False,
+                "pdf_count": written,
+                "error_count": len(errors),
+            })
+        self.update_status(result_msg, 100)
+        summary["message"] = result_msg + known_msg + error_msg + extra_msg
+        summary["errors"] = [{"evrak_id": evrak_id, "reason": reason} for evrak_id, reason in errors]
+
+    def _rebuild_period(self, manifest, period, new_items, files_with_dates, digests):
+        """
+        Bir dönemin birleşik PDF'ini önceki faturaların sayfaları (manifestteki
+        sayfa aralıklarıyla eski dosyadan) ve yeni faturalarla yeniden yazar.
+        :return: (yazılan dosya yolu veya None, eklenen yeni fatura sayısı, birleştirilemeyen fatura sayısı)
+        """
+        options = self.options
+        name = manifest.merged.get(period) or f"birlesik_faturalar_{period}.pdf"
+        path = os.path.join(self.output_folder, name)
+        old_entries = manifest.period_entries(period)
+        reader = None
+        if old_entries:
+            try:
+                reader = PyPDF2.PdfReader(path)
+            except Exception as e:
+                self.log_message(f"⚠️ {name} okunamadı, dönemin önceki faturaları sonraki çalıştırmada "
+                                 f"yeniden üretilecek: {str(e)}")
+                for entry in old_entries:
+                    manifest.drop_from_period(entry)
+                old_entries = []
+
+        # (tarih, eski kayıt veya None, yeni idx, yeni pdf)
+        items = [(datetime.fromisoformat(entry["date"]) if entry.get("date") else None, entry, None, None)
+                 for entry in old_entries]
+        items += [(files_with_dates[idx][1], None, idx, pdf) for idx, pdf in new_items]
+        if options.sort_by_date:
+            items.sort(key=lambda item: item[0] or datetime.min, reverse=(options.sort_order == "desc"))
+
+        writer = StreamingPdfWriter(path + ".tmp", optimize=options.optimize_pdf)
+        placements = []
+        failed = 0
+        try:
+            for invoice_date, entry, idx, pdf in items:
+                check_cancelled(self.cancel_token)
+                start = writer.page_count
+                try:
+                    if entry is not None:
+                        writer.append_pdf(reader, range(entry["page_start"], entry["page_start"] + entry["page_count"]))
+                    else:
+                        writer.append_pdf(pdf)
+                except Exception as e:
+                    label = entry.get("evrak_id") if entry is not None else os.path.basename(pdf)
+                    self.log_message(f"⚠️ Birleştirme hatası: {label} - {str(e)}")
+                    failed += 1
+                    if entry is not None:
+                        manifest.drop_from_period(entry)
+                    continue
+                placements.append((entry, idx, start, writer.page_count - start))
+            writer.close()
+        except BaseException:
+            writer.abort()
+            raise
+        if not placements:
+            writer.abort()
+            return None, 0, failed
+        os.replace(writer.output_path, path)
+        self._record_merge_dedup(writer)
+        self.profile.count("output_bytes", os.path.getsize(path))
+        manifest.merged[period] = name
+        added = 0
+        for entry, idx, start, count in placements:
+            if entry is not None:
+                entry.update(page_start=start, page_count=count)
+            else:
+                _, invoice_date, evrak_id = files_with_dates[idx]
+                manifest.add(evrak_id, invoice_date, digests.get(idx), period=period, page_start=start, page_count=count)
+                added += 1
+        self.log_message(f"✓ {name}: {added} yeni, {len(placements) - added} önceki fatura")
+        return path, added, failed
+
+    def _run(self, summary):
+        options = self.options
+        errors = []
+        setup_started = time.perf_counter()
+        setup_cpu = time.thread_time()
+        self.update_status("İşlem başlatılıyor...", 0)
+
+        # Temp klasörünü temizle
+        os.makedirs(self.temp_dir, exist_ok=True)
+        self._clear_temp()
+        check_cancelled(self.cancel_token)
+
+        self.update_status("Zip dosyası açılıyor...", 10)
+        extract_dir = os.path.join(self.temp_dir, "extracted")
+        os.makedirs(extract_dir, exist_ok=True)
+
+        processor = InvoiceProcessor(self.log_message)
+        processor.max_workers = options.max_workers
+        processor.metadata_workers = options.metadata_workers
+        processor.profile = self.profile
+        processor.cancel_token = self.cancel_token
+        processor.xml_only = options.xml_only
+        tuner = self.tuner
+        if tuner is None:
+            tuner = RenderAutotuner(options.max_workers, autotune=options.autotune_render,
+                                    log_callback=self.log_message)
+        render_desc = (f"{tuner.min_workers}-{tuner.max_workers} (otomatik, başlangıç {tuner.limit})"
+                       if tuner.autotune else str(tuner.max_workers))
+        self.log_message(f"Havuz boyutları: tarama 1, tarih/evrak no {processor.metadata_workers}, "
+                         f"dönüştürme {render_desc}")
+
         try:
-            with open(html_file, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
+            renderer = create_renderer(options, self.config, self.log_message, self.profile)
+        except ImportError as e:
+            summary["message"] = f"{options.renderer} dönüştürücüsü kullanılamıyor: {str(e)}"
+            return
+        except ValueError as e:
+            summary["message"] = str(e)
+            return
+        except Exception:
+            summary["message"] = "wkhtmltopdf bulunamadı. Lütfen https://wkhtmltopdf.org/downloads.html adresinden indirip kurun."
+            return
+        renderer.cancel_token = self.cancel_token
+        summary["renderer"] = renderer.version()
+        self.log_message(f"Dönüştürücü: {summary['renderer']}")
+
+        cache = None
+        if options.cache_max_bytes:
             try:
-                soup = BeautifulSoup(content, 'html.parser')
-                text_content = soup.get_text()
+                cache = PdfCache(options.cache_dir, max_bytes=options.cache_max_bytes)
             except Exception as e:
-                self.log_message(f"HTML parse hatası: {str(e)}. Düz metin olarak devam ediliyor.")
-                text_content = content
-
-            date_formats = ["%d.%m.%Y", "%d/%m/%Y", "%d-%m-%Y"]
-            primary_date_keywords = [
-                "Düzenleme Tarihi", "Düzenleme tarihi", "düzenleme tarihi",
-                "Belge Tarihi", "Belge tarihi", "belge tarihi",
-                "Fatura Tarihi", "Fatura tarihi", "fatura tarihi",
-                "Düzenlenme Tarihi", "e-Fatura Tarihi", "e-Arşiv Fatura Tarihi",
-                "Tarih", "tarih", "TARİH"
-            ]
-            primary_dates = []
-            all_other_dates = []
-
-            for keyword in primary_date_keywords:
-                patterns = [
-                    rf"{re.escape(keyword)}\s*[:=\-]?\s*(\d{{1,2}}\.\d{{1,2}}\.\d{{4}})",
-                    rf"{re.escape(keyword)}\s*[:=\-]?\s*(\d{{1,2}}/\d{{1,2}}/\d{{4}})",
-                    rf"{re.escape(keyword)}\s*[:=\-]?\s*(\d{{1,2}}-\d{{1,2}}-\d{{4}})"
-                ]
-                for pattern in patterns:
-                    matches = re.findall(pattern, text_content, re.IGNORECASE)
-                    for date_str in matches:
-                        for fmt in date_formats:
-                            try:
-                                date_obj = datetime.strptime(date_str, fmt)
-                                if not any(d[0] == date_obj for d in primary_dates):
-                                    primary_dates.append((date_obj, keyword))
-                                    self.log_message(f"Öncelikli '{keyword}' bulundu: {date_str} ({os.path.basename(html_file)})")
-                                break
-                            except ValueError:
-                                continue
-
-            if primary_dates:
-                invoice_date, _ = max(primary_dates, key=lambda x: x[0])
-                return invoice_date
-
-            date_patterns = [
-                r'\b(\d{1,2}\.\d{1,2}\.\d{4})\b',
-                r'\b(\d{1,2}/\d{1,2}/\d{4})\b',
-                r'\b(\d{1,2}-\d{1,2}-\d{4})\b'
-            ]
-            for pattern in date_patterns:
-                matches = re.findall(pattern, text_content)
-                for date_str in matches:
-                    for fmt in date_formats:
-                        try:
-                            date_obj = datetime.strptime(date_str, fmt)
-                            if not any(d[0] == date_obj for d in all_other_dates):
-                                all_other_dates.append((date_obj, "Genel Arama"))
-                            break
-                        except ValueError:
-                            continue
-
-            if not all_other_dates:
-                self.log_message(f"⚠️ Hiçbir tarih bulunamadı: {os.path.basename(html_file)}")
-                return None
+                self.log_message(f"⚠️ PDF önbelleği açılamadı, önbelleksiz devam ediliyor: {str(e)}")
+        self.profile.add_stage("setup", time.perf_counter() - setup_started, time.thread_time() - setup_cpu)
+        try:
+            self.profile.count("archive_bytes", os.path.getsize(self.zip_path))
+        except OSError:
+            pass
 
-            invoice_date, _ = max(all_other_dates, key=lambda x: x[0])
-            return invoice_date
-        except Exception as e:
-            self.log_message(f"⚠️ Tarih çıkarma hatası: {os.path.basename(html_file)} - {str(e)}")
-            return None
+        # Birleştirme, dönüştürmeler tamamlandıkça istenen sırayla akış halinde yapılır.
+        # Sıra ancak tüm tarihler belli olunca bilinir; o ana kadar gelen PDF'ler bekletilir.
+        merger = None
+        merged_path = None
+        early_results = {}
+        # Eşitleme kipinde birleştirme dönem dönem, hat bittikten sonra yapılır
+        manifest = RunManifest(self.output_folder, self.log_message) if options.sync else None
+        if manifest is not None and options.merge and options.volume_by:
+            self.log_message("Eşitleme kipinde birleşik çıktı zaten aylara bölünür; cilt seçeneği kullanılmıyor")
+        sync_results = {}
 
-    def find_files(self, folder, extensions):
-        """Belirtilen uzantılara sahip dosyaları bulur"""
-        found_files = []
-        for root_dir, _, files in os.walk(folder):
-            for file in files:
-                if os.path.splitext(file)[1].lower() in extensions:
-                    found_files.append(os.path.join(root_dir, file))
-        return found_files
-
-    def match_html_with_xml(self, html_files, xml_files):
-        """HTML ve XML dosyalarını eşleştirir ve tarihlerini çıkarır"""
-        self.log_message("HTML ve XML dosyaları eşleştiriliyor...")
-        files_with_dates = []
-        html_without_xml = []
-        
-        xml_dict = {}
-        for xml_file in xml_files:
-            key = os.path.splitext(os.path.basename(xml_file))[0]
-            xml_dict[key] = xml_file
-
-        def process_html(html_file):
-            base = os.path.splitext(os.path.basename(html_file))[0]
-            if base in xml_dict:
-                xml_file = xml_dict[base]
-                date = self.extract_date_from_xml(xml_file)
-                evrak_id = self.extract_evrak_id(xml_file)
-                if not date:
-                    self.log_message(f"⚠️ {base} için XML'de tarih bulunamadı. HTML'den çıkarılıyor.")
-                    date = self.extract_invoice_dates(html_file)
-                else:
-                    self.log_message(f"✓ HTML-XML eşleşmesi: {base} - Tarih: {date.strftime('%d.%m.%Y') if date else 'Bilinmiyor'}")
-                return (html_file, date, evrak_id, False)
+        # Disk bütçesi kipinde akış halinde birleştirilecek faturalar birleştirme sırasıyla
+        # dönüştürülür; ara PDF'ler sıralarını beklerken geçici klasörde birikmez
+        render_order = None
+        if self.temp_budget.enabled and options.merge:
+            if manifest is not None or options.volume_by:
+                self.temp_budget.throttle = False
+                self.log_message("⚠️ Disk bütçesi: ciltlere bölmede ve eşitlemede ara PDF'ler birleştirmeye "
+                                 "kadar geçici klasörde kalır, bütçe aşılabilir")
             else:
-                self.log_message(f"⚠️ {base} için eşleşen XML bulunamadı. HTML'den tarih çıkarılıyor.")
-                date = self.extract_invoice_dates(html_file)
-                return (html_file, date, None, True)
+                render_order = self._merge_order
 
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            results = list(executor.map(process_html, html_files))
-            
-        for html_file, date, evrak_id, no_xml in results:
-            files_with_dates.append((html_file, date, evrak_id))
-            if no_xml:
-                html_without_xml.append(html_file)
-                
-        self.log_message(f"Toplam {len(html_files)} HTML dosyasından:")
-        self.log_message(f"- {len(html_files) - len(html_without_xml)} dosya XML ile eşleştirildi")
-        self.log_message(f"- {len(html_without_xml)} dosya için XML bulunamadı")
-        return files_with_dates
-
-    def convert_html_to_pdf(self, html_file, output_path, config, pdf_options):
-        """HTML dosyasını PDF'e dönüştürür. Hata durumunda alternatif yöntemleri dener."""
-        base_name = os.path.basename(html_file)
-        try:
-            pdfkit.from_file(html_file, output_path, configuration=config, options=pdf_options)
-            return True, ""
-        except Exception as e1:
-            error_detail = str(e1)
-            self.log_message(f"⚠️ İlk deneme hatası: {base_name} - {error_detail}")
+        # Ayrı kayıtta PDF'ler geçici klasör yerine doğrudan çıktı klasörüne
+        # dönüştürülür; adlar bellekte planlanır, klasör yalnızca bir kez listelenir
+        output_sub = None
+        target_for = None
+        # İptalde çıktı klasörüne bu çalıştırmada yazılan PDF'ler silinir
+        planned_targets = []
+        if not options.merge:
+            if manifest is not None:
+                output_sub = os.path.join(self.output_folder, SYNC_SPLIT_FOLDER)
+            else:
+                output_sub = self._plan_split_folder()
+            os.makedirs(output_sub, exist_ok=True)
+            planner = OutputNamePlanner(output_sub)
+
+            def target_for(idx, invoice_date, evrak_id):
+                path = planner.reserve(split_pdf_name(idx, invoice_date, evrak_id))
+                planned_targets.append(path)
+                return path
+
+        # Birleştirilen ilk ara PDF, birleşik çıktı kapanana kadar silinmez: yalnızca
+        # bir PDF kalırsa birleştirme bırakılır ve bu PDF klasöre kaydedilir
+        held_pdfs = []
+
+        def release_merged(pdf_path):
+            if not held_pdfs:
+                held_pdfs.append(pdf_path)
+            else:
+                self.temp_budget.release(pdf_path)
+
+        def on_dates(files_with_dates):
+            nonlocal merger, merged_path
+            # Ciltlere bölmede birleştirme, tüm PDF'ler hazır olunca ciltler halinde yapılır
+            if manifest is not None or options.volume_by or not options.merge or len(files_with_dates) <= 1:
+                return
+            merged_path = self._plan_merged_path()
+            order = self._merge_order(files_with_dates)
+            os.makedirs(self.output_folder, exist_ok=True)
+            merger = OrderedPdfMerger(merged_path + ".tmp", self.log_message, optimize=options.optimize_pdf,
+                                      cancel_token=self.cancel_token, on_merged=release_merged)
+            for idx, pdf_path in early_results.items():
+                merger.add(idx, pdf_path)
+            early_results.clear()
+            merger.set_order(order)
+
+        def on_result(idx, pdf_path):
+            if manifest is not None:
+                if pdf_path:
+                    sync_results[idx] = pdf_path
+            elif merger:
+                merger.add(idx, pdf_path)
+            elif options.merge:
+                early_results[idx] = pdf_path
+
+        # Arşiv diske çıkarılmadan okunur; tarama, tarih çıkarma, dönüştürme ve
+        # birleştirme aşamaları hat halinde eş zamanlı yürür. Yalnızca dönüştürülecek
+        # HTML'ler dönüştürmeden hemen önce extract_dir altına yazılır.
+        with ZipSource(self.zip_path, extract_dir, self.log_message, limits=options.archive_limits,
+                       cancel_token=self.cancel_token, temp_budget=self.temp_budget) as source:
+            self.update_status("Faturalar taranıyor ve PDF'e dönüştürülüyor...", 30)
+            pipeline = InvoicePipeline(
+                processor, source, self.temp_dir, renderer,
+                batch_size=options.batch_size if renderer.supports_batch else 1, cache=cache, executor=self.executor,
+                status_callback=self.update_status, profile=self.profile, tuner=tuner,
+                dedup=options.dedup, manifest=manifest, merged=options.merge, target_for=target_for,
+                cancel_token=self.cancel_token, temp_budget=self.temp_budget, render_order=render_order,
+                progress=self.progress
+            )
             try:
-                self.log_message(f"Alternatif dönüştürme deneniyor: {base_name}")
-                simplified_options = {"enable-local-file-access": ""}
-                pdfkit.from_file(html_file, output_path, configuration=config, options=simplified_options)
-                return True, ""
-            except Exception as e2:
-                error_detail = str(e2)
-                self.log_message(f"⚠️ İkinci deneme başarısız: {base_name} - {error_detail}")
+                html_files_with_dates, pdf_files_with_info, conversion_errors = pipeline.run(on_dates, on_result)
+                check_cancelled(self.cancel_token)
+            except BaseException as e:
+                if merger:
+                    merger.abort()
+                if isinstance(e, JobCancelled):
+                    for path in planned_targets:
+                        try:
+                            os.remove(path)
+                        except OSError:
+                            pass
+                _remove_empty_dir(output_sub)
+                raise
+            summary["html_count"] = pipeline.html_count
+            summary["xml_count"] = pipeline.xml_count
+            summary["xml_only_count"] = pipeline.xml_only_count
+            summary["duplicates"] = pipeline.duplicates
+            source.budget.record(self.profile)
+            if source.budget.skipped_members or source.budget.skipped_archives:
+                summary["skipped_archive_members"] = source.budget.skipped_members + source.budget.skipped_archives
+            summary["concurrency"] = {"scan": 1, "metadata": processor.metadata_workers, "render": tuner.summary()}
+            if tuner.autotune:
+                self.log_message(f"Dönüştürme eşzamanlılığı: başlangıç {tuner.initial}, "
+                                 f"en yüksek {tuner.peak}, son {tuner.limit}")
+
+        # Birleştirmenin kapanışı veya ayrı PDF'lerin kopyalanması
+        with self.profile.stage("finalize"):
+            if not html_files_with_dates:
+                _remove_empty_dir(output_sub)
+                summary["message"] = "Hiçbir HTML dosyası bulunamadı."
+                return
+
+            errors.extend(conversion_errors)
+            summary["quarantine"] = list(renderer.quarantine)
+            if renderer.quarantine:
+                by_category = {}
+                for item in renderer.quarantine:
+                    label = RENDER_ERROR_LABELS[item["category"]]
+                    by_category[label] = by_category.get(label, 0) + 1
+                self.log_message(f"Karantina: {len(renderer.quarantine)} fatura ("
+                                 + ", ".join(f"{label} {count}" for label, count in by_category.items()) + ")")
+            summary["errors"] = [{"evrak_id": evrak_id, "reason": reason} for evrak_id, reason in errors]
+            summary["error_count"] = len(errors)
+            dedup_msg = f" ({len(summary['duplicates'])} yinelenen fatura atlandı)" if summary["duplicates"] else ""
+            cache_msg = ""
+            if cache is not None:
+                summary["cache"] = {"hits": cache.hits, "misses": cache.misses}
+                cache_msg = f" Önbellek: {cache.hits} isabet, {cache.misses} yeni dönüştürme."
+                self.log_message(f"PDF önbelleği: {cache.hits} isabet, {cache.misses} ıska")
+            if manifest is not None:
+                self._finish_sync(summary, manifest, html_files_with_dates, sync_results, pipeline, errors,
+                                  dedup_msg + cache_msg)
+                return
+            pdf_files = [p for (p, _, _) in pdf_files_with_info if p is not None]
+
+            if options.merge and options.volume_by and len(pdf_files) > 1:
+                self._finish_volumes(summary, html_files_with_dates, early_results, errors, dedup_msg + cache_msg)
+                return
+
+            if merger and len(pdf_files) <= 1:
+                # Tek PDF kaldıysa birleştirme yerine klasöre kaydedilir
+                merger.abort()
+                merger = None
+
+            if not pdf_files:
+                _remove_empty_dir(output_sub)
+                summary["message"] = "Hiçbir PDF dosyası oluşturulamadı."
+                return
+
+            os.makedirs(self.output_folder, exist_ok=True)
+            if merger:
+                self.update_status("PDF dosyaları birleştiriliyor...", 80)
                 try:
-                    self.log_message(f"Son deneme: {base_name}")
-                    with open(html_file, 'r', encoding='utf-8', errors='ignore') as f:
-                        html_content = f.read()
-                    pdfkit.from_string(html_content, output_path, configuration=config, options=simplified_options)
-                    return True, ""
-                except Exception as e3:
-                    error_detail = str(e3)
-                    self.log_message(f"✗ Tüm denemeler başarısız: {base_name} - {error_detail}")
-                    return False, error_detail
-
-    def convert_html_to_pdf_parallel(self, html_files_with_dates, temp_dir, config, pdf_options, update_status_callback=None):
-        """Birden fazla HTML dosyasını paralel olarak PDF'e dönüştürür"""
-        pdf_files_with_info = []
-        error_list = []
-        total_files = len(html_files_with_dates)
-
-        def convert_one_file(idx, html_file, invoice_date, evrak_id):
-            if update_status_callback:
-                progress = 50 + (30 * (idx + 1) / total_files)
-                update_status_callback(f"Dönüştürülüyor: {os.path.basename(html_file)}", progress)
-            if invoice_date:
-                dstr = invoice_date.strftime("%Y%m%d")
-                pdf_name = f"fatura_{dstr}_{idx+1}.pdf"
+                    merger.close()
+                    self._record_merge_dedup(merger.writer)
+                    merge_success_count = merger.success_count
+                    merge_error_count = merger.error_count
+                    if merge_success_count > 0:
+                        os.replace(merger.writer.output_path, merged_path)
+                        self.profile.count("output_bytes", os.path.getsize(merged_path))
+                        for pdf_path in held_pdfs:
+                            self.temp_budget.release(pdf_path)
+                except JobCancelled:
+                    merger.abort()
+                    raise
+                except Exception as e:
+                    merger.abort()
+                    summary["message"] = f"PDF birleştirilirken hata: {str(e)}"
+                    return
+
+                if merge_success_count > 0:
+                    self.update_status(f"Birleştirilmiş PDF kaydedildi: {os.path.basename(merged_path)}", 100)
+                    self.log_message(f"Kayıt konumu: {merged_path}")
+                    result_msg = f"{merge_success_count} fatura birleştirildi ve kaydedildi."
+                    if merge_error_count > 0:
+                        result_msg += f" ({merge_error_count} fatura birleştirilemedi)"
+                    if len(errors) > 0:
+                        result_msg += f" ({len(errors)} fatura dönüştürülemedi)"
+                    result_msg += dedup_msg + cache_msg
+                    summary.update({
+                        "status": "ok",
+                        "message": result_msg,
+                        "output": merged_path,
+                        "merged": True,
+                        "pdf_count": merge_success_count,
+                        "merge_error_count": merge_error_count,
+                        "error_count": len(errors) + merge_error_count,
+                    })
+                else:
+                    merger.abort()
+                    summary["message"] = "Hiçbir PDF birleştirilemedi."
             else:
-                pdf_name = f"fatura_tarihsiz_{idx+1}.pdf"
-            pdf_path = os.path.join(temp_dir, pdf_name)
-            success, error = self.convert_html_to_pdf(html_file, pdf_path, config, pdf_options)
-            if success:
-                return (pdf_path, invoice_date, evrak_id, None)
+                success_count = 0
+                if output_sub is None:
+                    # Birleştirme istendi ama tek PDF kaldı: geçici klasörden taşınır
+                    self.update_status("PDF dosyaları kopyalanıyor...", 80)
+                    output_sub = self._plan_split_folder()
+                    os.makedirs(output_sub, exist_ok=True)
+                    planner = OutputNamePlanner(output_sub)
+                    for i, (pdf, invoice_date, evrak_id) in enumerate(pdf_files_with_info):
+                        if self._save_pdf(pdf, planner, split_pdf_name(i, invoice_date, evrak_id), evrak_id, errors):
+                            success_count += 1
+                else:
+                    # PDF'ler dönüştürülürken yerlerine yazıldı
+                    for pdf, _, _ in pdf_files_with_info:
+                        self.log_message(f"✓ Kaydedildi: {os.path.basename(pdf)}")
+                        success_count += 1
+                    self.profile.count("output_bytes", self.profile.counters.get("pdf_bytes", 0))
+                if not success_count:
+                    _remove_empty_dir(output_sub)
+                    summary["message"] = "Hiçbir PDF dosyası kaydedilemedi."
+                    summary["errors"] = [{"evrak_id": evrak_id, "reason": reason} for evrak_id, reason in errors]
+                    summary["error_count"] = len(errors)
+                    return
+                self.update_status(f"{success_count} PDF dosyası kaydedildi.", 100)
+                self.log_message(f"Kayıt konumu: {output_sub}")
+                result_msg = f"{success_count} fatura PDF'e dönüştürüldü ve kaydedildi."
+                if len(errors) > 0:
+                    result_msg += f" ({len(errors)} fatura dönüştürülemedi)"
+                result_msg += dedup_msg + cache_msg
+                summary.update({
+                    "status": "ok",
+                    "message": result_msg,
+                    "output": output_sub,
+                    "merged": False,
+                    "pdf_count": success_count,
+                    "errors": [{"evrak_id": evrak_id, "reason": reason} for evrak_id, reason in errors],
+                    "error_count": len(errors),
+                })
+
+
+class BatchEngine:
+    """
+    Birden çok ZIP arşivini GUI olmadan işler. Tüm işler tek ve sınırlı bir
+    dönüştürme havuzunu paylaşır; aynı anda birkaç iş yürütüldüğü için bir işin
+    eşleştirme veya birleştirme aşamasında çekirdekler diğer işin
+    dönüştürmeleriyle dolu kalır. Her işin çıktısı ve JSON özeti, çıktı
+    klasöründe ZIP adıyla açılan alt klasöre yazılır.
+    """
+    def __init__(self, options, log_callback=None, parallel_jobs=2, progress_callback=None):
+        """
+        :param progress_callback: Verilirse her işin ilerlemesinde (zip_path, snapshot)
+                                  ile çağrılır (bkz. ProgressTracker.snapshot)
+        """
+        self.options = options
+        self.log_callback = log_callback
+        self.parallel_jobs = max(1, parallel_jobs)
+        self.progress_callback = progress_callback
+        # Tüm işler için ortak iptal bayrağı (Ctrl+C veya cancel_token.cancel())
+        self.cancel_token = CancelToken()
+
+    def log_message(self, message):
+        if self.log_callback:
+            self.log_callback(message)
+
+    @staticmethod
+    def collect_zip_paths(inputs):
+        """Dosya ve klasör girdilerinden işlenecek ZIP yollarını toplar"""
+        zip_paths = []
+        for item in inputs:
+            if os.path.isdir(item):
+                for name in sorted(os.listdir(item)):
+                    if name.lower().endswith('.zip') and os.path.isfile(os.path.join(item, name)):
+                        zip_paths.append(os.path.join(item, name))
             else:
-                return (None, invoice_date, evrak_id, (evrak_id if evrak_id else "Bilinmiyor", f"Dönüştürme hatası: {error}"))
-
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            futures = []
-            for idx, (html_file, invoice_date, evrak_id) in enumerate(html_files_with_dates):
-                futures.append(executor.submit(convert_one_file, idx, html_file, invoice_date, evrak_id))
-            for future in futures:
-                pdf_path, invoice_date, evrak_id, error = future.result()
-                if pdf_path:
-                    pdf_files_with_info.append((pdf_path, invoice_date, evrak_id))
-                if error:
-                    error_list.append(error)
-        return pdf_files_with_info, error_list
+                zip_paths.append(item)
+        return zip_paths
+
+    def run(self, zip_paths, output_folder):
+        """ZIP'leri işler ve iş özetlerinin listesini (girdi sırasıyla) döndürür"""
+        # wkhtmltopdf bir kez aranır; xhtml2pdf'in sıcak süreç havuzu zaten tüm işlerce paylaşılır
+        config = None
+        if self.options.renderer == "wkhtmltopdf":
+            config = find_wkhtmltopdf(self.options.wkhtmltopdf_path, self.log_message)
+        temp_root = tempfile.mkdtemp(prefix="skub_")
+        used_names = set()
+        jobs = []
+        for zip_path in zip_paths:
+            name = os.path.splitext(os.path.basename(zip_path))[0]
+            unique = name
+            cnt = 1
+            while unique.lower() in used_names:
+                unique = f"{name}_{cnt}"
+                cnt += 1
+            used_names.add(unique.lower())
+            jobs.append((zip_path, os.path.join(output_folder, unique), os.path.join(temp_root, f"is_{len(jobs) + 1}")))
+
+        # Ortak havuzdaki toplam dönüştürme sayısını tüm işler için tek ayarlayıcı belirler
+        tuner = RenderAutotuner(self.options.max_workers, autotune=self.options.autotune_render,
+                                log_callback=self.log_message)
+
+        def run_job(zip_path, job_output, job_temp):
+            prefix = f"[{os.path.basename(zip_path)}] "
+            job = InvoiceJob(
+                zip_path, job_output, self.options, job_temp,
+                log_callback=lambda message: self.log_message(prefix + message),
+                config=config, executor=render_pool, tuner=tuner, cancel_token=self.cancel_token
+            )
+            if self.progress_callback:
+                job.progress.add_observer(lambda snapshot: self.progress_callback(zip_path, snapshot))
+            try:
+                return job.run()
+            finally:
+                shutil.rmtree(job_temp, ignore_errors=True)
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.options.max_workers) as render_pool, \
+                    ThreadPoolExecutor(max_workers=self.parallel_jobs) as job_pool:
+                futures = [job_pool.submit(run_job, *job) for job in jobs]
+                try:
+                    return [future.result() for future in futures]
+                except KeyboardInterrupt:
+                    # İşler iptal edilir; çalışan dönüştürmeler sonlandırılır, işler temizlik yapıp döner
+                    self.log_message("İptal ediliyor, çalışan dönüştürmeler durduruluyor...")
+                    self.cancel_token.cancel()
+                    return [future.result() for future in futures]
+        finally:
+            XhtmlToPdfRenderer.shutdown_pool()
+            shutil.rmtree(temp_root, ignore_errors=True)
+
+
+def run_headless(argv=None):
+    """Komut satırı girişi: ZIP'leri GUI olmadan işler. Çıkış kodu döndürür."""
+    parser = argparse.ArgumentParser(
+        prog="skub",
+        description="ZIP içindeki HTML/XML faturaları GUI olmadan PDF'e dönüştürür."
+    )
+    parser.add_argument("inputs", nargs="+", help="ZIP dosyaları veya ZIP içeren klasörler")
+    parser.add_argument("-o", "--output", required=True, help="çıktı klasörü (her ZIP için alt klasör açılır)")
+    parser.add_argument("--no-merge", action="store_true", help="PDF'leri birleştirme, klasöre ayrı ayrı kaydet")
+    parser.add_argument("--no-sort", action="store_true", help="birleştirirken tarihe göre sıralama")
+    parser.add_argument("--no-dedup", action="store_true",
+                        help="aynı evrak no veya aynı içerikli yinelenen faturaları ayıklama")
+    parser.add_argument("--no-xml-only", action="store_true",
+                        help="HTML'i olmayan XML faturaları gömülü XSLT ile dönüştürme (varsayılan: lxml kuruluysa dönüştürülür)")
+    parser.add_argument("--sync", action="store_true",
+                        help="çıktı klasöründeki manifeste göre yalnızca yeni faturaları üret ve ekle "
+                             "(birleştirmede yalnızca değişen aylar yeniden yazılır)")
+    volume_group = parser.add_mutually_exclusive_group()
+    volume_group.add_argument("--max-volume-mb", type=float, default=None,
+                              help="birleşik PDF'i en fazla bu boyutta (MB) ciltlere böl")
+    volume_group.add_argument("--max-volume-pages", type=int, default=None,
+                              help="birleşik PDF'i en fazla bu kadar sayfalık ciltlere böl")
+    volume_group.add_argument("--volume-by-month", action="store_true",
+                              help="birleşik PDF'i fatura ayına göre ciltlere böl")
+    parser.add_argument("--no-optimize-pdf", action="store_true",
+                        help="birleşik PDF'te ortak yazı tipi/resimleri paylaşma ve nesne akışı kullanma (PDF 1.4)")
+    parser.add_argument("--order", choices=["asc", "desc"], default="asc", help="sıralama yönü (varsayılan: asc)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="ortak dönüştürme havuzunun boyutu (otomatik ayarda üst sınır)")
+    parser.add_argument("--metadata-workers", type=int, default=None, help="tarih/evrak no çıkarma iş parçacığı sayısı")
+    parser.add_argument("--no-autotune", action="store_true",
+                        help="dönüştürme eşzamanlılığını otomatik ayarlama, --workers kadar sabit tut")
+    parser.add_argument("--jobs", type=int, default=2, help="aynı anda işlenecek ZIP sayısı (varsayılan: 2)")
+    parser.add_argument("--renderer", choices=RENDERERS, default="wkhtmltopdf",
+                        help="HTML -> PDF dönüştürücüsü (varsayılan: wkhtmltopdf; xhtml2pdf için pip install xhtml2pdf)")
+    parser.add_argument("--batch-size", type=int, default=1, help="tek wkhtmltopdf çağrısındaki fatura sayısı")
+    parser.add_argument("--render-timeout", type=float, default=RENDER_TIMEOUT_SEC,
+                        help=f"tek dönüştürmenin süre sınırı, sn (0: sınırsız, varsayılan: {RENDER_TIMEOUT_SEC})")
+    parser.add_argument("--max-expanded-gb", type=float, default=ARCHIVE_MAX_EXPANDED_BYTES / 1024 ** 3,
+                        help="bir ZIP'in iç ZIP'lerle birlikte açılabilecek toplam boyutu, GB "
+                             f"(varsayılan: {ARCHIVE_MAX_EXPANDED_BYTES // 1024 ** 3})")
+    parser.add_argument("--max-entries", type=int, default=ARCHIVE_MAX_ENTRIES,
+                        help=f"bir ZIP'teki en fazla dosya sayısı (varsayılan: {ARCHIVE_MAX_ENTRIES})")
+    parser.add_argument("--temp-budget-mb", type=float, default=None,
+                        help="disk bütçesi: geçici klasör kullanımı üst sınırı, MB; ara dosyalar işleri "
+                             "biter bitmez silinir (varsayılan: sınırsız)")
+    parser.add_argument("--cache-dir", default=None, help="PDF önbellek klasörü")
+    parser.add_argument("--cache-size-mb", type=int, default=DEFAULT_PDF_CACHE_BYTES // (1024 * 1024),
+                        help="PDF önbelleği boyut sınırı, MB (0: kapalı)")
+    parser.add_argument("--wkhtmltopdf", default=None, help="wkhtmltopdf çalıştırılabilir dosyasının yolu")
+    parser.add_argument("--report", action="store_true", help="her iş için ayrıntılı çalıştırma raporu (JSON) yaz")
+    parser.add_argument("--cprofile", action="store_true", help="raporla birlikte cProfile istatistikleri (.prof) yaz")
+    parser.add_argument("--tracemalloc", action="store_true", help="raporda bellek ayırmalarını (tracemalloc) göster")
+    parser.add_argument("-q", "--quiet", action="store_true", help="yalnızca iş özetlerini yaz")
+    args = parser.parse_args(argv)
+
+    volume_by, volume_limit = None, None
+    if args.max_volume_mb:
+        volume_by, volume_limit = "size", args.max_volume_mb
+    elif args.max_volume_pages:
+        volume_by, volume_limit = "pages", args.max_volume_pages
+    elif args.volume_by_month:
+        volume_by = "month"
+    options = RunOptions(
+        merge=not args.no_merge,
+        sort_by_date=not args.no_sort,
+        sort_order=args.order,
+        dedup=not args.no_dedup,
+        xml_only=not args.no_xml_only,
+        sync=args.sync,
+        optimize_pdf=not args.no_optimize_pdf,
+        temp_budget_mb=args.temp_budget_mb,
+        volume_by=volume_by,
+        volume_limit=volume_limit,
+        archive_limits=ArchiveLimits(max_expanded_bytes=int(args.max_expanded_gb * 1024 ** 3),
+                                     max_entries=args.max_entries),
+        batch_size=args.batch_size,
+        cache_max_bytes=args.cache_size_mb * 1024 * 1024,
+        cache_dir=args.cache_dir,
+        wkhtmltopdf_path=args.wkhtmltopdf,
+        renderer=args.renderer,
+        render_timeout=args.render_timeout,
+        max_workers=args.workers,
+        metadata_workers=args.metadata_workers,
+        autotune_render=not args.no_autotune,
+        write_summary=True,
+        report=args.report or args.cprofile or args.tracemalloc,
+        cprofile=args.cprofile,
+        tracemalloc=args.tracemalloc,
+    )
+    log_lock = threading.Lock()
+
+    def log(message):
+        if args.quiet:
+            return
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        with log_lock:
+            print(f"[{timestamp}] {message}", flush=True)
+
+    # Dönüştürme ilerlemesi iş başına en fazla PROGRESS_LOG_INTERVAL_SEC'de bir yazılır
+    progress_lock = threading.Lock()
+    progress_logged = {}
+
+    def log_progress(zip_path, snapshot):
+        finished = snapshot["total"] is not None and snapshot["completed"] >= snapshot["total"]
+        now = time.monotonic()
+        with progress_lock:
+            last = progress_logged.get(zip_path)
+            if last == "finished" or (not finished and last is not None and now - last < PROGRESS_LOG_INTERVAL_SEC):
+                return
+            progress_logged[zip_path] = "finished" if finished else now
+        log(f"[{os.path.basename(zip_path)}] {format_progress(snapshot)}")
+
+    zip_paths = BatchEngine.collect_zip_paths(args.inputs)
+    if not zip_paths:
+        print("İşlenecek ZIP dosyası bulunamadı.", file=sys.stderr)
+        return 2
+    try:
+        summaries = BatchEngine(options, log, parallel_jobs=args.jobs,
+                                progress_callback=None if args.quiet else log_progress).run(zip_paths, args.output)
+    except IOError as e:
+        print(f"wkhtmltopdf bulunamadı: {str(e)}", file=sys.stderr)
+        return 2
+
+    failed = 0
+    for summary in summaries:
+        mark = "✓" if summary["status"] == "ok" else "✗"
+        if summary["status"] != "ok":
+            failed += 1
+        print(f"{mark} {os.path.basename(summary['zip_path'])}: {summary['message']}")
+    if any(summary["status"] == "cancelled" for summary in summaries):
+        # Ctrl+C ile kesilen süreçlerin geleneksel çıkış kodu
+        return 130
+    return 1 if failed else 0
 
 
 # ***** Grafiksel Arayüz ve Uygulama: sKub *****
+# İşlem penceresindeki log kutusunun yenilenme aralığı (ms) ve tutulan en fazla satır
+LOG_FLUSH_INTERVAL_MS = 50
+LOG_MAX_LINES = 2000
+# Uygulama kapatılırken iptal edilen işin temizliği için en fazla beklenen süre (sn)
+GUI_CANCEL_JOIN_TIMEOUT_SEC = 10
+
 class SCubeTR:
     def __init__(self, root):
         self.root = root
@@ -361,13 +4736,37 @@ class SCubeTR:
         
         # RAM OPTİMİZASYONU: self.logs listesi kaldırıldı.
         # Artık loglar bellekte tutulmuyor, sadece anlık ekrana basılıp unutuluyor.
-        
+        # İş parçacıkları logları bu halkaya ekler (deque.append kilitsizdir ve
+        # beklemez); Tk iş parçacığı halkayı belirli aralıklarla toplu boşaltır.
+        self.log_queue = deque(maxlen=LOG_MAX_LINES)
+        self.pending_status = None
+        self.pending_progress = None
+
         self.error_list = []
         self.process_running = False
         self.process_win = None
-        self.max_workers = max(2, multiprocessing.cpu_count() - 1)
+        # Çalışan işin iptal bayrağı ve iş parçacığı (İptal düğmesi, pencere kapatma)
+        self.cancel_token = None
+        self.process_thread = None
+        self.max_workers = default_render_workers()
+        # Tek wkhtmltopdf çağrısında dönüştürülecek fatura sayısı (1: her fatura ayrı)
+        self.batch_size = 1
+        # HTML -> PDF dönüştürücüsü (RENDERERS)
+        self.renderer_name = "wkhtmltopdf"
+        # Yinelenen faturalar dönüştürülmeden ayıklansın mı
+        self.dedup = True
+        # Birleşik PDF'in ciltlere bölünmesi (VOLUME_MODES, None: tek dosya) ve sınırı
+        self.volume_by = None
+        self.volume_limit = None
+        # Dönüştürülmüş PDF önbelleğinin boyut sınırı (0: önbellek kapalı)
+        self.cache_max_bytes = DEFAULT_PDF_CACHE_BYTES
+        # Disk bütçesi: geçici klasör kullanımı üst sınırı (MB, None: sınırsız)
+        self.temp_budget_mb = None
+        # Çıktı klasörüne çalıştırma raporu (JSON) yazılsın mı
+        self.write_report = False
 
         self.create_widgets()
+        self.root.after(LOG_FLUSH_INTERVAL_MS, self.flush_log_queue)
 
     def set_theme(self):
         """Modern görünüm için temayı ayarla"""
@@ -448,9 +4847,14 @@ class SCubeTR:
         options_frame = ttk.LabelFrame(main_frame, text="PDF Seçenekleri", style="Frame.TLabelframe")
         options_frame.pack(fill=tk.X, pady=10, padx=5)
 
+        merge_frame = ttk.Frame(options_frame)
+        merge_frame.pack(fill=tk.X, padx=10, pady=5)
         self.merge_var = tk.BooleanVar(value=True)
-        merge_check = ttk.Checkbutton(options_frame, text="PDF'leri Birleştir", variable=self.merge_var, command=self.toggle_sort_option)
-        merge_check.pack(anchor=tk.W, padx=10, pady=5)
+        merge_check = ttk.Checkbutton(merge_frame, text="PDF'leri Birleştir", variable=self.merge_var, command=self.toggle_sort_option)
+        merge_check.pack(side=tk.LEFT)
+        self.sync_var = tk.BooleanVar(value=False)
+        sync_check = ttk.Checkbutton(merge_frame, text="Yalnızca yeni faturaları ekle (aylık birleştir)", variable=self.sync_var)
+        sync_check.pack(side=tk.LEFT, padx=(30, 0))
 
         sort_frame = ttk.Frame(options_frame)
         sort_frame.pack(fill=tk.X, padx=10, pady=5)
@@ -575,194 +4979,50 @@ class SCubeTR:
 
     def on_closing(self):
         """Uygulama kapatılırken çağrılır"""
+        if self.process_running and self.cancel_token is not None:
+            # Çalışan iş iptal edilir; geçici klasör, iş onu kullanmayı bırakınca silinir
+            self.cancel_token.cancel()
+            if self.process_thread is not None:
+                self.process_thread.join(GUI_CANCEL_JOIN_TIMEOUT_SEC)
         try:
             shutil.rmtree(self.temp_dir)
         except Exception:
             pass
+        XhtmlToPdfRenderer.shutdown_pool()
         self.root.destroy()
 
-    def process_files_thread(self):
+    def process_files_thread(self, options, open_after_merge, cancel_token):
         """Dosyaları işleyen ana iş parçacığı"""
         try:
             # RAM temizliği: Logs listesi olmadığı için temizlemeye gerek yok.
             self.error_list.clear()
-            self.update_proc_status("İşlem başlatılıyor...", 0)
-
-            # Temp klasörünü temizle
-            for file in os.listdir(self.temp_dir):
-                path = os.path.join(self.temp_dir, file)
-                if os.path.isfile(path):
-                    os.unlink(path)
-                elif os.path.isdir(path):
-                    shutil.rmtree(path)
-
-            self.update_proc_status("Zip dosyası açılıyor...", 10)
-            extract_dir = os.path.join(self.temp_dir, "extracted")
-            os.makedirs(extract_dir, exist_ok=True)
+            job = InvoiceJob(self.zip_path, self.output_folder, options, self.temp_dir,
+                             log_callback=self.log_message, status_callback=self.update_proc_status,
+                             cancel_token=cancel_token)
+            job.progress.add_observer(self.update_proc_progress)
+            summary = job.run()
+            self.error_list.extend((err["evrak_id"], err["reason"]) for err in summary["errors"])
 
-            processor = InvoiceProcessor(self.log_message)
-            processor.extract_zip_recursively(self.zip_path, extract_dir)
-
-            self.update_proc_status("Dosyalar aranıyor...", 30)
-            html_files = processor.find_files(extract_dir, ['.html', '.htm'])
-            xml_files = processor.find_files(extract_dir, ['.xml'])
+            if summary["status"] == "cancelled":
+                message = summary["message"]
+                self.root.after(0, lambda: self.show_result_in_process_window(message, 0))
+                return
 
-            if not html_files:
-                self.root.after(0, lambda: messagebox.showerror("Hata", "Hiçbir HTML dosyası bulunamadı."))
+            if summary["status"] != "ok":
+                message = summary["message"]
+                self.root.after(0, lambda: messagebox.showerror("Hata", message))
                 self.finish_process()
                 return
 
-            self.update_proc_status(f"Bulunan HTML dosyası sayısı: {len(html_files)}", 30)
-            self.log_message(f"Bulunan HTML: {len(html_files)}  |  XML: {len(xml_files)}")
-
-            self.update_proc_status("Fatura tarihleri ve evrak numaraları tespit ediliyor...", 40)
-            html_files_with_dates = processor.match_html_with_xml(html_files, xml_files)
-
-            wkhtmltopdf_path = r'C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe'
-            if not os.path.exists(wkhtmltopdf_path):
-                self.update_proc_status("wkhtmltopdf bulunamadı. Sistem yolunu kontrol etme...", 40)
+            if summary.get("merged") and open_after_merge:
+                merged_path = summary["output"]
                 try:
-                    config = pdfkit.configuration()
-                    self.log_message("wkhtmltopdf sistem yolunda bulundu.")
+                    os.startfile(merged_path)
                 except Exception:
-                    self.root.after(0, lambda: messagebox.showerror("Hata", 
-                        "wkhtmltopdf bulunamadı. Lütfen https://wkhtmltopdf.org/downloads.html adresinden indirip kurun."))
-                    self.finish_process()
-                    return
-            else:
-                config = pdfkit.configuration(wkhtmltopdf=wkhtmltopdf_path)
-                self.update_proc_status(f"wkhtmltopdf bulundu: {wkhtmltopdf_path}", 40)
-
-            pdf_options = {
-                "enable-local-file-access": "",
-                "encoding": "UTF-8",
-                "page-size": "A4",
-                "margin-top": "10mm",
-                "margin-right": "10mm",
-                "margin-bottom": "10mm",
-                "margin-left": "10mm"
-            }
-
-            self.update_proc_status("HTML dosyaları PDF'e dönüştürülüyor...", 50)
-            pdf_files_with_info, conversion_errors = processor.convert_html_to_pdf_parallel(
-                html_files_with_dates,
-                self.temp_dir,
-                config,
-                pdf_options,
-                self.update_proc_status
-            )
-
-            self.error_list.extend(conversion_errors)
-            pdf_files = [p for (p, _, _) in pdf_files_with_info if p is not None]
-
-            if not pdf_files:
-                self.root.after(0, lambda: messagebox.showerror("Hata", "Hiçbir PDF dosyası oluşturulamadı."))
-                self.finish_process()
-                return
-
-            if self.merge_var.get() and len(pdf_files) > 1:
-                self.update_proc_status("PDF dosyaları birleştiriliyor...", 80)
-                ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-                if self.sort_by_date_var.get():
-                    order_str = "eskiden_yeniye" if self.sort_order.get() == "asc" else "yeniden_eskiye"
-                    merged_name = f"birlesik_faturalar_{order_str}_{ts}.pdf"
-                else:
-                    merged_name = f"birlesik_faturalar_{ts}.pdf"
-                merged_path = os.path.join(self.output_folder, merged_name)
-                cnt = 1
-                while os.path.exists(merged_path):
-                    merged_name = f"birlesik_faturalar_{ts}_{cnt}.pdf"
-                    merged_path = os.path.join(self.output_folder, merged_name)
-                    cnt += 1
-
-                merger = PdfMerger()
-                merge_success_count = 0
-                merge_error_count = 0
-
-                if self.sort_by_date_var.get():
-                    sorted_files = sorted(
-                        [(pdf, date, eid) for pdf, date, eid in pdf_files_with_info if pdf is not None],
-                        key=lambda x: x[1] if x[1] else datetime.min,
-                        reverse=(self.sort_order.get() == "desc")
-                    )
-                    pdf_files_to_merge = [item[0] for item in sorted_files]
-                else:
-                    pdf_files_to_merge = pdf_files
-
-                for pdf in pdf_files_to_merge:
-                    try:
-                        merger.append(pdf)
-                        merge_success_count += 1
-                    except Exception as e:
-                        self.log_message(f"⚠️ Birleştirme hatası: {os.path.basename(pdf)} - {str(e)}")
-                        merge_error_count += 1
-
-                if merge_success_count > 0:
-                    try:
-                        merger.write(merged_path)
-                        merger.close()
-                        self.update_proc_status(f"Birleştirilmiş PDF kaydedildi: {os.path.basename(merged_path)}", 100)
-                        self.log_message(f"Kayıt konumu: {merged_path}")
-                        if self.open_after_merge_var.get():
-                            try:
-                                os.startfile(merged_path)
-                            except Exception:
-                                subprocess.Popen([merged_path], shell=True)
-                        total_errors = len(self.error_list) + merge_error_count
-                        result_msg = f"{merge_success_count} fatura birleştirildi ve kaydedildi."
-                        if merge_error_count > 0:
-                            result_msg += f" ({merge_error_count} fatura birleştirilemedi)"
-                        if len(self.error_list) > 0:
-                            result_msg += f" ({len(self.error_list)} fatura dönüştürülemedi)"
-                        self.root.after(0, lambda: self.show_result_in_process_window(result_msg, total_errors))
-                    except Exception as e:
-                        self.root.after(0, lambda: messagebox.showerror("Hata", f"PDF birleştirilirken hata: {str(e)}"))
-                        self.finish_process()
-                else:
-                    self.root.after(0, lambda: messagebox.showerror("Hata", "Hiçbir PDF birleştirilemedi."))
-                    self.finish_process()
-            else:
-                self.update_proc_status("PDF dosyaları kopyalanıyor...", 80)
-                ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-                success_count = 0
-                output_sub = os.path.join(self.output_folder, f"faturalar_{ts}")
-                cnt = 1
-                while os.path.exists(output_sub):
-                    output_sub = os.path.join(self.output_folder, f"faturalar_{ts}_{cnt}")
-                    cnt += 1
-                os.makedirs(output_sub, exist_ok=True)
-
-                for i, (pdf, invoice_date, evrak_id) in enumerate(pdf_files_with_info):
-                    if pdf is None:
-                        continue
-                    if evrak_id:
-                        target_name = f"{evrak_id}.pdf"
-                    else:
-                        if invoice_date:
-                            dstr = invoice_date.strftime("%Y%m%d")
-                            target_name = f"fatura_{dstr}_{i+1}.pdf"
-                        else:
-                            target_name = f"fatura_{i+1}.pdf"
-                    target_path = os.path.join(output_sub, target_name)
-                    base, ext = os.path.splitext(target_name)
-                    cdup = 1
-                    while os.path.exists(target_path):
-                        target_name = f"{base}_{cdup}{ext}"
-                        target_path = os.path.join(output_sub, target_name)
-                        cdup += 1
-                    try:
-                        shutil.copy2(pdf, target_path)
-                        self.log_message(f"✓ Kaydedildi: {os.path.basename(target_path)}")
-                        success_count += 1
-                    except Exception as e:
-                        self.log_message(f"✗ Kaydetme hatası: {os.path.basename(target_path)} - {str(e)}")
-                        self.error_list.append((evrak_id if evrak_id else "Bilinmiyor", f"Dosya kopyalama hatası: {str(e)}"))
-                self.update_proc_status(f"{success_count} PDF dosyası kaydedildi.", 100)
-                self.log_message(f"Kayıt konumu: {output_sub}")
-                result_msg = f"{success_count} fatura PDF'e dönüştürüldü ve kaydedildi."
-                if len(self.error_list) > 0:
-                    result_msg += f" ({len(self.error_list)} fatura dönüştürülemedi)"
-                self.root.after(0, lambda: self.show_result_in_process_window(result_msg, len(self.error_list)))
+                    subprocess.Popen([merged_path], shell=True)
+            result_msg = summary["message"]
+            error_count = summary["error_count"]
+            self.root.after(0, lambda: self.show_result_in_process_window(result_msg, error_count))
 
         except Exception as e:
             self.root.after(0, lambda: messagebox.showerror("Hata", f"İşlem sırasında hata:\n{str(e)}"))
@@ -799,11 +5059,51 @@ class SCubeTR:
                 messagebox.showerror("Hata", f"Çıktı klasörü oluşturulamadı: {str(e)}")
                 return
 
+        # Tk değişkenleri yalnızca ana iş parçacığında okunur
+        options = RunOptions(
+            merge=self.merge_var.get(),
+            sort_by_date=self.sort_by_date_var.get(),
+            sort_order=self.sort_order.get(),
+            batch_size=self.batch_size,
+            cache_max_bytes=self.cache_max_bytes,
+            max_workers=self.max_workers,
+            renderer=self.renderer_name,
+            dedup=self.dedup,
+            sync=self.sync_var.get(),
+            volume_by=self.volume_by,
+            volume_limit=self.volume_limit,
+            temp_budget_mb=self.temp_budget_mb,
+            report=self.write_report,
+        )
+        open_after_merge = self.open_after_merge_var.get()
+
         self.process_running = True
+        self.cancel_token = CancelToken()
         self.create_process_window()
-        t = threading.Thread(target=self.process_files_thread)
+        t = threading.Thread(target=self.process_files_thread, args=(options, open_after_merge, self.cancel_token))
         t.daemon = True
         t.start()
+        self.process_thread = t
+
+    def cancel_process(self):
+        """Çalışan işi iptal eder: bekleyen dönüştürmeler atlanır, çalışan wkhtmltopdf süreçleri sonlandırılır"""
+        if not self.process_running or self.cancel_token is None or self.cancel_token.cancelled:
+            return
+        if not messagebox.askyesno("İptal", "İşlem iptal edilsin mi?", parent=self.process_win):
+            return
+        self.cancel_token.cancel()
+        try:
+            self.cancel_btn.configure(state="disabled")
+        except Exception:
+            pass
+        self.update_proc_status("İptal ediliyor...")
+
+    def on_process_window_close(self):
+        """İşlem penceresi kapatılırken: iş sürüyorsa iptal sorulur, bittiyse pencere kapanır"""
+        if self.process_running:
+            self.cancel_process()
+        else:
+            self.close_process_window()
 
     def create_process_window(self):
         """İşlem durumunu gösteren pencereyi oluştur"""
@@ -820,7 +5120,7 @@ class SCubeTR:
         self.process_win.resizable(False, False)
         self.process_win.transient(self.root)
         self.process_win.grab_set()
-        self.process_win.protocol("WM_DELETE_WINDOW", lambda: None)
+        self.process_win.protocol("WM_DELETE_WINDOW", self.on_process_window_close)
 
         self.proc_frame = ttk.Frame(self.process_win, padding=10)
         self.proc_frame.pack(fill=tk.BOTH, expand=True)
@@ -829,7 +5129,9 @@ class SCubeTR:
         self.proc_progress = ttk.Progressbar(self.proc_top, maximum=100, style="TProgressbar")
         self.proc_progress.pack(fill=tk.X, pady=(5, 10))
         self.proc_status_label = ttk.Label(self.proc_top, text="İşlem Başlatılıyor...", font=("Segoe UI", 11, "bold"), anchor="center")
-        self.proc_status_label.pack(pady=(0, 10), fill=tk.X)
+        self.proc_status_label.pack(pady=(0, 2), fill=tk.X)
+        self.proc_stats_label = ttk.Label(self.proc_top, text="", font=("Segoe UI", 9), anchor="center")
+        self.proc_stats_label.pack(pady=(0, 10), fill=tk.X)
         self.proc_middle = ttk.Frame(self.proc_frame)
         self.proc_middle.pack(fill=tk.BOTH, expand=True, padx=5)
         text_frame = ttk.Frame(self.proc_middle, padding=2, relief="solid", borderwidth=1)
@@ -844,6 +5146,10 @@ class SCubeTR:
         self.proc_bottom.pack(fill=tk.X, pady=(10, 0))
         self.result_frame = ttk.Frame(self.proc_bottom)
         self.result_frame.pack(fill=tk.X)
+        # Sonuç gösterilince result_frame temizlenir, düğme de kalkar
+        self.cancel_btn = ttk.Button(self.result_frame, text="İptal", command=self.cancel_process,
+                                     style="Primary.TButton")
+        self.cancel_btn.pack(pady=(5, 0))
         footer_frame = ttk.Frame(self.proc_bottom, style="Footer.TFrame")
         footer_frame.pack(side=tk.BOTTOM, fill=tk.X, pady=(10, 0))
         footer_text = "Bu uygulama SMMM Arif SIRMACIOĞLU tarafından geliştirilmiştir"
@@ -896,37 +5202,77 @@ class SCubeTR:
 
     def log_message(self, message):
         """
-        Log mesajını sadece ekrana basar.
-        RAM'de tutmaz (self.logs kaldırıldı).
+        Log mesajını ekrana basılmak üzere kuyruğa ekler; her iş parçacığından çağrılabilir.
+        RAM'de tutmaz (self.logs kaldırıldı, kuyruk LOG_MAX_LINES satırla sınırlı).
         Diske yazmaz (Logger kaldırıldı).
         """
         timestamp = datetime.now().strftime("%H:%M:%S")
-        line = f"[{timestamp}] {message}"
-        
-        # self.logs.append(line)  <-- RAM TASARRUFU İÇİN SİLİNDİ
-        # logger.info(message)    <-- DİSK/CONSOLE LOGU İÇİN SİLİNDİ
+        self.log_queue.append(f"[{timestamp}] {message}")
+
+    def update_proc_status(self, message, progress=None):
+        """İşlem durumunu ve ilerlemeyi günceller; ekrana bir sonraki yenilemede yansır"""
+        self.pending_status = (message, progress)
+        self.log_message(message)
+
+    def update_proc_progress(self, snapshot):
+        """Dönüştürme ilerlemesi gözlemcisi (ProgressTracker); yalnızca son durum saklanır"""
+        self.pending_progress = snapshot
+
+    def flush_log_queue(self):
+        """
+        Tk iş parçacığında düzenli aralıklarla çalışır: kuyruktaki logları tek
+        seferde log kutusuna ekler, kutuyu LOG_MAX_LINES satırla sınırlar ve
+        son durum/ilerleme bilgisini uygular.
+        """
+        lines = []
+        while True:
+            try:
+                lines.append(self.log_queue.popleft())
+            except IndexError:
+                break
+        status, self.pending_status = self.pending_status, None
+        snapshot, self.pending_progress = self.pending_progress, None
 
-        # Sadece kullanıcı arayüzünü güncelle (Geçici görselleştirme)
         if self.process_win and hasattr(self, 'proc_text'):
             try:
-                self.proc_text.configure(state='normal')
-                self.proc_text.insert(tk.END, line + "\n")
-                self.proc_text.see(tk.END)
-                self.proc_text.configure(state='disabled')
+                if snapshot is not None:
+                    # Dönüştürme, çubuğun %30-%80 arasını tamamlanan faturalarla doldurur
+                    if snapshot["fraction"] is not None:
+                        self.proc_progress['value'] = 30 + 50 * snapshot["fraction"]
+                    self.proc_stats_label.config(text=format_progress(snapshot))
+                if status is not None:
+                    message, progress = status
+                    if progress is not None:
+                        self.proc_progress['value'] = progress
+                    self.proc_status_label.config(text=message)
+                if lines:
+                    self.proc_text.configure(state='normal')
+                    self.proc_text.insert(tk.END, "\n".join(lines) + "\n")
+                    line_count = int(self.proc_text.index('end-1c').split('.')[0])
+                    if line_count > LOG_MAX_LINES:
+                        self.proc_text.delete('1.0', f"{line_count - LOG_MAX_LINES}.0")
+                    self.proc_text.see(tk.END)
+                    self.proc_text.configure(state='disabled')
             except Exception:
                 pass
-
-    def update_proc_status(self, message, progress=None):
-        """İşlem durumunu ve ilerlemeyi güncelle"""
-        if self.process_win:
-            if progress is not None:
-                self.proc_progress['value'] = progress
-            self.proc_status_label.config(text=message)
-            self.log_message(message)
+        self.root.after(LOG_FLUSH_INTERVAL_MS, self.flush_log_queue)
 
 
-if __name__ == "__main__":
+def main(argv=None):
+    """Argüman verilirse başsız modda çalışır, verilmezse arayüzü açar"""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        return run_headless(argv)
     root = tk.Tk()
     app = SCubeTR(root)
     root.protocol("WM_DELETE_WINDOW", app.on_closing)
-    root.mainloop()
\ No newline at end of file
+    # Ağır kütüphaneler pencere çizildikten sonra arka planda yüklenir
+    root.after(GUI_PRELOAD_DELAY_MS, lambda: threading.Thread(target=preload_dependencies, daemon=True).start())
+    root.mainloop()
+    return 0
+
+
+if __name__ == "__main__":
+    # Donmuş (PyInstaller) Windows sürümünde xhtml2pdf süreç havuzu için gerekli
+    multiprocessing.freeze_support()
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,47 @@
+import os
+import sys
+import zipfile
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(TESTS_DIR)
+BENCH_DIR = os.path.join(ROOT_DIR, "benchmarks")
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import skub  # noqa: E402
+
+STUB_PATH = os.path.join(BENCH_DIR, "stub_wkhtmltopdf.py")
+
+
+@pytest.fixture
+def write_invoice_zip():
+    """
+    (yol, [(dosya adı, içerik), ...]) ile ZIP yazan fonksiyon döndürür; içerik
+    bayt veya metin olabilir.
+    """
+    def write(path, files):
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+            for name, content in files:
+                archive.writestr(name, content)
+        return str(path)
+    return write
+
+
+@pytest.fixture
+def stub_config(monkeypatch):
+    """benchmarks/stub_wkhtmltopdf.py'yi kullanan pdfkit yapılandırması"""
+    monkeypatch.setenv("SKUB_STUB_RENDER_MS", "0")
+    return skub.pdfkit.configuration(wkhtmltopdf=STUB_PATH)
+
+
+@pytest.fixture
+def run_job(tmp_path, stub_config):
+    """Sahte wkhtmltopdf ile InvoiceJob çalıştırıp (iş, özet) döndüren fonksiyon"""
+    def run(zip_path, output_folder, **options):
+        options.setdefault("cache_max_bytes", 0)
+        job = skub.InvoiceJob(str(zip_path), str(output_folder), skub.RunOptions(**options),
+                              str(tmp_path / "temp"), config=stub_config)
+        return job, job.run()
+    return run
@@ -0,0 +1,19 @@
+"""Testlerde kullanılan küçük fatura HTML/XML üreticileri"""
+
+UBL_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<Invoice xmlns="urn:oasis:names:specification:ubl:schema:xsd:Invoice-2"
+         xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2">
+  <cbc:ID>{evrak_id}</cbc:ID>
+  <cbc:IssueDate>{issue_date}</cbc:IssueDate>
+</Invoice>
+"""
+
+
+def invoice_html(title, issue_date, body=""):
+    """Sahte wkhtmltopdf'in sayfa metnine <title>'ı yazdığı küçük bir fatura HTML'i"""
+    return (f"<html><head><meta charset=\"utf-8\"><title>{title}</title></head><body>"
+            f"<p>Düzenleme Tarihi: {issue_date.strftime('%d.%m.%Y')}</p>{body}</body></html>")
+
+
+def invoice_xml(evrak_id, issue_date):
+    return UBL_TEMPLATE.format(evrak_id=evrak_id, issue_date=issue_date.isoformat())
@@ -0,0 +1,82 @@
+import shutil
+from datetime import date, timedelta
+
+import pytest
+from PyPDF2 import PdfReader
+
+import skub
+from invoices import invoice_html, invoice_xml
+
+PAGE_BREAK = '<div style="page-break-after: always"></div>'
+
+
+def page_texts(path):
+    return [page.extract_text().strip() for page in PdfReader(path).pages]
+
+
+def write_outline(path, pages):
+    items = "".join(f'<item title="" page="{page}" link="" backLink=""/>' for page in pages)
+    path.write_text(f'<?xml version="1.0" encoding="UTF-8"?>'
+                    f'<outline xmlns="http://wkhtmltopdf.org/outline">{items}</outline>', encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("pages", [[1, 3, 4], [0, 2, 3]])
+def test_page_ranges_from_outline(tmp_path, pages):
+    renderer = skub.WkhtmltopdfRenderer(None)
+    outline = write_outline(tmp_path / "outline.xml", pages)
+    assert renderer._read_batch_page_ranges(outline, 3, 5) == [(0, 2), (2, 3), (3, 5)]
+
+
+@pytest.mark.parametrize("pages, total", [([1, 3], 5), ([1, 3, 3], 5), ([1, 3, 6], 5)])
+def test_inconsistent_outline_is_rejected(tmp_path, pages, total):
+    renderer = skub.WkhtmltopdfRenderer(None)
+    outline = write_outline(tmp_path / "outline.xml", pages)
+    with pytest.raises(ValueError):
+        renderer._read_batch_page_ranges(outline, 3, total)
+
+
+def test_batch_job_splits_pages_per_invoice(tmp_path, write_invoice_zip, run_job, monkeypatch):
+    batches = []
+    render_batch = skub.WkhtmltopdfRenderer.render_batch
+
+    def spy(self, html_paths, output_paths):
+        batches.append(len(html_paths))
+        return render_batch(self, html_paths, output_paths)
+    monkeypatch.setattr(skub.WkhtmltopdfRenderer, "render_batch", spy)
+
+    files = []
+    for number in range(5):
+        issue_date = date(2024, 1, 1) + timedelta(days=number)
+        body = PAGE_BREAK if number == 1 else ""
+        files.append((f"F{number}.html", invoice_html(f"F{number}", issue_date, body=body)))
+        files.append((f"F{number}.xml", invoice_xml(f"ABC2024{number:09d}", issue_date)))
+    zip_path = write_invoice_zip(tmp_path / "faturalar.zip", files)
+
+    job, summary = run_job(zip_path, tmp_path / "cikti", batch_size=3)
+    assert summary["status"] == "ok"
+    assert sum(batches) == 5 and max(batches) > 1
+    assert job.profile.counters.get("batch_fallbacks", 0) == 0
+    assert page_texts(summary["output"]) == ["F0 sayfa 1", "F1 sayfa 1", "F1 sayfa 2", "F2 sayfa 1",
+                                             "F3 sayfa 1", "F4 sayfa 1"]
+
+
+@pytest.mark.skipif(shutil.which("wkhtmltopdf") is None, reason="wkhtmltopdf PATH'te yok")
+def test_render_batch_with_real_wkhtmltopdf(tmp_path):
+    config = skub.pdfkit.configuration(wkhtmltopdf=shutil.which("wkhtmltopdf"))
+    renderer = skub.WkhtmltopdfRenderer(config)
+    html_paths, output_paths = [], []
+    for number in range(3):
+        html_path = tmp_path / f"F{number}.html"
+        html_path.write_text(invoice_html(f"F{number}", date(2024, 1, 1),
+                                          body=f"<p>Fatura F{number}</p>" + (PAGE_BREAK + "<p>devam</p>"
+                                                                             if number == 1 else "")),
+                             encoding="utf-8")
+        html_paths.append(str(html_path))
+        output_paths.append(str(tmp_path / f"F{number}.pdf"))
+
+    assert renderer.render_batch(html_paths, output_paths) == (True, "")
+    assert [len(PdfReader(path).pages) for path in output_paths] == [1, 2, 1]
+    for number, path in enumerate(output_paths):
+        assert f"Fatura F{number}" in PdfReader(path).pages[0].extract_text()
+    assert sorted(p.name for p in tmp_path.iterdir() if p.suffix != ".html") == ["F0.pdf", "F1.pdf", "F2.pdf"]
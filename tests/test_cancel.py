@@ -0,0 +1,76 @@
+import os
+import threading
+import time
+from datetime import date, timedelta
+
+import pytest
+
+import skub
+from invoices import invoice_html, invoice_xml
+
+STUB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks",
+                         "stub_wkhtmltopdf.py")
+
+pytestmark = pytest.mark.skipif(not os.path.isdir("/proc"), reason="süreçler /proc üzerinden izleniyor")
+
+
+def stub_processes():
+    """Çalışan sahte wkhtmltopdf süreçlerinin pid'leri"""
+    pids = []
+    for pid in os.listdir("/proc"):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                cmdline = f.read()
+        except OSError:
+            continue
+        if STUB_PATH.encode() in cmdline:
+            pids.append(int(pid))
+    return pids
+
+
+def wait_until(condition, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def files_under(folder):
+    return [os.path.join(root, name) for root, _, names in os.walk(folder) for name in names]
+
+
+@pytest.mark.parametrize("merge", [True, False])
+def test_cancel_mid_render_cleans_up(tmp_path, write_invoice_zip, stub_config, monkeypatch, merge):
+    monkeypatch.setenv("SKUB_STUB_RENDER_MS", "1500")
+    files = []
+    for number in range(6):
+        issue_date = date(2024, 1, 1) + timedelta(days=number)
+        files.append((f"F{number}.html", invoice_html(f"F{number}", issue_date)))
+        files.append((f"F{number}.xml", invoice_xml(f"ABC2024{number:09d}", issue_date)))
+    zip_path = write_invoice_zip(tmp_path / "faturalar.zip", files)
+    output_folder = tmp_path / "cikti"
+    temp_dir = tmp_path / "temp"
+    token = skub.CancelToken()
+    job = skub.InvoiceJob(zip_path, str(output_folder), skub.RunOptions(cache_max_bytes=0, merge=merge, max_workers=2),
+                          str(temp_dir), config=stub_config, cancel_token=token)
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(job.run()))
+    thread.start()
+    try:
+        # İlk faturalar bitip sonrakiler dönüştürülürken iptal edilir
+        assert wait_until(lambda: job.progress.done >= 1 and stub_processes())
+        token.cancel()
+        thread.join(30)
+    finally:
+        token.cancel()
+        thread.join(30)
+    assert not thread.is_alive()
+
+    assert result["status"] == "cancelled"
+    assert wait_until(lambda: not stub_processes(), timeout=5), "sahte wkhtmltopdf süreci kaldı"
+    assert files_under(temp_dir) == []
+    assert files_under(output_folder) == []
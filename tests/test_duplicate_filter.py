@@ -0,0 +1,85 @@
+import io
+import zipfile
+from datetime import date
+
+from PyPDF2 import PdfReader
+
+from invoices import invoice_html, invoice_xml
+
+
+def page_texts(path):
+    return [page.extract_text().strip() for page in PdfReader(path).pages]
+
+
+def nested_zip(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in files:
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def duplicate_pairs(summary):
+    # Meta veriler paralel okunduğu için kopyalardan hangisinin önce görülüp tutulacağı belli değildir
+    return sorted((sorted((item["file"], item["kept"])), item["reason"]) for item in summary["duplicates"])
+
+
+def test_duplicates_are_collapsed_before_rendering(tmp_path, write_invoice_zip, run_job):
+    jan, feb = date(2024, 1, 10), date(2024, 2, 5)
+    same_html = invoice_html("B", feb)
+    zip_path = write_invoice_zip(tmp_path / "faturalar.zip", [
+        # Aynı evrak no ve tarih, farklı HTML (ör. yeniden indirilmiş kopya)
+        ("ocak/A.html", invoice_html("A", jan)),
+        ("ocak/A.xml", invoice_xml("ABC2024000000001", jan)),
+        ("yedek/A.html", invoice_html("A", jan, body="<p>yeniden indirildi</p>")),
+        ("yedek/A.xml", invoice_xml("ABC2024000000001", jan)),
+        # XML'i olmayan, bayt bayt aynı HTML; biri iç ZIP'te
+        ("subat/B.html", same_html),
+        ("subat.zip", nested_zip([("B.html", same_html)])),
+        # Farklı düzenleyicilerden aynı numaralı ama farklı tarihli faturalar
+        ("ocak/C.html", invoice_html("C", jan)),
+        ("ocak/C.xml", invoice_xml("XYZ2024000000009", jan)),
+        ("subat/D.html", invoice_html("D", date(2024, 2, 20))),
+        ("subat/D.xml", invoice_xml("XYZ2024000000009", date(2024, 2, 20))),
+    ])
+
+    job, summary = run_job(zip_path, tmp_path / "cikti")
+    assert summary["status"] == "ok"
+    assert summary["html_count"] == 6
+    # Yinelenenler dönüştürülmez
+    assert job.profile.stage_summary()["render"]["calls"] == 4
+    assert summary["pdf_count"] == 4
+    assert duplicate_pairs(summary) == [
+        (["extracted_subat/B.html", "subat/B.html"], "content"),
+        (["ocak/A.html", "yedek/A.html"], "evrak_id"),
+    ]
+    assert {item["evrak_id"] for item in summary["duplicates"]} == {"ABC2024000000001", None}
+    assert page_texts(summary["output"]) == ["A sayfa 1", "C sayfa 1", "B sayfa 1", "D sayfa 1"]
+
+
+def test_invoices_without_evrak_id_are_not_merged(tmp_path, write_invoice_zip, run_job):
+    issue_date = date(2024, 3, 1)
+    zip_path = write_invoice_zip(tmp_path / "faturalar.zip", [
+        # İkisi de XML'siz ve aynı tarihli, içerikleri farklı
+        ("E.html", invoice_html("E", issue_date)),
+        ("F.html", invoice_html("F", issue_date)),
+        # Evrak nosu olan bir faturayla aynı tarihli XML'siz fatura
+        ("G.html", invoice_html("G", issue_date)),
+        ("G.xml", invoice_xml("ABC2024000000007", issue_date)),
+    ])
+
+    job, summary = run_job(zip_path, tmp_path / "cikti")
+    assert summary["status"] == "ok"
+    assert summary["duplicates"] == []
+    assert job.profile.stage_summary()["render"]["calls"] == 3
+    assert sorted(page_texts(summary["output"])) == ["E sayfa 1", "F sayfa 1", "G sayfa 1"]
+
+
+def test_dedup_can_be_turned_off(tmp_path, write_invoice_zip, run_job):
+    html = invoice_html("H", date(2024, 4, 1))
+    zip_path = write_invoice_zip(tmp_path / "faturalar.zip", [("H.html", html), ("kopya/H.html", html)])
+
+    job, summary = run_job(zip_path, tmp_path / "cikti", dedup=False)
+    assert summary["duplicates"] == []
+    assert job.profile.stage_summary()["render"]["calls"] == 2
+    assert page_texts(summary["output"]) == ["H sayfa 1", "H sayfa 1"]
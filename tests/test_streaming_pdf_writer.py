@@ -0,0 +1,161 @@
+import os
+import random
+
+import pytest
+from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2._page import PageObject
+from PyPDF2.generic import DecodedStreamObject, DictionaryObject, NameObject, NumberObject
+
+import skub
+
+FONT_DATA = bytes(random.Random(1).getrandbits(8) for _ in range(8 * 1024))
+IMAGE_DATA = bytes(random.Random(2).getrandbits(8) for _ in range(4 * 16 * 16 * 3))
+
+
+def write_invoice_pdf(path, label, pages=1, font_data=FONT_DATA, image_data=IMAGE_DATA):
+    """Her sayfasında gömülü yazı tipi, logo resmi ve "<label> sayfa N" metni olan PDF yazar"""
+    writer = PdfWriter()
+    for page_no in range(pages):
+        page = PageObject.create_blank_page(None, 595, 842)
+        font_file = DecodedStreamObject()
+        font_file.set_data(font_data)
+        descriptor = DictionaryObject({
+            NameObject("/Type"): NameObject("/FontDescriptor"),
+            NameObject("/FontName"): NameObject("/ABCDEF+Arial"),
+            NameObject("/Flags"): NumberObject(32),
+            NameObject("/FontFile2"): writer._add_object(font_file),
+        })
+        font = DictionaryObject({
+            NameObject("/Type"): NameObject("/Font"),
+            NameObject("/Subtype"): NameObject("/Type1"),
+            NameObject("/BaseFont"): NameObject("/Helvetica"),
+            NameObject("/FontDescriptor"): writer._add_object(descriptor),
+        })
+        image = DecodedStreamObject()
+        image.set_data(image_data)
+        image.update({
+            NameObject("/Type"): NameObject("/XObject"),
+            NameObject("/Subtype"): NameObject("/Image"),
+            NameObject("/Width"): NumberObject(32),
+            NameObject("/Height"): NumberObject(32),
+            NameObject("/ColorSpace"): NameObject("/DeviceRGB"),
+            NameObject("/BitsPerComponent"): NumberObject(8),
+        })
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): writer._add_object(font)}),
+            NameObject("/XObject"): DictionaryObject({NameObject("/Im1"): writer._add_object(image)}),
+        })
+        content = DecodedStreamObject()
+        content.set_data(f"q 32 0 0 32 40 760 cm /Im1 Do Q BT /F1 12 Tf 40 700 Td ({label} sayfa {page_no + 1}) Tj ET"
+                         .encode("latin-1"))
+        page[NameObject("/Contents")] = writer._add_object(content)
+        writer.add_page(page)
+    with open(path, "wb") as f:
+        writer.write(f)
+    return path
+
+
+@pytest.fixture
+def invoices(tmp_path):
+    return [write_invoice_pdf(str(tmp_path / f"fatura_{i}.pdf"), f"Fatura {i}", pages=1 + (i == 1))
+            for i in range(4)]
+
+
+def page_texts(path):
+    return [page.extract_text().strip() for page in PdfReader(path).pages]
+
+
+@pytest.mark.parametrize("optimize", [False, True])
+def test_round_trip_keeps_pages_in_order(tmp_path, invoices, optimize):
+    output = str(tmp_path / "birlesik.pdf")
+    writer = skub.StreamingPdfWriter(output, optimize=optimize)
+    for path in reversed(invoices):
+        writer.append_pdf(path)
+    writer.close()
+
+    reader = PdfReader(output)
+    assert len(reader.pages) == writer.page_count == 5
+    assert page_texts(output) == ["Fatura 3 sayfa 1", "Fatura 2 sayfa 1", "Fatura 1 sayfa 1",
+                                  "Fatura 1 sayfa 2", "Fatura 0 sayfa 1"]
+    for page in reader.pages:
+        assert page["/Resources"]["/XObject"]["/Im1"].get_object().get_data() == IMAGE_DATA
+
+
+@pytest.mark.parametrize("optimize", [False, True])
+def test_selected_pages_are_appended(tmp_path, invoices, optimize):
+    output = str(tmp_path / "birlesik.pdf")
+    writer = skub.StreamingPdfWriter(output, optimize=optimize)
+    reader = PdfReader(invoices[1])
+    assert writer.append_pdf(reader, pages=[1]) == 1
+    assert writer.append_pdf(reader, pages=[0]) == 1
+    writer.close()
+    assert page_texts(output) == ["Fatura 1 sayfa 2", "Fatura 1 sayfa 1"]
+
+
+def test_optimize_shares_fonts_and_images(tmp_path, invoices):
+    plain = str(tmp_path / "duz.pdf")
+    optimized = str(tmp_path / "optimize.pdf")
+    sizes = {}
+    for output, optimize in ((plain, False), (optimized, True)):
+        writer = skub.StreamingPdfWriter(output, optimize=optimize)
+        for path in invoices:
+            writer.append_pdf(path)
+        writer.close()
+        sizes[optimize] = (writer.dedup_objects, writer.dedup_bytes)
+
+    assert sizes[False] == (0, 0)
+    dedup_objects, dedup_bytes = sizes[True]
+    # İlk sayfadan sonraki 4 sayfa yazı tipi akışını, tanımlayıcısını, yazı tipi
+    # sözlüğünü ve resmi yeniden yazmak yerine ilk sayfanınkilere başvurur
+    assert dedup_objects >= 4 * 4
+    assert dedup_bytes >= 4 * (len(FONT_DATA) + len(IMAGE_DATA)) // 2
+    assert os.path.getsize(optimized) < os.path.getsize(plain) - dedup_bytes // 2
+    assert page_texts(optimized) == page_texts(plain)
+
+
+def test_different_resources_are_not_shared(tmp_path):
+    paths = [write_invoice_pdf(str(tmp_path / f"f{i}.pdf"), f"Fatura {i}",
+                               image_data=bytes([i]) * len(IMAGE_DATA)) for i in range(2)]
+    output = str(tmp_path / "birlesik.pdf")
+    writer = skub.StreamingPdfWriter(output, optimize=True)
+    for path in paths:
+        writer.append_pdf(path)
+    writer.close()
+
+    images = [page["/Resources"]["/XObject"]["/Im1"].get_object().get_data() for page in PdfReader(output).pages]
+    assert images == [bytes([0]) * len(IMAGE_DATA), bytes([1]) * len(IMAGE_DATA)]
+    # Yazı tipi yine de ortaktır
+    assert writer.dedup_objects > 0
+
+
+@pytest.mark.parametrize("optimize", [False, True])
+def test_abort_leaves_no_tmp_file(tmp_path, invoices, optimize):
+    output = str(tmp_path / "birlesik.pdf")
+    writer = skub.StreamingPdfWriter(output + ".tmp", optimize=optimize)
+    writer.append_pdf(invoices[0])
+    writer.abort()
+    writer.abort()
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(path) for path in invoices)
+
+
+def test_cancelled_volume_leaves_no_tmp_file(tmp_path, invoices):
+    token = skub.CancelToken()
+    output = str(tmp_path / "cilt01.pdf")
+
+    def cancel_after_first():
+        yield invoices[0]
+        token.cancel()
+        yield invoices[1]
+    with pytest.raises(skub.JobCancelled):
+        skub.write_pdf_volume(output, cancel_after_first(), optimize=True, cancel_token=token)
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(path) for path in invoices)
+
+
+def test_volume_without_readable_invoices_is_not_written(tmp_path):
+    broken = tmp_path / "bozuk.pdf"
+    broken.write_bytes(b"%PDF-1.4 bozuk")
+    output = str(tmp_path / "cilt01.pdf")
+    pages, merged, errors, _, _ = skub.write_pdf_volume(output, [str(broken)])
+    assert (pages, merged, len(errors)) == (0, 0, 1)
+    assert not os.path.exists(output)
+    assert not os.path.exists(output + ".tmp")
@@ -0,0 +1,165 @@
+import json
+import os
+from datetime import date
+
+from PyPDF2 import PdfReader
+
+import skub
+from invoices import invoice_html, invoice_xml
+
+INVOICES = {
+    "A": ("ABC2024000000001", date(2024, 1, 10)),
+    "B": ("ABC2024000000002", date(2024, 2, 5)),
+    "C": ("ABC2024000000003", date(2024, 2, 25)),
+    "D": ("ABC2024000000004", date(2024, 2, 15)),
+}
+
+
+def archive_files(*stems):
+    files = []
+    for stem in stems:
+        evrak_id, issue_date = INVOICES[stem]
+        files.append((f"faturalar/{stem}.html", invoice_html(stem, issue_date)))
+        files.append((f"faturalar/{stem}.xml", invoice_xml(evrak_id, issue_date)))
+    return files
+
+
+def page_texts(path):
+    return [page.extract_text().strip() for page in PdfReader(path).pages]
+
+
+def load_manifest(output_folder):
+    with open(os.path.join(output_folder, skub.MANIFEST_NAME), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def entry_for(manifest, stem):
+    evrak_id = INVOICES[stem][0]
+    entries = [entry for entry in manifest["invoices"] if entry["evrak_id"] == evrak_id]
+    assert len(entries) == 1
+    return entries[0]
+
+
+def rendered(job):
+    return job.profile.stage_summary().get("render", {}).get("calls", 0)
+
+
+def age(path):
+    """Dosyanın değişiklik zamanını geri alır; yeniden yazılırsa fark edilir"""
+    os.utime(path, ns=(10 ** 18, 10 ** 18))
+    return os.stat(path).st_mtime_ns
+
+
+def test_superset_run_renders_only_new_invoices(tmp_path, write_invoice_zip, run_job):
+    output = tmp_path / "cikti"
+    jan = output / "birlesik_faturalar_2024-01.pdf"
+    feb = output / "birlesik_faturalar_2024-02.pdf"
+
+    job, summary = run_job(write_invoice_zip(tmp_path / "1.zip", archive_files("A", "B", "C")), output, sync=True)
+    assert summary["status"] == "ok"
+    assert rendered(job) == 3
+    assert summary["sync"]["periods"] == ["2024-01", "2024-02"]
+    assert page_texts(jan) == ["A sayfa 1"]
+    assert page_texts(feb) == ["B sayfa 1", "C sayfa 1"]
+    jan_bytes = jan.read_bytes()
+    jan_mtime = age(jan)
+
+    job, summary = run_job(write_invoice_zip(tmp_path / "2.zip", archive_files("A", "B", "C", "D")), output, sync=True)
+    assert summary["status"] == "ok"
+    assert rendered(job) == 1
+    assert (summary["sync"]["known"], summary["sync"]["new"]) == (3, 1)
+    assert summary["sync"]["periods"] == ["2024-02"]
+    # Yeni fatura gelmeyen dönem yeniden yazılmaz
+    assert os.stat(jan).st_mtime_ns == jan_mtime
+    assert jan.read_bytes() == jan_bytes
+    # Değişen dönemde eski ve yeni sayfalar tarih sırasında
+    assert page_texts(feb) == ["B sayfa 1", "D sayfa 1", "C sayfa 1"]
+
+    manifest = load_manifest(output)
+    assert len(manifest["invoices"]) == 4
+    assert [(entry_for(manifest, stem)["page_start"], entry_for(manifest, stem)["page_count"])
+            for stem in ("B", "D", "C")] == [(0, 1), (1, 1), (2, 1)]
+    assert manifest["merged"] == {"2024-01": jan.name, "2024-02": feb.name}
+
+
+def test_same_archive_again_renders_nothing(tmp_path, write_invoice_zip, run_job):
+    output = tmp_path / "cikti"
+    zip_path = write_invoice_zip(tmp_path / "1.zip", archive_files("A", "B"))
+    run_job(zip_path, output, sync=True)
+    outputs = {name: age(output / name) for name in os.listdir(output) if name.endswith(".pdf")}
+
+    job, summary = run_job(zip_path, output, sync=True)
+    assert summary["status"] == "ok"
+    assert rendered(job) == 0
+    assert (summary["sync"]["known"], summary["sync"]["new"]) == (2, 0)
+    assert {name: os.stat(output / name).st_mtime_ns for name in outputs} == outputs
+
+
+def test_corrupt_period_pdf_drops_its_entries(tmp_path, write_invoice_zip, run_job):
+    output = tmp_path / "cikti"
+    feb = output / "birlesik_faturalar_2024-02.pdf"
+    run_job(write_invoice_zip(tmp_path / "1.zip", archive_files("A", "B")), output, sync=True)
+    feb.write_bytes(b"%PDF-1.4 bozuk")
+
+    superset = write_invoice_zip(tmp_path / "2.zip", archive_files("A", "B", "D"))
+    job, summary = run_job(superset, output, sync=True)
+    assert summary["status"] == "ok"
+    assert rendered(job) == 1
+    assert page_texts(feb) == ["D sayfa 1"]
+    manifest = load_manifest(output)
+    assert "period" not in entry_for(manifest, "B")
+    assert entry_for(manifest, "D")["page_start"] == 0
+
+    # Düşürülen fatura sonraki çalıştırmada yeniden üretilip yerine girer
+    job, summary = run_job(superset, output, sync=True)
+    assert rendered(job) == 1
+    assert summary["sync"]["periods"] == ["2024-02"]
+    assert page_texts(feb) == ["B sayfa 1", "D sayfa 1"]
+    manifest = load_manifest(output)
+    assert entry_for(manifest, "B")["period"] == "2024-02"
+
+
+def test_missing_period_pdf_is_rebuilt(tmp_path, write_invoice_zip, run_job):
+    output = tmp_path / "cikti"
+    jan = output / "birlesik_faturalar_2024-01.pdf"
+    zip_path = write_invoice_zip(tmp_path / "1.zip", archive_files("A", "B"))
+    run_job(zip_path, output, sync=True)
+    jan.unlink()
+
+    job, summary = run_job(zip_path, output, sync=True)
+    assert summary["status"] == "ok"
+    assert rendered(job) == 1
+    assert summary["sync"]["periods"] == ["2024-01"]
+    assert page_texts(jan) == ["A sayfa 1"]
+    manifest = load_manifest(output)
+    assert len(manifest["invoices"]) == 2
+    assert (entry_for(manifest, "A")["period"], entry_for(manifest, "A")["page_start"]) == ("2024-01", 0)
+
+
+def test_split_mode_appends_into_sync_split_folder(tmp_path, write_invoice_zip, run_job):
+    output = tmp_path / "cikti"
+    split_folder = output / skub.SYNC_SPLIT_FOLDER
+
+    job, summary = run_job(write_invoice_zip(tmp_path / "1.zip", archive_files("A", "B")), output,
+                           sync=True, merge=False)
+    assert summary["status"] == "ok"
+    assert summary["output"] == str(split_folder)
+    first = {name: age(split_folder / name) for name in os.listdir(split_folder)}
+    assert len(first) == 2
+
+    job, summary = run_job(write_invoice_zip(tmp_path / "2.zip", archive_files("A", "B", "D")), output,
+                           sync=True, merge=False)
+    assert summary["status"] == "ok"
+    assert rendered(job) == 1
+    assert (summary["sync"]["known"], summary["sync"]["new"]) == (2, 1)
+    names = sorted(os.listdir(split_folder))
+    assert len(names) == 3
+    # Önceki PDF'lere dokunulmaz, yeni fatura yanlarına eklenir
+    assert {name: os.stat(split_folder / name).st_mtime_ns for name in first} == first
+    added, = set(names) - set(first)
+    assert page_texts(split_folder / added) == ["D sayfa 1"]
+
+    manifest = load_manifest(output)
+    assert entry_for(manifest, "D")["file"] == f"{skub.SYNC_SPLIT_FOLDER}/{added}"
+    assert all((output / entry["file"]).exists() for entry in manifest["invoices"])
+    assert not [name for name in os.listdir(output) if name.endswith(".pdf")]
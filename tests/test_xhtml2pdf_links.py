@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+import skub
+
+
+@pytest.fixture
+def invoice_dir(tmp_path):
+    folder = tmp_path / "fatura"
+    (folder / "img").mkdir(parents=True)
+    (folder / "img" / "logo.png").write_bytes(b"png")
+    (tmp_path / "secret.png").write_bytes(b"secret")
+    return folder
+
+
+def test_relative_resources_resolve_inside_html_folder(invoice_dir):
+    callback = skub._confined_link_callback(str(invoice_dir))
+    assert callback("img/logo.png", None) == os.path.realpath(invoice_dir / "img" / "logo.png")
+    assert callback("img/logo%20x.png?v=1", None) == os.path.realpath(invoice_dir / "img" / "logo x.png")
+
+
+def test_inline_data_uris_are_kept(invoice_dir):
+    callback = skub._confined_link_callback(str(invoice_dir))
+    assert callback("data:image/png;base64,AAAA", None) == "data:image/png;base64,AAAA"
+
+
+@pytest.mark.parametrize("uri", [
+    "../secret.png",
+    "img/../../secret.png",
+    "/etc/passwd",
+    "\\\\server\\share\\logo.png",
+    "C:\\Windows\\logo.png",
+    "file:///etc/passwd",
+    "http://example.com/logo.png",
+    "https://example.com/style.css",
+])
+def test_everything_else_is_blocked(invoice_dir, uri):
+    callback = skub._confined_link_callback(str(invoice_dir))
+    assert callback(uri, None) == skub._XHTML2PDF_BLOCKED_URI
+
+
+def test_symlink_out_of_the_folder_is_blocked(invoice_dir):
+    os.symlink(invoice_dir.parent / "secret.png", invoice_dir / "link.png")
+    callback = skub._confined_link_callback(str(invoice_dir))
+    assert callback("link.png", None) == skub._XHTML2PDF_BLOCKED_URI
+
+
+def test_render_skips_blocked_resources(invoice_dir):
+    pytest.importorskip("xhtml2pdf")
+    html_path = invoice_dir / "fatura.html"
+    html_path.write_text(f'<html><body><img src="{invoice_dir.parent / "secret.png"}">'
+                         '<img src="http://127.0.0.1:9/x.png"><p>Fatura</p></body></html>', encoding="utf-8")
+    output_path = invoice_dir / "fatura.pdf"
+    assert skub._xhtml2pdf_render(str(html_path), str(output_path), "") == (None, "")
+    assert output_path.read_bytes().startswith(b"%PDF")